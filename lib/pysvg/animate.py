@@ -15,11 +15,14 @@ class AnimationAttrib(XLinkAttrib):
     """
     The AnimationAttrib class defines the Animation.attrib attribute set.
     """
+    __slots__ = ()
 
-class AnimationAttributeAttrib:
+class AnimationAttributeAttrib(object):
     """
     The AnimationAttributeAttrib class defines the AnimationAttribute.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_attributeName(self, attributeName):
         self._attributes['attributeName'] = attributeName
     def get_attributeName(self):
@@ -30,10 +33,12 @@ class AnimationAttributeAttrib:
     def get_attributeType(self):
         return self._attributes.get('attributeType')
 
-class AnimationTimingAttrib:
+class AnimationTimingAttrib(object):
     """
     The AnimationTimingAttrib class defines the AnimationTiming.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_begin(self, begin):
         self._attributes['begin'] = begin
     def get_begin(self):
@@ -79,10 +84,12 @@ class AnimationTimingAttrib:
     def get_fill(self):
         return self._attributes.get('fill')
 
-class AnimationValueAttrib:
+class AnimationValueAttrib(object):
     """
     The AnimationValueAttrib class defines the AnimationValue.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_calcMode(self, calcMode):
         self._attributes['calcMode'] = calcMode
     def get_calcMode(self):
@@ -118,10 +125,12 @@ class AnimationValueAttrib:
     def get_by(self):
         return self._attributes.get('by')
 
-class AnimationAdditionAttrib:
+class AnimationAdditionAttrib(object):
     """
     The AnimationAdditionAttrib class defines the AnimationAddition.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_additive(self, additive):
         self._attributes['additive'] = additive
     def get_additive(self):
@@ -132,10 +141,12 @@ class AnimationAdditionAttrib:
     def get_accumulate(self):
         return self._attributes.get('accumulate')
         
-class AnimationEventsAttrib:
+class AnimationEventsAttrib(object):
     """
     The AnimationEventsAttrib class defines the AnimationEvents.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_onbegin(self, onbegin):
         self._attributes['onbegin'] = onbegin
     def get_onbegin(self):
@@ -162,6 +173,8 @@ class animate(BaseShape, CoreAttrib, ConditionalAttrib, ExternalAttrib, Animatio
     """
     Class representing the animate element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'animate')
         self.setKWARGS(**kwargs)
@@ -170,6 +183,8 @@ class set(BaseShape, CoreAttrib, ConditionalAttrib, ExternalAttrib, AnimationEve
     """
     Class representing the set element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'set')
         self.setKWARGS(**kwargs)
@@ -183,6 +198,8 @@ class animateMotion(BaseShape, CoreAttrib, ConditionalAttrib, ExternalAttrib, An
     """
     Class representing the animateMotion element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'animateMotion')
         self.setKWARGS(**kwargs)
@@ -211,6 +228,8 @@ class animateTransform(BaseShape, CoreAttrib, ConditionalAttrib, ExternalAttrib,
     """
     Class representing the animateTransform element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'animateTransform')
         self.setKWARGS(**kwargs)
@@ -224,6 +243,8 @@ class animateColor(BaseShape, CoreAttrib, ConditionalAttrib, ExternalAttrib, Ani
     """
     Class representing the animateColor element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'animateColor')
         self.setKWARGS(**kwargs)
@@ -232,6 +253,8 @@ class mpath(BaseShape, CoreAttrib, XLinkAttrib, ExternalAttrib):
     """
     Class representing the animateColor element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'mpath')
         self.setKWARGS(**kwargs)
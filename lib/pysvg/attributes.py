@@ -4,11 +4,13 @@
 (C) 2008, 2009 Kerim Mansour
 For licensing information please refer to license.txt
 '''
-class CoreAttrib:
+class CoreAttrib(object):
     """
     The CoreAttrib class defines the attribute set Core.attrib
     that is the core set of attributes that can be present on any element.
     """
+    __slots__ = ()
+    
     def set_id(self, id):
         self._attributes['id'] = id
     
@@ -33,10 +35,12 @@ class CoreAttrib:
     def get_xml_space(self):
         return self._attributes.get('xml:space')
 
-class ConditionalAttrib:
+class ConditionalAttrib(object):
     """
     The ConditionalAttrib class defines the Conditional.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_requiredFeatures(self, requiredFeatures):
         self._attributes['requiredFeatures'] = requiredFeatures
     
@@ -55,10 +59,12 @@ class ConditionalAttrib:
     def get_systemLanguage(self):
         return self._attributes.get('systemLanguage')
 
-class StyleAttrib:
+class StyleAttrib(object):
     """
     The StyleAttrib class defines the Style.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_style(self, style):
         self._attributes['style'] = style
     
@@ -71,10 +77,12 @@ class StyleAttrib:
     def get_class(self):
         return self._attributes.get('class')
     
-class GraphicalEventsAttrib:
+class GraphicalEventsAttrib(object):
     """
     The GraphicalEventsAttrib class defines the GraphicalEvents.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_onfocusin(self, onfocusin):
         self._attributes['onfocusin'] = onfocusin
     
@@ -137,30 +145,36 @@ class GraphicalEventsAttrib:
 
 
     
-class CursorAttrib:
+class CursorAttrib(object):
     """
     The CursorAttrib class defines the Cursor.attrib attribute set.
     """   
+    __slots__ = ()
+    
     def set_cursor(self, cursor):
         self._attributes['cursor'] = cursor
     
     def get_cursor(self):
         return self._attributes.get('cursor')
     
-class ExternalAttrib:
+class ExternalAttrib(object):
     """
     The ExternalAttrib class defines the External.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_externalResourcesRequired(self, externalResourcesRequired):
         self._attributes['externalResourcesRequired'] = externalResourcesRequired
     
     def get_externalResourcesRequired(self):
         return self._attributes.get('externalResourcesRequired')
 
-class DocumentEventsAttrib:
+class DocumentEventsAttrib(object):
     """
     The DocumentEventsAttrib class defines the DocumentEvents.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_onunload(self, onunload):
         self._attributes['onunload'] = onunload
     
@@ -197,10 +211,12 @@ class DocumentEventsAttrib:
     def get_onzoom(self):
         return self._attributes.get('onzoom')
 
-class OpacityAttrib:
+class OpacityAttrib(object):
     """
     The OpacityAttrib class defines the Opacity.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_opacity(self, opacity):
         self._attributes['opacity'] = opacity
     
@@ -219,10 +235,12 @@ class OpacityAttrib:
     def get_fill_opacity(self):
         return self._attributes.get('fill-opacity')
 
-class PaintAttrib:
+class PaintAttrib(object):
     """
     The PaintAttrib class defines the Paint.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_color(self, color):
         self._attributes['color'] = color
     
@@ -295,10 +313,12 @@ class PaintAttrib:
     def get_stroke_width(self):
         return self._attributes.get('stroke-width')
     
-class GraphicsAttrib:
+class GraphicsAttrib(object):
     """
     The GraphicsAttrib class defines the Graphics.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_display(self, display):
         self._attributes['display'] = display
     
@@ -335,10 +355,12 @@ class GraphicsAttrib:
     def get_visibility(self):
         return self._attributes.get('visibility')
 
-class MarkerAttrib:
+class MarkerAttrib(object):
     """
     The MarkerAttrib class defines the Marker.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_marker_start(self, marker_start):
         self._attributes['marker-start'] = marker_start
     
@@ -357,10 +379,12 @@ class MarkerAttrib:
     def get_marker_end(self):
         return self._attributes.get('marker-end')
     
-class ViewportAttrib:
+class ViewportAttrib(object):
     """
     The ViewportAttrib class defines the Viewport.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_clip(self, clip):
         self._attributes['clip'] = clip
     
@@ -373,30 +397,36 @@ class ViewportAttrib:
     def get_overflow(self):
         return self._attributes.get('overflow')
 
-class FilterAttrib:
+class FilterAttrib(object):
     """
     The FilterAttrib class defines the Filter.attrib attribute sets.
     """
+    __slots__ = ()
+    
     def set_filter(self, filter):
         self._attributes['filter'] = filter
     
     def get_filter(self):
         return self._attributes.get('filter')
 
-class FilterColorAttrib:
+class FilterColorAttrib(object):
     """
     The FilterColorAttrib class defines the FilterColor.attrib attribute sets.
     """
+    __slots__ = ()
+    
     def set_color_interpolation_filters(self, color_interpolation_filters):
         self._attributes['color-interpolation-filters'] = color_interpolation_filters
     
     def get_color_interpolation_filters(self):
         return self._attributes.get('color-interpolation-filters')
     
-class FilterPrimitiveAttrib:
+class FilterPrimitiveAttrib(object):
     """
     The FilterPrimitiveAttrib class defines the FilterPrimitive.attrib attribute sets.
     """
+    __slots__ = ()
+    
     def set_x(self, x):
         self._attributes['x'] = x
     
@@ -431,16 +461,20 @@ class FilterPrimitiveWithInAttrib(FilterPrimitiveAttrib):
     """
     The FilterPrimitiveWithInAttrib class defines the FilterPrimitiveWithIn.attrib attribute sets.
     """
+    __slots__ = ()
+    
     def set_in(self, inValue):
         self._attributes['in'] = inValue
     
     def get_in(self):
         return self._attributes.get('in')
     
-class XLinkAttrib:
+class XLinkAttrib(object):
     """
     The XLinkAttrib class defines the XLink.attrib, XLinkRequired.attrib, XLinkEmbed.attrib and XLinkReplace.attrib attribute sets.
     """
+    __slots__ = ()
+    
     def set_xlink_type(self, xlink_type):
         self._attributes['xlink:type'] = xlink_type
     def get_xlink_type(self):
@@ -476,19 +510,23 @@ class XLinkAttrib:
     def get_xlink_actuate(self):
         return self.attributes['xlink:actuate']
 
-class TextAttrib:
+class TextAttrib(object):
     """
     The TextAttrib class defines the Text.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_writing_mode(self, writing_mode):
         self._attributes['writing-mode'] = writing_mode
     def get_writing_mode(self):
         return self.attributes['writing-mode']
 
-class TextContentAttrib:
+class TextContentAttrib(object):
     """
     The TextContentAttrib class defines the TextContent.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_alignment_baseline(self, alignment_baseline):
         self._attributes['alignment-baseline'] = alignment_baseline
     def get_alignment_baseline(self):
@@ -549,10 +587,12 @@ class TextContentAttrib:
     def get_word_spacing(self):
         return self.attributes['word-spacing']
 
-class FontAttrib:
+class FontAttrib(object):
     """
     The FontAttrib class defines the Font.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_font_family(self, font_family):
         self._attributes['font-family'] = font_family
     def get_font_family(self):
@@ -588,20 +628,24 @@ class FontAttrib:
     def get_font_weight(self):
         return self.attributes['font-weight']
     
-class MaskAttrib:
+class MaskAttrib(object):
     """
     The MaskAttrib class defines the Mask.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_mask(self, mask):
         self._attributes['mask'] = mask
     
     def get_mask(self):
         return self._attributes.get('mask')
 
-class ClipAttrib:
+class ClipAttrib(object):
     """
     The ClipAttrib class defines the Clip.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_clip_path(self, clip_path):
         self._attributes['clip-path'] = clip_path
     
@@ -614,10 +658,12 @@ class ClipAttrib:
     def get_clip_rule(self):
         return self._attributes.get('clip-rule')
 
-class GradientAttrib:
+class GradientAttrib(object):
     """
     The GradientAttrib class defines the Gradient.attrib attribute set.
     """
+    __slots__ = ()
+    
     def set_stop_color(self, stop_color):
         self._attributes['stop-color'] = stop_color
     
@@ -630,11 +676,13 @@ class GradientAttrib:
     def get_stop_opacity(self):
         return self._attributes.get('stop-opacity')
 
-class PresentationAttributes_Color:
+class PresentationAttributes_Color(object):
     """
     The PresentationAttributes_Color class defines the PresentationAttributes_Color.attrib attribute set.
     The following presentation attributes have to do with specifying color.
     """
+    __slots__ = ()
+    
     def set_color(self, color):
         self._attributes['color'] = color
     
@@ -653,22 +701,26 @@ class PresentationAttributes_Color:
     def get_color_rendering(self):
         return self._attributes.get('color-rendering')
 
-class PresentationAttributes_Containers:
+class PresentationAttributes_Containers(object):
     """
     The PresentationAttributes_Containers class defines the PresentationAttributes_Containers.attrib attribute set.
     The following presentation attributes apply to container elements.
     """
+    __slots__ = ()
+    
     def set_enable_background(self, enableBackground):
         self._attributes['enable-background'] = enableBackground
     
     def get_enable_background(self):
         return self._attributes.get('enable-background')
 
-class PresentationAttributes_feFlood:
+class PresentationAttributes_feFlood(object):
     """
     The PresentationAttributes_feFlood class defines the PresentationAttributes_feFlood.attrib attribute set.
     The following presentation attributes apply to 'feFlood' elements.
     """
+    __slots__ = ()
+    
     def set_flood_color(self, flood_color):
         self._attributes['flood-color'] = flood_color
     def get_flood_color(self):
@@ -679,21 +731,25 @@ class PresentationAttributes_feFlood:
     def get_flood_opacity(self):
         return self._attributes.get('flood-opacity')
 
-class PresentationAttributes_FilterPrimitives:
+class PresentationAttributes_FilterPrimitives(object):
     """
     The PresentationAttributes_FilterPrimitives class defines the PresentationAttributes_FilterPrimitives.attrib attribute set.
     The following presentation attributes apply to filter primitives
     """
+    __slots__ = ()
+    
     def set_color_interpolation_filters(self, color_interpolation_filters):
         self._attributes['color-interpolation-filters'] = color_interpolation_filters
     def get_color_interpolation_filters(self):
         return self._attributes.get('color-interpolation-filters')
     
-class PresentationAttributes_FillStroke:
+class PresentationAttributes_FillStroke(object):
     """
     The PresentationAttributes_FillStroke class defines the PresentationAttributes_FillStroke.attrib attribute set.
     The following presentation attributes apply to filling and stroking operations.
     """
+    __slots__ = ()
+    
     def set_fill(self, fill):
         self._attributes['fill'] = fill
     
@@ -765,40 +821,48 @@ class PresentationAttributes_FontSpecification(FontAttrib):
     The PresentationAttributes_FontSpecification class defines the PresentationAttributes_FontSpecification.attrib attribute set.
     The following presentation attributes have to do with selecting a font to use.
     """
+    __slots__ = ()
 
 class PresentationAttributes_Gradients(GradientAttrib):
     """
     The PresentationAttributes_Gradients class defines the PresentationAttributes_Gradients.attrib attribute set.
     The following presentation attributes apply to gradient 'stop' elements.
     """
+    __slots__ = ()
 
 class PresentationAttributes_Graphics(ClipAttrib, CursorAttrib, GraphicsAttrib, MaskAttrib, FilterAttrib):
     """
     The PresentationAttributes_Graphics class defines the PresentationAttributes_Graphics.attrib attribute set.
     The following presentation attributes apply to graphics elements
     """   
+    __slots__ = ()
+    
     def set_opacity(self, opacity):
         self._attributes['opacity'] = opacity
     
     def get_opacity(self):
         return self._attributes.get('opacity')
   
-class PresentationAttributes_Images:
+class PresentationAttributes_Images(object):
     """
     The PresentationAttributes_Images class defines the PresentationAttributes_Images.attrib attribute set.
     The following presentation attributes apply to 'image' elements
     """
+    __slots__ = ()
+    
     def set_color_profile(self, color_profile):
         self._attributes['color-profile'] = color_profile
     
     def get_color_profile(self):
         return self._attributes.get('color-profile')
 
-class PresentationAttributes_LightingEffects:
+class PresentationAttributes_LightingEffects(object):
     """
     The PresentationAttributes_LightingEffects class defines the PresentationAttributes_LightingEffects.attrib attribute set.
     The following presentation attributes apply to 'feDiffuseLighting' and 'feSpecularLighting' elements
     """
+    __slots__ = ()
+    
     def set_lighting_color(self, lighting_color):
         self._attributes['lighting-color'] = lighting_color
     def get_lighting_color(self):
@@ -809,32 +873,38 @@ class PresentationAttributes_Marker(MarkerAttrib):
     The PresentationAttributes_Marker class defines the PresentationAttributes_Marker.attrib attribute set.
     The following presentation attributes apply to marker operations
     """
+    __slots__ = ()
 
 class PresentationAttributes_TextContentElements(TextContentAttrib):
     """
     The PresentationAttributes_TextContentElements class defines the PresentationAttributes_TextContentElements.attrib attribute set.
     The following presentation attributes apply to text content elements
     """
+    __slots__ = ()
 
 class PresentationAttributes_TextElements(TextAttrib):
     """
     The following presentation attributes apply to 'text' elements
     """  
+    __slots__ = ()
 
 class PresentationAttributes_Viewports(ViewportAttrib):
     """
     The following presentation attributes apply to elements that establish viewports
     """  
+    __slots__ = ()
 
 class PresentationAttributes_All(PresentationAttributes_Color, PresentationAttributes_Containers, PresentationAttributes_feFlood, PresentationAttributes_FillStroke, PresentationAttributes_FilterPrimitives, PresentationAttributes_FontSpecification, PresentationAttributes_Gradients, PresentationAttributes_Graphics, PresentationAttributes_Images, PresentationAttributes_LightingEffects, PresentationAttributes_Marker, PresentationAttributes_TextContentElements, PresentationAttributes_TextElements, PresentationAttributes_Viewports):
     """
     The PresentationAttributes_All class defines the Presentation.attrib attribute set.
     """
+    __slots__ = ()
     
 
-class ColorAttrib:
+class ColorAttrib(object):
     """
     The ColorAttrib class defines the Color.attrib attribute set.
     """
+    __slots__ = ()
     
 
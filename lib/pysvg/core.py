@@ -4,13 +4,77 @@
 (C) 2008, 2009 Kerim Mansour
 For licensing information please refer to license.txt
 '''
+import gzip
 from attributes import CoreAttrib, ConditionalAttrib, StyleAttrib, GraphicalEventsAttrib, PaintAttrib, OpacityAttrib, GraphicsAttrib, CursorAttrib, FilterAttrib, MaskAttrib, ClipAttrib
 
 
-class TextContent:
+#Shared default for elements without sub elements. Replaced by a list on the
+#first addElement, so leaf elements like paths never allocate one.
+_NO_ELEMENTS = ()
+
+#Per class dispatch tables, see getSetterTable and getKWARGSTable.
+_setterTables = {}
+_kwargsTables = {}
+
+def getSetterTable(cls):
+    """
+    Returns a dictionary mapping the name suffix of every set_ method of the
+    class (e.g. 'stroke_width') to the plain setter function.
+    The table is built once per class.
+    """
+    table = _setterTables.get(cls)
+    if table is None:
+        table = {}
+        for name in dir(cls):
+            if name.startswith('set_'):
+                f = getattr(cls, name)
+                table[name[4:]] = getattr(f, 'im_func', f)
+        _setterTables[cls] = table
+    return table
+
+def getKWARGSTable(cls):
+    """
+    Returns a dictionary mapping keyword arguments to the raw xml attribute
+    name for setters that only store their argument in _attributes, or to
+    the setter function for all other setters.
+    The table is built once per class.
+    """
+    table = _kwargsTables.get(cls)
+    if table is None:
+        table = {}
+        for key, f in getSetterTable(cls).items():
+            table[key] = _rawAttributeName(cls, f) or f
+        _kwargsTables[cls] = table
+    return table
+
+def _rawAttributeName(cls, setter):
+    """
+    Calls the setter on an uninitialized instance and returns the attribute
+    name if the only effect was to store the argument in _attributes.
+    """
+    probe = cls.__new__(cls)
+    probe._attributes = {}
+    probe._subElements = _NO_ELEMENTS
+    marker = object()
+    try:
+        setter(probe, marker)
+    except Exception:
+        return None
+    if (len(probe._attributes) != 1 or probe._subElements is not _NO_ELEMENTS
+            or hasattr(probe, '_elementName') or hasattr(probe, '_textContent')):
+        return None
+    name, value = probe._attributes.items()[0]
+    if value is not marker:
+        return None
+    return name
+
+
+class TextContent(object):
     """
     Class for the text content of an xml element. Can also include PCDATA
     """
+    __slots__ = ('content',)
+    
     def __init__(self,content):
         self.content=content
     def setContent(self,content):
@@ -18,11 +82,13 @@ class TextContent:
     def getXML(self):
         return self.content
     
-class BaseElement:
+class BaseElement(object):
     """
     This is the base class for all svg elements like title etc. It provides common functionality.
     It should NOT be directly used by anyone.
     """
+    __slots__ = ('_elementName', '_attributes', '_textContent', '_subElements')
+    
     def __init__(self, elementName):
         """
         initializes the object
@@ -30,20 +96,34 @@ class BaseElement:
         @param elementName:  name of the element (used for the xml tag) 
         """
         self._elementName=elementName
-        self._attributes={}  #key value
         self._textContent=""
-        self._subElements=[]
+        self._subElements=_NO_ELEMENTS
+    
+    def __getattr__(self, name):
+        """
+        Only called for unset slots. The attribute dictionary (key value) is
+        allocated on first access.
+        """
+        if name == '_attributes':
+            attributes = self._attributes = {}
+            return attributes
+        raise AttributeError(name)
     
     def appendTextContent(self,text):
         self.addElement(TextContent(text))
         
     def addElement(self,element):
-        self._subElements.append(element)
+        if self._subElements is _NO_ELEMENTS:
+            self._subElements=[element]
+        else:
+            self._subElements.append(element)
     
     def getElementAt(self,pos):
         return self._subElements[pos]
     
     def insertElementAt(self, element, pos):
+        if self._subElements is _NO_ELEMENTS:
+            self._subElements=[]
         return self._subElements.insert(pos, element)
         
     def getXML(self):
@@ -53,23 +133,45 @@ class BaseElement:
     
         @return:  the representation of the current element as an xml string
         """
+        return ''.join(self.iterXML())
+
+    def iterXML(self):
+        """
+        Generates the XML representation of the current element in chunks
+        (one per tag or text content), so that large documents can be
+        written without building the whole string.
+        """
         xml='<'+self._elementName+' '
         for key,value in self._attributes.items():
             if value != None:
                 xml+=key+'="'+self.quote_attrib(str(value))+'" '
         if  len(self._subElements)==0: #self._textContent==None and
-            xml+=' />\n'
+            yield xml+' />\n'
         else:
-            xml+=' >\n'
-            #if self._textContent==None:
+            yield xml+' >\n'
             for subelement in self._subElements:
-                xml+=str(subelement.getXML())
-            #else:
-            #if self._textContent!=None:
-            #    xml+=self._textContent
-            xml+='</'+self._elementName+'>\n'
-        #print xml
-        return xml
+                if isinstance(subelement, BaseElement):
+                    for chunk in subelement.iterXML():
+                        yield chunk
+                else:
+                    yield str(subelement.getXML())
+            yield '</'+self._elementName+'>\n'
+
+    def writeXML(self, f, buffersize=65536):
+        """
+        Writes the XML representation of the current element to the file
+        object f, in blocks of about buffersize characters.
+        """
+        buf=[]
+        size=0
+        for chunk in self.iterXML():
+            buf.append(chunk)
+            size+=len(chunk)
+            if size>=buffersize:
+                f.write(''.join(buf))
+                buf=[]
+                size=0
+        f.write(''.join(buf))
 
     #generic methods to set and get atributes (should only be used if something is not supported yet
     def setAttribute(self, attribute_name, attribute_value):
@@ -82,15 +184,20 @@ class BaseElement:
         """ 
         Used to set all attributes given in a **kwargs parameter.
         Might throw an Exception if attribute was not found.
+        The setters are resolved through the table of getKWARGSTable.
         #TODO: check if we should fix this using "setAttribute"
         """
-        for key in kwargs.keys():
-            #try:
-            f = getattr(self,'set_' + key)
-            f(kwargs[key])
-            #except:
-            #    print('attribute not found via setter ')
-            #    self.setAttribute(self, key, kwargs[key])
+        if not kwargs:
+            return
+        table = getKWARGSTable(self.__class__)
+        for key, value in kwargs.items():
+            f = table.get(key)
+            if f is None:
+                raise AttributeError("'%s' object has no attribute 'set_%s'" % (self.__class__.__name__, key))
+            if f.__class__ is str:
+                self._attributes[f] = value
+            else:
+                f(self, value)
             
     def wrap_xml(self, xml, encoding ='utf-8', standalone='no'):
         """
@@ -99,13 +206,22 @@ class BaseElement:
         header = '''<?xml version="1.0" encoding="%s" standalone="%s"?>''' %(encoding, standalone)
         return  header+xml
     
-    def save(self, filename, encoding ='utf-8', standalone='no'):
+    def save(self, filename, encoding ='utf-8', standalone='no', compresslevel=None):
         """
         Stores any element in a svg file (including header). 
         Calling this method only makes sense if the root element is an svg elemnt
+        The file is gzip compressed (svgz) with the given compresslevel (1-9),
+        or with level 9 if no level is given and the filename ends with .svgz.
+        The XML is streamed to the file while it is generated.
         """
-        f = open(filename, 'w')
-        f.write(self.wrap_xml(self.getXML(), encoding, standalone))
+        if compresslevel is None and filename.endswith('.svgz'):
+            compresslevel = 9
+        if compresslevel:
+            f = gzip.open(filename, 'wb', compresslevel)
+        else:
+            f = open(filename, 'w')
+        f.write(self.wrap_xml('', encoding, standalone))
+        self.writeXML(f)
         f.close()
         
     def quote_attrib(self, inStr):
@@ -130,10 +246,12 @@ class BaseElement:
 # There exist no corresponding attribute sets in svg.
 # We simply use these classes as containers for often used attributes.
 #--------------------------------------------------------------------------#
-class PointAttrib:
+class PointAttrib(object):
     """
     The PointAttrib class defines x and y.
     """
+    __slots__ = ()
+    
     def set_x(self, x):
         self._attributes['x']=x
     def get_x(self):
@@ -144,10 +262,12 @@ class PointAttrib:
     def get_y(self):
         return self._attributes.get('y')
 
-class DeltaPointAttrib:
+class DeltaPointAttrib(object):
     """
     The DeltaPointAttrib class defines dx and dy.
     """
+    __slots__ = ()
+    
     def set_dx(self, dx):
         self._attributes['dx']=dx
     def get_dx(self):
@@ -158,10 +278,12 @@ class DeltaPointAttrib:
     def get_dy(self):
         return self._attributes.get('dy')
     
-class PointToAttrib:
+class PointToAttrib(object):
     """
     The PointToAttrib class defines x2 and y2.
     """
+    __slots__ = ()
+    
     def set_x2(self, x2):
         self._attributes['x2']=x2
     def get_x2(self):
@@ -172,10 +294,12 @@ class PointToAttrib:
     def get_y2(self):
         return self._attributes.get('y2')
     
-class DimensionAttrib:
+class DimensionAttrib(object):
     """
     The DimensionAttrib class defines height and width.
     """
+    __slots__ = ()
+    
     def set_height(self, height):
         self._attributes['height']=height
     
@@ -188,10 +312,12 @@ class DimensionAttrib:
     def get_width(self):
         return self._attributes.get('width')
 
-class RotateAttrib:
+class RotateAttrib(object):
     """
     The RotateAttrib class defines rotation.
     """
+    __slots__ = ()
+    
     def set_rotate(self, rotate):
         self._attributes['rotate']=rotate
     
@@ -202,6 +328,8 @@ class BaseShape(BaseElement, CoreAttrib, ConditionalAttrib, StyleAttrib, Graphic
     """
     Baseclass for all shapes. Do not use this class directly. There is no svg element for it
     """
+    __slots__ = ()
+    
     def set_transform(self, transform):
         self._attributes['transform']=transform
     def get_transform(self):
@@ -11,6 +11,8 @@ class filter(BaseElement, CoreAttrib, XLinkAttrib, ExternalAttrib, StyleAttrib,
     """
     Class representing the filter element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, x=None, y=None, width=None, height=None, filterRes=None, filterUnits=None, primitiveUnits=None, **kwargs):
         BaseElement.__init__(self, 'filter')
         self.set_x(x)
@@ -41,6 +43,8 @@ class feComponentTransfer(BaseElement, CoreAttrib, FilterColorAttrib, FilterPrim
     """
     Class representing the feComponentTransfer element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'feComponentTransfer')
         self.setKWARGS(**kwargs)
@@ -50,6 +54,8 @@ class feBlend(feComponentTransfer):
     """
     Class representing the feBlend element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, in2=None, mode=None, **kwargs):
         BaseElement.__init__(self, 'feBlend')
         self.set_in2(in2)
@@ -70,6 +76,8 @@ class feColorMatrix(feComponentTransfer):
     """
     Class representing the feColorMatrix element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, type=None, values=None, **kwargs):
         BaseElement.__init__(self, 'feColorMatrix')
         self.set_type(type)
@@ -90,6 +98,8 @@ class feComposite(feComponentTransfer):
     """
     Class representing the feComposite element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, in2=None, operator=None, k1=None, k2=None, k3=None, k4=None, **kwargs):
         BaseElement.__init__(self, 'feComposite')
         self.set_in2(in2)
@@ -134,6 +144,8 @@ class feConvolveMatrix(feComponentTransfer):
     """
     Class representing the feConvolveMatrix element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, order=None, kernelMatrix=None, divisor=None, bias=None, targetX=None, targetY=None, edgeMode=None, kernelUnitLength=None, preserveAlpha=None, **kwargs):
         BaseElement.__init__(self, 'feConvolveMatrix')
         self.set_order(order)
@@ -196,6 +208,8 @@ class feDiffuseLighting(feComponentTransfer, StyleAttrib, PaintAttrib, Presentat
     """
     Class representing the feDiffuseLighting element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, surfaceScale=None, diffuseConstant=None, kernelUnitLength=None , **kwargs):
         BaseElement.__init__(self, 'feDiffuseLighting')
         self.set_surfaceScale(surfaceScale)
@@ -222,6 +236,8 @@ class feDisplacementMap(feComponentTransfer):
     """
     Class representing the feDisplacementMap element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, in2=None, scale=None, xChannelSelector=None, yChannelSelector=None, **kwargs):
         BaseElement.__init__(self, 'feDisplacementMap')
         self.set_in2(in2)
@@ -254,6 +270,8 @@ class feFlood(feComponentTransfer, StyleAttrib, PaintAttrib, PresentationAttribu
     """
     Class representing the feFlood element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, x=None, y=None, width=None, height=None, flood_color=None, flood_opacity=None, **kwargs):
         BaseElement.__init__(self, 'feFlood')
         self.set_x(x)
@@ -268,6 +286,8 @@ class feGaussianBlur(feComponentTransfer):
     """
     Class representing the feGaussianBlur element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, inValue=None, x=None, y=None, width=None, height=None, stdDeviation=None, **kwargs):
         BaseElement.__init__(self, 'feGaussianBlur')
         self.set_x(x)
@@ -287,6 +307,8 @@ class feImage(BaseElement, CoreAttrib, XLinkAttrib, FilterColorAttrib, FilterPri
     """
     Class representing the feImage element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, xlink_href=None, x=None, y=None, width=None, height=None, result=None, **kwargs):
         BaseElement.__init__(self, 'feImage')
         self.set_xlink_href(xlink_href)
@@ -301,6 +323,8 @@ class feMerge(BaseElement, CoreAttrib, FilterPrimitiveAttrib):
     """
     Class representing the feMerge element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, x=None, y=None, width=None, height=None, **kwargs):
         BaseElement.__init__(self, 'feMerge')
         self.set_x(x)
@@ -313,6 +337,8 @@ class feMergeNode(BaseElement, CoreAttrib, FilterColorAttrib, FilterPrimitiveWit
     """
     Class representing the feMergeNode element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, inValue=None, **kwargs):
         BaseElement.__init__(self, 'feMergeNode')
         self.set_in(inValue)
@@ -322,6 +348,8 @@ class feMorphology(feComponentTransfer):
     """
     Class representing the feMorphology element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, x=None, y=None, width=None, height=None, operator=None, radius=None, **kwargs):
         BaseElement.__init__(self, 'feMorphology')
         self.set_x(x)
@@ -346,6 +374,8 @@ class feOffset(feComponentTransfer, DeltaPointAttrib):
     """
     Class representing the feOffset element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, inValue=None, dx=None, dy=None, **kwargs):
         BaseElement.__init__(self, 'feOffset')
         self.set_in(inValue)
@@ -357,6 +387,8 @@ class feSpecularLighting(feComponentTransfer, StyleAttrib, PaintAttrib, Presenta
     """
     Class representing the feSpecularLighting element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, lighting_color=None, surfaceScale=None, specularConstant=None, specularExponent=None, kernelUnitLength=None, **kwargs):
         BaseElement.__init__(self, 'feSpecularLighting')
         self.set_lighting_color(lighting_color)
@@ -390,6 +422,8 @@ class feTile(feComponentTransfer):
     """
     Class representing the feTile element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'feTile')
         self.setKWARGS(**kwargs)
@@ -398,6 +432,8 @@ class feTurbulence(BaseElement, CoreAttrib, FilterColorAttrib, FilterPrimitiveAt
     """
     Class representing the feTurbulence element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'feTurbulence')
         self.setKWARGS(**kwargs)
@@ -431,6 +467,8 @@ class feDistantLight(BaseElement, CoreAttrib):
     """
     Class representing the feDistantLight element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, azimuth=None, elevation=None, **kwargs):
         BaseElement.__init__(self, 'feDistantLight')
         self.set_azimuth(azimuth)
@@ -451,6 +489,8 @@ class fePointLight(BaseElement, CoreAttrib, PointAttrib):
     """
     Class representing the fePointLight element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, x=None, y=None, z=None, **kwargs):
         BaseElement.__init__(self, 'fePointLight')
         self.set_x(x)
@@ -467,6 +507,8 @@ class feSpotLight(fePointLight):
     """
     Class representing the feSpotLight element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, x=None, y=None, z=None, pointsAtX=None, pointsAtY=None, pointsAtZ=None, specularExponent=None, limitingConeAngle=None, **kwargs):
         BaseElement.__init__(self, 'feSpotLight')
         self.set_x(x)
@@ -508,6 +550,8 @@ class feFuncR(BaseElement, CoreAttrib):
     """
     Class representing the feFuncR element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, type=None, tableValues=None, slope=None, intercept=None, amplitude=None, exponent=None, offset=None, **kwargs):
         BaseElement.__init__(self, 'feFuncR')
         self.set_type(type)
@@ -558,6 +602,8 @@ class feFuncG(feFuncR):
     """
     Class representing the feFuncG element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, type=None, tableValues=None, slope=None, intercept=None, amplitude=None, exponent=None, offset=None, **kwargs):
         BaseElement.__init__(self, 'feFuncG')
         self.set_type(type)
@@ -573,6 +619,8 @@ class feFuncB(feFuncR):
     """
     Class representing the feFuncB element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, type=None, tableValues=None, slope=None, intercept=None, amplitude=None, exponent=None, offset=None, **kwargs):
         BaseElement.__init__(self, 'feFuncB')
         self.set_type(type)
@@ -588,6 +636,8 @@ class feFuncA(feFuncR):
     """
     Class representing the feFuncA element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, type=None, tableValues=None, slope=None, intercept=None, amplitude=None, exponent=None, offset=None, **kwargs):
         BaseElement.__init__(self, 'feFuncA')
         self.set_type(type)
@@ -13,6 +13,8 @@ class linearGradient(BaseElement, CoreAttrib, XLinkAttrib, PaintAttrib, StyleAtt
     """
     Class representing the linearGradient element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, x1=None, y1=None, x2=None, y2=None, **kwargs):
         BaseElement.__init__(self, 'linearGradient')
         self.set_x1(x1)
@@ -60,6 +62,8 @@ class radialGradient(BaseElement, CoreAttrib, XLinkAttrib, PaintAttrib, StyleAtt
     """
     Class representing the radialGradient element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, cx='50%', cy='50%', r='50%', fx='50%', fy='50%', **kwargs):
         BaseElement.__init__(self, 'radialGradient')
         self.set_cx(cx)
@@ -113,6 +117,8 @@ class stop(BaseElement, CoreAttrib, StyleAttrib, PaintAttrib, GradientAttrib):
     """
     Class representing the stop element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, offset=None, **kwargs):
         BaseElement.__init__(self, 'stop')
         self.set_offset(offset)
@@ -127,6 +133,8 @@ class pattern(BaseElement, CoreAttrib, XLinkAttrib, ConditionalAttrib, ExternalA
     """
     Class representing the pattern element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, x=None, y=None, width=None, height=None, patternUnits=None, patternContentUnits=None, patternTransform=None, viewBox=None, preserveAspectRatio=None, **kwargs):
         BaseElement.__init__(self, 'pattern')
         self.set_x(x)
@@ -13,6 +13,8 @@ class a(BaseElement, CoreAttrib, ConditionalAttrib, StyleAttrib, ExternalAttrib,
     """
     Class representing the a element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, target=None):
         BaseElement.__init__(self,'a')
         self.set_target(target)
@@ -31,6 +33,8 @@ class view(BaseElement, CoreAttrib, ExternalAttrib):
     """
     Class representing the view element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, ):
         BaseElement.__init__(self,'view')
     
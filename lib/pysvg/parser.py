@@ -6,6 +6,12 @@ For licensing information please refer to license.txt
 '''
 from xml.dom import minidom
 from xml.dom import Node
+try:
+    from xml.etree import cElementTree as ElementTree
+except ImportError:
+    from xml.etree import ElementTree
+from inspect import isclass
+from pysvg.core import BaseElement, BaseShape, getKWARGSTable
 from pysvg.animate import *
 from pysvg.filter import *
 from pysvg.gradient import *
@@ -23,12 +29,79 @@ def calculateMethodName(attr):
     name='set_'+name
     return name
     
+#--------------------------------------------------------------------------#
+# Dispatch tables. The tag->class table is built once from the element
+# classes imported above, the attribute->setter tables are the per class
+# tables of pysvg.core.getKWARGSTable.
+#--------------------------------------------------------------------------#
+_XML_NAMESPACES = {
+    'http://www.w3.org/XML/1998/namespace': 'xml',
+    'http://www.w3.org/1999/xlink': 'xlink',
+}
+
+_classTable = None
+_attributeNames = {}
+
+def getClassTable():
+    """
+    Returns a dictionary mapping svg tag names to the pysvg element classes.
+    """
+    global _classTable
+    if _classTable is None:
+        _classTable = {}
+        for name, value in globals().items():
+            if (isclass(value) and issubclass(value, BaseElement)
+                    and value is not BaseElement and value is not BaseShape):
+                _classTable[name] = value
+    return _classTable
+
+def calculateAttributeName(attr):
+    """
+    Converts an attribute name as reported by ElementTree, e.g.
+    '{http://www.w3.org/1999/xlink}href' or 'stroke-width', to the setter
+    suffix used in the setter tables, e.g. 'xlink_href' or 'stroke_width'.
+    """
+    name = _attributeNames.get(attr)
+    if name is None:
+        name = attr
+        if name.startswith('{'):
+            uri, local = name[1:].split('}', 1)
+            prefix = _XML_NAMESPACES.get(uri)
+            if prefix is None:
+                name = local
+            else:
+                name = prefix + ':' + local
+        name = calculateMethodName(name)[4:]
+        _attributeNames[attr] = name
+    return name
+
+def localTagName(tag):
+    """
+    Strips the namespace from a tag name, e.g. '{http://www.w3.org/2000/svg}g'
+    or 'svg:g' becomes 'g'.
+    """
+    if tag.startswith('{'):
+        return tag.rsplit('}', 1)[-1]
+    return tag.split(':')[-1]
+
+def setAttribute(setters, obj, name, value):
+    f = setters.get(name)
+    if f is None:
+        print 'set_'+name+' not found in:'+obj._elementName
+    elif f.__class__ is str:
+        obj._attributes[f] = value
+    else:
+        f(obj, value)
+
 def setAttributes(attrs,obj):
+    setters = getKWARGSTable(obj.__class__)
     for attr in attrs.keys():
-        if hasattr(obj, calculateMethodName(attr)):
-            eval ('obj.'+calculateMethodName(attr))(attrs[attr].value)
-        else:
-            print calculateMethodName(attr)+' not found in:'+obj._elementName
+        setAttribute(setters, obj, calculateMethodName(attr)[4:], attrs[attr].value)
+
+def setElementTreeAttributes(attrib, obj):
+    setters = getKWARGSTable(obj.__class__)
+    for attr, value in attrib.items():
+        setAttribute(setters, obj, calculateAttributeName(attr), value)
         
 def build(node_, object):
     attrs = node_.attributes
@@ -37,11 +110,11 @@ def build(node_, object):
     for child_ in node_.childNodes:
         nodeName_ = child_.nodeName.split(':')[-1]
         if child_.nodeType == Node.ELEMENT_NODE:
-            try:
-                objectinstance=eval(nodeName_) ()                
-            except:
+            cls = getClassTable().get(nodeName_)
+            if cls is None:
                 print 'no class for: '+nodeName_
                 continue
+            objectinstance=cls()
             object.addElement(build(child_,objectinstance))
         elif child_.nodeType == Node.TEXT_NODE:
             #print "TextNode:"+child_.nodeValue
@@ -72,3 +145,100 @@ def parse(inFileName):
     return rootObj
 
 
+def iterparse(inFileName, tags=None):
+    """
+    Parses a svg file incrementally using ElementTree.iterparse and yields
+    pysvg objects without ever building a DOM of the whole document.
+    
+    If tags is None, every direct child of the root svg element is yielded as
+    soon as it is complete. Otherwise each element whose tag is in tags is
+    yielded with its complete subtree (nested matches are yielded as part of
+    the outermost match), and all content outside matching subtrees is
+    skipped. The parsed xml of a subtree is discarded once it has been
+    handed off, so memory use stays bounded by the largest subtree.
+    
+    @type  inFileName: string or file object
+    @param inFileName:  the svg file to parse
+    @type  tags: sequence of strings
+    @param tags:  local names of the tags to yield, e.g. ['path', 'g']
+    """
+    if tags is not None:
+        tags = frozenset(tags)
+    for obj, depth in _iterbuild(inFileName, tags):
+        yield obj
+
+def fastparse(inFileName):
+    """
+    Parses a svg file like parse, but with ElementTree.iterparse and the
+    precomputed dispatch tables instead of minidom. Comments are not
+    preserved.
+    """
+    for obj, depth in _iterbuild(inFileName, None, keep=True):
+        return obj
+
+def _iterbuild(inFileName, tags, keep=False):
+    """
+    Builds pysvg objects from the events of iterparse. Yields tuples
+    (object, depth) for completed objects that are handed off: matches of
+    tags, or the root children if tags is None (and the root itself if keep
+    is True).
+    """
+    classes = getClassTable()
+    # One list of (object, element) tuples per open element, the element is
+    # kept until the parent ends as its tail may not be known before. None
+    # for elements that are not collected.
+    stack = []
+    skip = 0        # Depth inside an unknown element
+    inside = 0      # Number of open matching elements
+    root = None
+    prune = not keep
+    for event, elem in ElementTree.iterparse(inFileName, events=('start', 'end')):
+        if event == 'start':
+            name = localTagName(elem.tag)
+            if root is None:
+                root = elem
+                prune = prune and not (tags is not None and name in tags)
+            if skip > 0 or name not in classes:
+                if skip == 0:
+                    print 'no class for: '+name
+                skip += 1
+                stack.append(None)
+                continue
+            if tags is not None and name in tags:
+                inside += 1
+            stack.append([])
+            continue
+        # End event
+        children = stack.pop()
+        depth = len(stack)
+        if children is None:
+            skip -= 1
+        else:
+            name = localTagName(elem.tag)
+            match = tags is not None and name in tags
+            if keep or (tags is None and depth > 0) or inside > 0:
+                obj = classes[name]()
+                setElementTreeAttributes(elem.attrib, obj)
+                if elem.text is not None:
+                    obj.appendTextContent(elem.text)
+                for child, child_elem in children:
+                    obj.addElement(child)
+                    if child_elem.tail is not None:
+                        obj.appendTextContent(child_elem.tail)
+                if match:
+                    inside -= 1
+                if match and inside == 0:
+                    yield obj, depth
+                elif tags is None and depth == 1 and not keep:
+                    yield obj, depth
+                elif depth == 0:
+                    yield obj, depth
+                else:
+                    stack[-1].append((obj, elem))
+        # Free the parsed xml of the completed element. Without a root object
+        # to build, the root children can be dropped altogether.
+        tail = elem.tail
+        elem.clear()
+        elem.tail = tail
+        if prune and depth == 1:
+            del root[:]
@@ -13,6 +13,8 @@ class script(BaseElement, CoreAttrib, XLinkAttrib):
     """
     Class representing the script element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self,'script')
         self.setKWARGS(**kwargs)
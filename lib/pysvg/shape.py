@@ -12,6 +12,8 @@ class rect(BaseShape, PointAttrib, DimensionAttrib):
     """
     Class representing the rect element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, x=None, y=None, width=None, height=None, rx=None, ry=None, **kwargs):
         BaseElement.__init__(self,'rect')
         self.set_x(x)
@@ -100,6 +102,8 @@ class circle(BaseShape):
     """
     Class representing the circle element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, cx=None,cy=None,r=None, **kwargs):
         BaseElement.__init__(self,'circle')
         self.set_cx(cx)
@@ -180,6 +184,8 @@ class ellipse(BaseShape):
     """
     Class representing the ellipse element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, cx=None,cy=None,rx=None,ry=None, **kwargs):
         BaseElement.__init__(self,'ellipse')
         self.set_cx(cx)
@@ -249,6 +255,8 @@ class line(BaseShape, PointToAttrib):
     Note that this element is NOT painted VISIBLY by default UNLESS you provide
     a style including STROKE and STROKE-WIDTH
     """
+    __slots__ = ()
+    
     def __init__(self, X1=None, Y1=None, X2=None, Y2=None, **kwargs):
         """
         Creates a line
@@ -396,6 +404,8 @@ class path(BaseShape, ExternalAttrib, MarkerAttrib):
     """
     Class representing the path element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, pathData="",pathLength=None, style=None, focusable=None, **kwargs):
         BaseElement.__init__(self,'path')
         if pathData!='' and not pathData.endswith(' '):
@@ -461,6 +471,8 @@ class polyline(BaseShape):
     """
     Class representing the polyline element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, points=None, **kwargs):
         BaseElement.__init__(self,'polyline')
         self.set_points(points)
@@ -475,6 +487,8 @@ class polygon(polyline):
     """
     Class representing the polygon element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, points=None, **kwargs):
         BaseElement.__init__(self,'polygon')
         self.set_points(points)
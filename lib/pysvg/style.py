@@ -13,6 +13,8 @@ class style(BaseElement, CoreAttrib, XLinkAttrib):
     """
     Class representing the style element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self,'style')
         self.setKWARGS(**kwargs)
@@ -11,6 +11,8 @@ class altGlyphDef(BaseElement, CoreAttrib):
     """
     Class representing the altGlyphDef element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'altGlypfDef')
         self.setKWARGS(**kwargs)
@@ -19,6 +21,8 @@ class altGlyphItem(BaseElement, CoreAttrib):
     """
     Class representing the altGlyphItem element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'altGlypfItem')
         self.setKWARGS(**kwargs)
@@ -27,6 +31,8 @@ class glyphRef(BaseElement, CoreAttrib, ExternalAttrib, StyleAttrib, FontAttrib,
     """
     Class representing the glyphRef element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'glyphRef')
         self.setKWARGS(**kwargs)
@@ -50,6 +56,8 @@ class altGlyph(glyphRef, ConditionalAttrib, GraphicalEventsAttrib, OpacityAttrib
     """
     Class representing the altGlyph element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'altGlyph')
         self.setKWARGS(**kwargs)
@@ -63,6 +71,8 @@ class textPath(BaseElement, CoreAttrib, ConditionalAttrib, ExternalAttrib, Style
     """
     Class representing the textPath element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'textPath')
         self.setKWARGS(**kwargs)
@@ -96,6 +106,8 @@ class tref(BaseElement, CoreAttrib, ConditionalAttrib, ExternalAttrib, StyleAttr
     """
     Class representing the tref element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         BaseElement.__init__(self, 'tref')
         self.setKWARGS(**kwargs)
@@ -114,6 +126,8 @@ class tspan(BaseElement, CoreAttrib, ConditionalAttrib, ExternalAttrib, StyleAtt
     """
     Class representing the tspan element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, x=None, y=None, dx=None, dy=None, rotate=None, textLength=None, lengthAdjust=None, **kwargs):
         BaseElement.__init__(self, 'tspan')
         self.set_x(x)
@@ -139,6 +153,8 @@ class text(BaseElement, CoreAttrib, ConditionalAttrib, ExternalAttrib, StyleAttr
     """
     Class representing the text element of an svg doc.
     """
+    __slots__ = ()
+    
     def __init__(self, content=None, x=None, y=None, dx=None, dy=None, rotate=None, textLength=None, lengthAdjust=None, **kwargs):
         BaseElement.__init__(self, 'text')
         if content <> None:
@@ -10,7 +10,7 @@ setup(name="themavis",
       url="http://www.smarter-maps.org/themavis",
       packages=['themavis'],
       package_dir={"themavis":"src/themavis"},
-      package_data={'themavis': ['colormaps/*']},
+      package_data={'themavis': ['colormaps.json']},
       requires=['pysvg'],
       classifiers = [
           'Development Status :: 4 - Beta',
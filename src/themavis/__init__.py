@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+import classify
 import color
 import page
 import container
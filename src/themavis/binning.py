@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Aggregation of points into the cells of a regular grid of squares or
+hexagons. A cell is identified by two integers, its column and row for
+squares, or its axial coordinates for hexagons. All points are assigned
+to their cell at once, and the cells are aggregated with bincount.
+"""
+
+import numpy as np
+
+
+BIN_SHAPES = ('hexagon', 'square')
+
+SQRT3 = np.sqrt(3)
+
+
+def square_cells(points, size):
+    """
+    Returns the (column, row) of the square of side size containing each
+    point of a (n, 2) array. Square (0, 0) has its corner at the origin.
+    """
+    return np.floor(np.asarray(points, dtype=np.float64) / size).astype(np.int64)
+
+
+def hexagon_cells(points, size):
+    """
+    Returns the axial coordinates (q, r) of the hexagon with side size
+    containing each point of a (n, 2) array. The hexagons are pointy-topped,
+    and hexagon (0, 0) is centered on the origin.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    # Fractional cube coordinates, rounded to the nearest hexagon
+    q = (SQRT3 / 3 * points[:,0] - points[:,1] / 3.) / size
+    r = (2 / 3. * points[:,1]) / size
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    # The coordinate with the largest rounding error follows from the others
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq[fix_q] = -rr[fix_q] - rs[fix_q]
+    rr[fix_r] = -rq[fix_r] - rs[fix_r]
+    return np.column_stack((rq, rr)).astype(np.int64)
+
+
+def cell_centers(cells, size, shape='hexagon'):
+    """
+    Returns the centers of the cells, the inverse of square_cells and
+    hexagon_cells.
+    """
+    cells = np.asarray(cells, dtype=np.float64)
+    if shape == 'square':
+        return (cells + 0.5) * size
+    if shape == 'hexagon':
+        return np.column_stack((
+            size * SQRT3 * (cells[:,0] + cells[:,1] / 2.),
+            size * 1.5 * cells[:,1]
+        ))
+    raise Exception('Error. Unknown bin shape %s.' % shape)
+
+
+def cell_outline(size, shape='hexagon'):
+    """
+    Returns the corners of a cell around the origin as (n, 2) array.
+    """
+    if shape == 'square':
+        return np.array([(-1., -1.), (1., -1.), (1., 1.), (-1., 1.)]) * (size / 2.)
+    if shape == 'hexagon':
+        a = np.pi / 6 + np.arange(6) * np.pi / 3
+        return np.column_stack((np.cos(a), np.sin(a))) * size
+    raise Exception('Error. Unknown bin shape %s.' % shape)
+
+
+def aggregate(cells, weights=None):
+    """
+    Aggregates the points by cell. cells is the (n, 2) array of the cell of
+    every point, and weights an optional array with a value per point.
+    Returns the distinct cells, the number of points in each cell, and the
+    sum and the mean of the weights in each cell (None without weights).
+    Missing weights (NaN) are left out of the sum and the mean, cells
+    without any weight have a NaN mean.
+    """
+    cells = np.asarray(cells, dtype=np.int64)
+    if len(cells) == 0:
+        empty = np.zeros(0)
+        if weights is None: return cells, empty.astype(np.int64), None, None
+        return cells, empty.astype(np.int64), empty, empty
+    # A single integer key per cell
+    lo = cells.min(axis=0)
+    span = cells[:,1].max() - lo[1] + 1
+    keys = (cells[:,0] - lo[0]) * span + (cells[:,1] - lo[1])
+    keys, inverse = np.unique(keys, return_inverse=True)
+    out = np.column_stack((keys // span + lo[0], keys % span + lo[1]))
+    counts = np.bincount(inverse, minlength=len(keys))
+    if weights is None: return out, counts, None, None
+    weights = np.asarray(weights, dtype=np.float64)
+    valid = np.isfinite(weights)
+    sums = np.bincount(inverse[valid], weights=weights[valid], minlength=len(keys))
+    nvalid = np.bincount(inverse[valid], minlength=len(keys))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = sums / nvalid
+    return out, counts, sums, means
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Layout of non-contiguous cartograms. Circles placed at the position of
+their feature are moved apart until they don't overlap anymore, as in
+the cartograms of Dorling (1996). Neighbor circles are found with a
+uniform grid, so an iteration takes about linear time.
+"""
+
+import numpy as np
+
+
+def neighbor_pairs(centers, cell_size):
+    """
+    Returns the indices (i, j), with i < j, of all pairs of points lying in
+    the same or in adjacent cells of a grid with the given cell size. All
+    pairs of points closer than cell_size are among them.
+    """
+    cells = np.floor(centers / cell_size).astype(np.int64)
+    cx = cells[:,0] - cells[:,0].min()
+    cy = cells[:,1] - cells[:,1].min()
+    m = cy.max() + 3
+    keys = cx * m + cy
+    order = np.argsort(keys, kind='mergesort')
+    sorted_keys = keys[order]
+    first, second = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            k = (cx + dx) * m + (cy + dy)
+            lo = np.searchsorted(sorted_keys, k, side='left')
+            hi = np.searchsorted(sorted_keys, k, side='right')
+            counts = hi - lo
+            i = np.repeat(np.arange(len(keys)), counts)
+            offsets = np.cumsum(counts) - counts
+            j = order[lo[i] + np.arange(len(i)) - offsets[i]]
+            keep = i < j
+            first.append(i[keep])
+            second.append(j[keep])
+    return np.concatenate(first), np.concatenate(second)
+
+
+def resolve_overlaps(centers, radii, gap=0, iterations=500, attraction=0.1,
+    decay=0.95, tolerance=0.01, push=0.8):
+    """
+    Moves the circles given by a (n, 2) array of centers and their radii
+    until no two circles are closer than gap. In each iteration,
+    overlapping circles are pushed apart along the line joining their
+    centers, the larger circle moving less. Circles without overlaps are
+    pulled back towards their original position by the attraction factor,
+    which decreases by the decay factor in every iteration so that the
+    layout settles.
+    Stops when all overlaps are smaller than tolerance, or after the given
+    number of iterations. Returns the new centers and the number of
+    iterations done.
+    The candidate pairs are searched within a larger distance, and reused
+    until a circle has moved by more than half of the extra distance.
+    """
+    centers = np.asarray(centers, dtype=np.float64)
+    pos = centers.copy()
+    n = len(pos)
+    if n < 2: return pos, 0
+    radii = np.asarray(radii, dtype=np.float64)
+    area = radii ** 2
+    skin = 0.5 * radii.max() + gap
+    cell_size = 2 * radii.max() + gap + skin
+    built = None
+    for it in range(iterations):
+        if built is None or np.abs(pos - built).max() > skin / 2:
+            pi, pj = neighbor_pairs(pos, cell_size)
+            built = pos.copy()
+        i, j = pi, pj
+        d = pos[j] - pos[i]
+        dist = np.hypot(d[:,0], d[:,1])
+        overlap = radii[i] + radii[j] + gap - dist
+        k = overlap > 0
+        if not k.any() or overlap[k].max() < tolerance:
+            return pos, it
+        i, j, d, dist, overlap = i[k], j[k], d[k], dist[k], overlap[k]
+        # Circles at the same position are separated in an arbitrary but
+        # fixed direction
+        same = dist == 0
+        angle = (i[same] * 0.618034) * 2 * np.pi
+        d[same] = np.column_stack((np.cos(angle), np.sin(angle)))
+        dist[same] = 1
+        u = d / dist[:,np.newaxis]
+        total = area[i] + area[j]
+        total[total == 0] = 1
+        # Only a part of the overlap is resolved per iteration, as a circle
+        # may be pushed by several neighbors at once
+        push_i = -u * (push * overlap * area[j] / total)[:,np.newaxis]
+        push_j = u * (push * overlap * area[i] / total)[:,np.newaxis]
+        moved = np.zeros(n, dtype=bool)
+        moved[i] = True
+        moved[j] = True
+        for col in (0, 1):
+            pos[:,col] += np.bincount(i, weights=push_i[:,col], minlength=n)
+            pos[:,col] += np.bincount(j, weights=push_j[:,col], minlength=n)
+        free = ~moved
+        pos[free] += attraction * (centers[free] - pos[free])
+        attraction *= decay
+    return pos, iterations
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""
+Classification of attribute values. Every classifier takes the values as
+array and returns the class limits in increasing order: a value v belongs
+to class i if limits[i-1] <= v < limits[i]. For k classes there are k-1
+limits (or less if the values don't allow k distinct classes). Missing
+values (NaN) are ignored.
+"""
+
+import numpy as np
+
+
+def _valid(values):
+    values = np.asarray(values, dtype=np.float64).ravel()
+    return values[np.isfinite(values)]
+
+
+def equal_interval(values, k):
+    """
+    Divides the range of the values into k classes of equal width.
+    """
+    values = _valid(values)
+    if len(values) == 0: return np.array([])
+    vmin, vmax = values.min(), values.max()
+    return vmin + (vmax - vmin) * np.arange(1, k) / float(k)
+
+
+def std_mean(values, k, step=1.):
+    """
+    Classes of step standard deviations width, centered on the mean. With
+    an even number of classes, the mean is a class limit.
+    """
+    values = _valid(values)
+    if len(values) == 0: return np.array([])
+    multiples = np.arange(k - 1) - (k - 2) / 2.
+    return values.mean() + multiples * step * values.std()
+
+
+def geometric_interval(values, k):
+    """
+    Classes whose upper limit is a constant multiple of the lower limit.
+    The values must be strictly positive.
+    """
+    values = _valid(values)
+    if len(values) == 0: return np.array([])
+    vmin, vmax = values.min(), values.max()
+    if vmin <= 0:
+        raise Exception('Error. Geometric intervals need positive values.')
+    return vmin * (vmax / vmin) ** (np.arange(1, k) / float(k))
+
+
+def head_tail(values, max_classes=None, ratio=0.4):
+    """
+    Head/tail breaks for heavy-tailed distributions. The values are split
+    at their mean, and the part above the mean (the head) is split again
+    as long as it holds less than ratio of the values. The number of
+    classes follows from the data, but is at most max_classes.
+    """
+    values = _valid(values)
+    limits = []
+    while len(values) > 1:
+        if max_classes is not None and len(limits) + 1 >= max_classes: break
+        m = values.mean()
+        head = values[values >= m]
+        if len(head) > ratio * len(values): break
+        limits.append(m)
+        values = head
+    return np.array(limits)
+
+
+def fisher_jenks(values, k, sample=None, seed=0):
+    """
+    Fisher-Jenks natural breaks, the classification with the minimal sum of
+    squared deviations from the class means. The optimum is computed
+    exactly with a dynamic program over the sorted distinct values.
+
+    The best start of the last class never decreases when adding values, so
+    every step of the program is solved by divide and conquer, which takes
+    O(k n log n) time for n distinct values. For very large arrays, the
+    classification can be computed on a random sample of the given size
+    (always including the minimum and maximum).
+    """
+    values = _valid(values)
+    if sample is not None and len(values) > sample:
+        rnd = np.random.RandomState(seed)
+        sel = rnd.choice(len(values), sample - 2, replace=False)
+        values = np.concatenate((values[sel], [values.min(), values.max()]))
+    x, w = np.unique(values, return_counts=True)
+    n = len(x)
+    if n <= k: return x[1:]
+    # Prefix sums of the weights, values and squared values. The values are
+    # centered to reduce the rounding errors.
+    x0 = x - np.average(x, weights=w)
+    sw = np.concatenate(([0.], np.cumsum(w)))
+    sx = np.concatenate(([0.], np.cumsum(w * x0)))
+    sxx = np.concatenate(([0.], np.cumsum(w * x0 * x0)))
+
+    def ssd(i, j):
+        # Sum of squared deviations of the values i to j
+        return sxx[j+1] - sxx[i] - (sx[j+1] - sx[i])**2 / (sw[j+1] - sw[i])
+
+    # cost[j] is the minimal cost of the values 0 to j in c+1 classes, and
+    # starts[c][j] the first value of the last class in this optimum
+    cost = ssd(np.zeros(n, dtype=np.int64), np.arange(n))
+    starts = [np.zeros(n, dtype=np.int64)]
+    for c in range(1, k):
+        prev = cost
+        cost = np.empty(n)
+        cost[:c] = np.inf
+        best = np.zeros(n, dtype=np.int64)
+        # Open tasks: find the best start for the ends jlo to jhi, knowing
+        # that it lies between ilo and ihi
+        jlo = np.array([c]); jhi = np.array([n - 1])
+        ilo = np.array([c]); ihi = np.array([n - 1])
+        while len(jlo):
+            mid = (jlo + jhi) // 2
+            top = np.minimum(ihi, mid)
+            counts = top - ilo + 1
+            task = np.repeat(np.arange(len(mid)), counts)
+            offsets = np.cumsum(counts) - counts
+            i = ilo[task] + np.arange(len(task)) - offsets[task]
+            candidates = prev[i - 1] + ssd(i, mid[task])
+            # First minimum of every task
+            mins = np.minimum.reduceat(candidates, offsets)
+            pos = np.where(candidates == mins[task], np.arange(len(task)), len(task))
+            first = np.minimum.reduceat(pos, offsets)
+            cost[mid] = candidates[first]
+            opt = i[first]
+            best[mid] = opt
+            left = mid > jlo
+            right = mid < jhi
+            jlo, jhi, ilo, ihi = (
+                np.concatenate((jlo[left], mid[right] + 1)),
+                np.concatenate((mid[left] - 1, jhi[right])),
+                np.concatenate((ilo[left], opt[right])),
+                np.concatenate((opt[left], ihi[right])),
+            )
+        starts.append(best)
+    # Follow the class starts back from the last value
+    limits = []
+    j = n - 1
+    for c in range(k - 1, 0, -1):
+        i = starts[c][j]
+        limits.append(x[i])
+        j = i - 1
+    return np.array(limits[::-1])
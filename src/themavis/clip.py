@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Clipping of packed geometries to a rectangle. All rings of a layer are
+clipped at once with NumPy.
+"""
+
+import numpy as np
+
+from geometry import PackedGeometries
+
+
+def clip_polygons(packed, rect):
+    """
+    Clips the closed rings of packed geometries to the rectangle
+    (xmin, ymin, xmax, ymax) with the Sutherland-Hodgman algorithm.
+    Rings that end up with less than 3 vertices are removed. Concave rings
+    may get zero-width spikes along the rectangle border.
+    """
+    xmin, ymin, xmax, ymax = rect
+    coords, ring_offsets = packed.coords, packed.ring_offsets
+    ring_ids = packed.ring_ids()
+    # One pass per half-plane, as (axis, limit, keep larger values)
+    for axis, limit, larger in ((0, xmin, True), (0, xmax, False),
+                                (1, ymin, True), (1, ymax, False)):
+        coords, ring_offsets, ring_ids = _clip_half_plane(
+            coords, ring_offsets, ring_ids, axis, limit, larger
+        )
+    # Remove degenerated rings
+    sizes = np.diff(ring_offsets)
+    keep_ring = sizes >= 3
+    coords = coords[keep_ring[ring_ids]]
+    return _repack(coords, sizes[keep_ring], packed.feature_ids()[keep_ring], 
+        packed.nfeatures, packed.kind)
+
+
+def _clip_half_plane(coords, ring_offsets, ring_ids, axis, limit, larger):
+    n = len(coords)
+    if n == 0: return coords, ring_offsets, ring_ids
+    starts, ends = ring_offsets[:-1], ring_offsets[1:]
+    nonempty = ends > starts
+    # Edge i goes from vertex i to the next vertex of the same ring
+    nxt = np.arange(1, n + 1)
+    nxt[ends[nonempty] - 1] = starts[nonempty]
+    v = coords[:,axis]
+    if larger:
+        inside = v >= limit
+    else:
+        inside = v <= limit
+    crossing = inside != inside[nxt]
+    # Each edge outputs its start vertex if inside, and the intersection
+    # with the border if it crosses it.
+    counts = inside.astype(np.int64) + crossing
+    out_offsets = np.cumsum(counts) - counts
+    out = np.empty((counts.sum(), 2), dtype=np.float64)
+    k = np.flatnonzero(inside)
+    out[out_offsets[k]] = coords[k]
+    k = np.flatnonzero(crossing)
+    p0, p1 = coords[k], coords[nxt[k]]
+    t = (limit - p0[:,axis]) / (p1[:,axis] - p0[:,axis])
+    pt = p0 + t[:,np.newaxis] * (p1 - p0)
+    pt[:,axis] = limit
+    out[out_offsets[k] + inside[k]] = pt
+    new_sizes = np.bincount(ring_ids, weights=counts, minlength=len(starts)).astype(np.int64)
+    new_offsets = np.zeros(len(starts) + 1, dtype=np.int64)
+    np.cumsum(new_sizes, out=new_offsets[1:])
+    return out, new_offsets, np.repeat(np.arange(len(starts)), new_sizes)
+
+
+def clip_lines(packed, rect):
+    """
+    Clips the open rings (lines) of packed geometries to the rectangle
+    (xmin, ymin, xmax, ymax) with the Liang-Barsky algorithm. A line that
+    leaves and enters the rectangle again is split into several rings.
+    """
+    xmin, ymin, xmax, ymax = rect
+    coords, ring_offsets = packed.coords, packed.ring_offsets
+    n = len(coords)
+    if n == 0: return packed
+    # Segment i goes from vertex i to vertex i+1, except for the last
+    # vertex of each ring
+    is_last = np.zeros(n, dtype=bool)
+    is_last[ring_offsets[1:][np.diff(ring_offsets) > 0] - 1] = True
+    seg = np.flatnonzero(~is_last)
+    p0, p1 = coords[seg], coords[seg + 1]
+    d = p1 - p0
+    t0 = np.zeros(len(seg))
+    t1 = np.ones(len(seg))
+    visible = np.ones(len(seg), dtype=bool)
+    for p, q in ((-d[:,0], p0[:,0] - xmin), (d[:,0], xmax - p0[:,0]),
+                 (-d[:,1], p0[:,1] - ymin), (d[:,1], ymax - p0[:,1])):
+        parallel = p == 0
+        visible &= ~(parallel & (q < 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = q / p
+        entering = ~parallel & (p < 0)
+        leaving = ~parallel & (p > 0)
+        t0[entering] = np.maximum(t0[entering], t[entering])
+        t1[leaving] = np.minimum(t1[leaving], t[leaving])
+    visible &= t0 <= t1
+    # A visible segment continues the previous piece if the previous
+    # segment of the same ring is visible up to its end, and this segment
+    # is visible from its start.
+    prev_ok = np.zeros(len(seg), dtype=bool)
+    prev_ok[1:] = (seg[1:] - 1 == seg[:-1]) & visible[:-1] & (t1[:-1] == 1)
+    starts_piece = visible & ~(prev_ok & (t0 == 0))
+    k = np.flatnonzero(visible)
+    counts = 1 + starts_piece[k]
+    out_offsets = np.cumsum(counts) - counts
+    out = np.empty((counts.sum(), 2), dtype=np.float64)
+    a = starts_piece[k]
+    out[out_offsets[a]] = p0[k][a] + t0[k][a][:,np.newaxis] * d[k][a]
+    out[out_offsets + counts - 1] = p0[k] + t1[k][:,np.newaxis] * d[k]
+    # Each piece is a new ring of the feature of its first segment
+    piece_starts = out_offsets[a]
+    sizes = np.diff(np.append(piece_starts, len(out)))
+    ring_of_vertex = np.repeat(np.arange(packed.nrings), np.diff(ring_offsets))
+    piece_feature = packed.feature_ids()[ring_of_vertex[seg[k][a]]]
+    return _repack(out, sizes, piece_feature, packed.nfeatures, packed.kind)
+
+
+def _repack(coords, ring_sizes, ring_features, nfeatures, kind):
+    ring_offsets = np.zeros(len(ring_sizes) + 1, dtype=np.int64)
+    np.cumsum(ring_sizes, out=ring_offsets[1:])
+    feature_offsets = np.zeros(nfeatures + 1, dtype=np.int64)
+    np.cumsum(np.bincount(ring_features, minlength=nfeatures), out=feature_offsets[1:])
+    return PackedGeometries(coords, ring_offsets, feature_offsets, kind)
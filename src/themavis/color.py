@@ -1,23 +1,81 @@
 #!/usr/bin/env python
 
 from json import load
-from os import sep
-from os.path import dirname, abspath, exists
+from os.path import dirname, abspath, exists, join
+
+import numpy as np
 
 
 class Color(object):
     """
-    A RGB color.
+    A RGB color with an opacity a between 0 and 1. Colors are immutable,
+    and their encodings are computed once: hex ('#rrggbb'), rgb and rgba
+    tuples.
     """
-    def __init__(self, rgb=(255,255,255)):
-        self.r, self.g, self.b = rgb
+    __slots__ = ('r', 'g', 'b', 'a', 'hex', 'rgb', 'rgba')
+    
+    def __init__(self, rgb=(255,255,255), a=1.):
+        r, g, b = [int(c) for c in rgb]
+        init = object.__setattr__
+        init(self, 'r', r)
+        init(self, 'g', g)
+        init(self, 'b', b)
+        init(self, 'a', float(a))
+        init(self, 'hex', '#%02x%02x%02x' % (r, g, b))
+        init(self, 'rgb', (r, g, b))
+        init(self, 'rgba', (r, g, b, float(a)))
+    
+    def __setattr__(self, name, value):
+        raise AttributeError('Colors cannot be modified')
     
     def __repr__(self):
         return "{red: %i, green: %i, blue: %i}" % (self.r, self.g, self.b)
     
-    @property
-    def hex(self):
-        return '#%02x%02x%02x' % (self.r, self.g, self.b)
+    def __eq__(self, other):
+        return isinstance(other, Color) and self.rgba == other.rgba
+    
+    def __ne__(self, other):
+        return not self == other
+    
+    def __hash__(self):
+        return hash(self.rgba)
+    
+    def __reduce__(self):
+        return (Color, (self.rgb, self.a))
+
+
+
+
+# The basic SVG color keywords
+NAMED_COLORS = {
+    'black': (0,0,0), 'silver': (192,192,192), 'gray': (128,128,128),
+    'grey': (128,128,128), 'white': (255,255,255), 'maroon': (128,0,0),
+    'red': (255,0,0), 'purple': (128,0,128), 'fuchsia': (255,0,255),
+    'green': (0,128,0), 'lime': (0,255,0), 'olive': (128,128,0),
+    'yellow': (255,255,0), 'navy': (0,0,128), 'blue': (0,0,255),
+    'teal': (0,128,128), 'aqua': (0,255,255),
+}
+
+
+def parse_color(value):
+    """
+    Parses a SVG color value ('#rgb', '#rrggbb', 'rgb(r,g,b)' or a basic
+    color keyword) and returns a (r,g,b) tuple, or None for 'none'.
+    """
+    if isinstance(value, Color):
+        return value.rgb
+    value = str(value).strip().lower()
+    if value in ('none', 'transparent', ''):
+        return None
+    if value.startswith('#'):
+        if len(value) == 4:
+            return tuple(int(c * 2, 16) for c in value[1:])
+        return (int(value[1:3], 16), int(value[3:5], 16), int(value[5:7], 16))
+    if value.startswith('rgb('):
+        return tuple(int(float(c)) for c in value[4:-1].split(','))
+    if value in NAMED_COLORS:
+        return NAMED_COLORS[value]
+    raise Exception("Unknown color '%s'" % value)
 
 
 
@@ -25,15 +83,18 @@ class Color(object):
 class ColorMap(object):
     """
     A color map is a set of colors that go together.
+    Color maps of the bundle are loaded with their id, e.g. ColorMap('blues5').
     """
     cmap_id = None
     cmap_name = None
     cmap_type = None        # Type: qualitative [qual], sequential [seq], 
                             # divergent [div]
     crit_val = None         # Critical value for divergent color maps
-    colors = []             # Array of colors
 
     def __init__(self, cmap_id=None, colors=None):
+        # The colors as (n, 3) array of uint8
+        self.rgb = np.zeros((0, 3), dtype=np.uint8)
+        self._colors = None
         if cmap_id is None and colors is None: return
         if cmap_id is not None and colors is None: 
             self.load(cmap_id)
@@ -41,24 +102,245 @@ class ColorMap(object):
         self.set_rgb(colors)
         self.cmap_id = cmap_id
     
+    def __setattr__(self, name, value):
+        if self.__dict__.get('_frozen'):
+            raise AttributeError("Color map '%s' is shared and cannot be modified" % self.cmap_id)
+        object.__setattr__(self, name, value)
+    
+    def __repr__(self):
+        return "ColorMap('%s', %i colors)" % (self.cmap_id, len(self.rgb))
+    
+    @property
+    def family(self):
+        """
+        The name of the color map without the number of classes, e.g.
+        'Blues' for 'Blues-5'.
+        """
+        if self.cmap_name is None: return None
+        return self.cmap_name.rsplit('-', 1)[0]
+    
+    @property
+    def colors(self):
+        """
+        The colors as tuple of Color, created on first access.
+        """
+        if self._colors is None:
+            colors = tuple([Color(c) for c in self.rgb.tolist()])
+            object.__setattr__(self, '_colors', colors)
+        return self._colors
+    
     def set_rgb(self, colors):
-        self.colors = []
-        for c in colors: 
-            self.colors.append(Color(c))
-    
-    def load(self, cmap_id):
-        cm_dir = dirname(abspath(__file__)) + sep + 'colormaps'
-        cm_path = cm_dir + sep + cmap_id
-        if not exists(cm_path):
-            raise Exception("Color map '%s' not found" % name)
-            return
-        f = open(cm_path)
-        cm_json = load(f)
+        """
+        Sets the colors from a sequence of (r,g,b) tuples, Colors or SVG
+        color strings, or from a (n, 3) array.
+        """
+        if not isinstance(colors, np.ndarray):
+            colors = [
+                c if isinstance(c, (tuple, list)) else parse_color(c) 
+                for c in colors
+            ]
+        self.rgb = np.array(colors, dtype=np.uint8).reshape((-1, 3))
+        self._colors = None
+    
+    def load(self, cmap_id, registry=None):
+        """
+        Sets the colors of a color map of a ColorMapRegistry, by default
+        of the bundle shipped with themavis.
+        """
+        if registry is None: registry = colormaps
+        entry = registry.entry(cmap_id)
         self.cmap_id = cmap_id
-        self.cmap_name = cm_json['name']
-        self.cmap_type = cm_json['type']
-        self.crit_val = cm_json['crit_val']
-        self.set_rgb(cm_json['colors'])
+        self.cmap_name = entry['name']
+        self.cmap_type = entry['type']
+        self.crit_val = entry['crit_val']
+        self.set_rgb(entry['colors'])
+
+
+
+
+class ColorMapRegistry(object):
+    """
+    The color maps of a bundle, a JSON file mapping the color map ids to
+    their name, type, critical value and colors. The bundle is read on
+    first use, and indexed by family, type and number of classes.
+    get returns a shared ColorMap that cannot be modified, created once
+    per id.
+    """
+    def __init__(self, path=None):
+        if path is None:
+            path = join(dirname(abspath(__file__)), 'colormaps.json')
+        self.path = path
+        self.entries = None
+        self.cmaps = {}
+    
+    def _load(self):
+        if not exists(self.path):
+            raise Exception("Color map bundle '%s' not found" % self.path)
+        f = open(self.path)
+        try:
+            self.entries = load(f)
+        finally:
+            f.close()
+        self.by_family = {}
+        self.by_type = {}
+        self.by_nclasses = {}
+        for cmap_id, entry in self.entries.items():
+            family = entry['name'].rsplit('-', 1)[0].lower()
+            self.by_family.setdefault(family, set()).add(cmap_id)
+            self.by_type.setdefault(entry['type'], set()).add(cmap_id)
+            self.by_nclasses.setdefault(len(entry['colors']), set()).add(cmap_id)
+    
+    def entry(self, cmap_id):
+        """
+        Returns the raw entry of the bundle for a color map id.
+        """
+        if self.entries is None: self._load()
+        entry = self.entries.get(cmap_id)
+        if entry is None:
+            raise Exception("Color map '%s' not found" % cmap_id)
+        return entry
+    
+    def get(self, cmap_id):
+        """
+        Returns the shared ColorMap with the given id.
+        """
+        cmap = self.cmaps.get(cmap_id)
+        if cmap is None:
+            cmap = ColorMap()
+            cmap.load(cmap_id, self)
+            cmap.rgb.flags.writeable = False
+            cmap._frozen = True
+            self.cmaps[cmap_id] = cmap
+        return cmap
     
+    def ids(self):
+        if self.entries is None: self._load()
+        return sorted(self.entries)
+    
+    def families(self):
+        if self.entries is None: self._load()
+        return sorted(self.by_family)
+    
+    def find(self, cmap_type=None, nclasses=None, family=None):
+        """
+        Returns the shared ColorMaps matching all given criteria, sorted
+        by id. E.g. find('seq', 7) for all sequential maps with 7 classes.
+        """
+        if self.entries is None: self._load()
+        ids = set(self.entries)
+        if cmap_type is not None:
+            ids &= self.by_type.get(cmap_type, set())
+        if nclasses is not None:
+            ids &= self.by_nclasses.get(nclasses, set())
+        if family is not None:
+            ids &= self.by_family.get(family.lower(), set())
+        return [self.get(cmap_id) for cmap_id in sorted(ids)]
+    
+    def __contains__(self, cmap_id):
+        if self.entries is None: self._load()
+        return cmap_id in self.entries
+
 
+# The color maps shipped with themavis (see colormaps.html)
+colormaps = ColorMapRegistry()
 
+
+
+
+# Reference white (D65) and sRGB to XYZ matrix for the CIE L*a*b* conversion
+_WHITE = np.array([0.95047, 1., 1.08883])
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_XYZ_TO_RGB = np.linalg.inv(_RGB_TO_XYZ)
+
+
+def rgb_to_lab(rgb):
+    """
+    Converts a (n, 3) array of sRGB colors (0 to 255) to CIE L*a*b*.
+    """
+    c = np.asarray(rgb, dtype=np.float64) / 255.
+    lin = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    xyz = lin.dot(_RGB_TO_XYZ.T) / _WHITE
+    f = np.where(xyz > (6/29.)**3, np.cbrt(xyz), xyz / (3 * (6/29.)**2) + 4/29.)
+    return np.column_stack((
+        116 * f[:,1] - 16, 500 * (f[:,0] - f[:,1]), 200 * (f[:,1] - f[:,2])
+    ))
+
+
+def lab_to_rgb(lab):
+    """
+    Converts a (n, 3) array of CIE L*a*b* colors to sRGB (0 to 255, as
+    float). Colors outside of the sRGB gamut are clipped.
+    """
+    lab = np.asarray(lab, dtype=np.float64)
+    fy = (lab[:,0] + 16) / 116.
+    f = np.column_stack((fy + lab[:,1] / 500., fy, fy - lab[:,2] / 200.))
+    xyz = np.where(f > 6/29., f**3, 3 * (6/29.)**2 * (f - 4/29.)) * _WHITE
+    lin = np.clip(xyz.dot(_XYZ_TO_RGB.T), 0, 1)
+    c = np.where(lin <= 0.0031308, 12.92 * lin, 1.055 * lin ** (1/2.4) - 0.055)
+    return c * 255
+
+
+
+
+class ColorRamp(object):
+    """
+    A continuous color ramp through the colors of a ColorMap (or a list of
+    (r,g,b) tuples), placed at equal distances unless positions between 0
+    and 1 are given. The colors are interpolated in CIE L*a*b*, and the
+    ramp is computed once into a lookup table of size entries.
+    """
+    def __init__(self, colors, size=256, positions=None):
+        if isinstance(colors, ColorMap):
+            colors = colors.rgb
+        colors = np.array(colors, dtype=np.float64)
+        if positions is None:
+            positions = np.linspace(0, 1, len(colors))
+        lab = rgb_to_lab(colors)
+        t = np.linspace(0, 1, size)
+        lut_lab = np.column_stack([
+            np.interp(t, positions, lab[:,i]) for i in range(3)
+        ])
+        self.size = size
+        self.lut = np.round(lab_to_rgb(lut_lab)).astype(np.uint8)
+        self.hex = np.array(['#%02x%02x%02x' % tuple(c) for c in self.lut.tolist()], dtype=object)
+    
+    def __len__(self):
+        return self.size
+    
+    def indices(self, values, vmin, vmax):
+        """
+        Returns the index in the lookup table for an array of values,
+        vmin and vmax being the values at both ends of the ramp. Values
+        outside are given the end colors, and NaN values -1.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if vmax > vmin:
+            t = (values - vmin) / float(vmax - vmin)
+        else:
+            t = np.zeros(values.shape)
+        missing = ~np.isfinite(t)
+        t[missing] = 0
+        idx = np.round(np.clip(t, 0, 1) * (self.size - 1)).astype(np.int64)
+        idx[missing] = -1
+        return idx
+    
+    def hex_colors(self, values, vmin, vmax, missing=None):
+        """
+        Returns an array with the hex color of every value, and missing
+        for NaN values.
+        """
+        idx = self.indices(values, vmin, vmax)
+        out = self.hex[idx]
+        out[idx < 0] = missing
+        return out
+    
+    def color(self, t):
+        """
+        Returns the Color at the relative position t (0 to 1).
+        """
+        i = self.indices([t], 0, 1)[0]
+        return Color(self.lut[i])
@@ -6,10 +6,11 @@ from pysvg.shape import rect, path
 from pysvg.text import text
 
 import numpy as np
-import re
 from math import floor
 
-from utils import mm_to_px
+from textmetrics import font_size, text_width, wrap_text
+from utils import mm_to_px, px_to_mm
+from label import CollisionIndex
 from layer import Layer
 
 
@@ -53,6 +54,13 @@ class Container(object):
         bg_rect.set_style(self.bg_style.getStyle())
         elem.addElement(bg_rect)
     
+    def draw_defs(self, elem):
+        """
+        Adds the definitions needed by the content, e.g. symbols, to the
+        defs element of the document.
+        """
+        pass
+    
     def draw_content(self, elem):
         """
         Draws the content of the container.
@@ -81,6 +89,37 @@ class Container(object):
         )
         contour_rect.set_style(self.contour_style.getStyle())
         elem.addElement(contour_rect)
+    
+    def frame_coords(self):
+        """
+        Returns the corners of the container as (4, 2) array in millimeters.
+        """
+        return np.array([
+            (self.x, self.y), (self.x + self.width, self.y),
+            (self.x + self.width, self.y + self.height),
+            (self.x, self.y + self.height)
+        ], dtype=np.float64)
+    
+    def draw_raster_background(self, canvas):
+        """
+        Draws the background of the container on a raster canvas.
+        """
+        canvas.paint(self.frame_coords(), [0, 4], self.bg_style.style_dict)
+    
+    def draw_raster_content(self, canvas):
+        """
+        Draws the content of the container on a raster canvas. Text is not
+        rasterized, so by default nothing is drawn.
+        """
+        pass
+    
+    def draw_raster_contour(self, canvas):
+        """
+        Draws the contour of the container on a raster canvas.
+        """
+        style = dict(self.contour_style.style_dict)
+        style['fill'] = 'none'
+        canvas.paint(self.frame_coords(), [0, 4], style)
 
 
 
@@ -88,8 +127,11 @@ class Container(object):
 class Map(Container):
     """
     A map container with layers.
+    bbox is given in geographic coordinates. If a projection is given
+    (see the projection module), the map shows the projected extent of the
+    bbox.
     """
-    def __init__(self, x, y, width, height, bbox):
+    def __init__(self, x, y, width, height, bbox, projection=None):
         Container.__init__(self, x, y, width, height)
         self.needs_clipping = True
         self.has_content = True
@@ -97,45 +139,88 @@ class Map(Container):
         self.bg_style.setStroke('none')     # No border for our map
         self.layers = []    # The list of layers
         self.bbox = np.array(bbox, dtype=np.float64)
+        self.projection = projection
+
+    def projected_bbox(self):
+        """
+        Returns the bbox in projected coordinates. This is the extent of the
+        projected bbox outline, which is densified as the edges may be
+        curved after projection. If the seam of the projection crosses the
+        bbox, both sides of the seam are part of the outline.
+        """
+        if self.projection is None: return self.bbox
+        t = np.linspace(0, 1, 65)
+        x0, y0, x1, y1 = self.bbox
+        xs = x0 + t * (x1 - x0)
+        ys = y0 + t * (y1 - y0)
+        meridians = [x0, x1]
+        if self.projection.has_seam:
+            seam = np.degrees(self.projection.lon0) + 180
+            k = np.arange(np.ceil((x0 - seam) / 360.), np.floor((x1 - seam) / 360.) + 1)
+            for lon in seam + 360 * k:
+                meridians.extend((lon - 1e-7, lon + 1e-7))
+        outline = np.concatenate([
+            np.column_stack((xs, np.repeat(y0, len(t)))),
+            np.column_stack((xs, np.repeat(y1, len(t))))
+        ] + [np.column_stack((np.repeat(lon, len(t)), ys)) for lon in meridians])
+        proj = self.projection.project_array(outline)
+        return np.array([
+            np.nanmin(proj[:,0]), np.nanmin(proj[:,1]),
+            np.nanmax(proj[:,0]), np.nanmax(proj[:,1])
+        ])
 
     def adjusted_bbox(self):
         """
-        Returns a bbox corresponding to the dimensions of the view frame.
+        Returns a bbox corresponding to the dimensions of the view frame,
+        in projected coordinates.
         """
-        bbox_width = abs(self.bbox[2] - self.bbox[0])
-        bbox_height = abs(self.bbox[3] - self.bbox[1])
+        bbox = self.projected_bbox()
+        bbox_width = abs(bbox[2] - bbox[0])
+        bbox_height = abs(bbox[3] - bbox[1])
         if (bbox_width / bbox_height) > (self.width / self.height):
             # We should adjust according to the width and increase the height
             reduction_factor = bbox_width / self.width
             adj_bbox_height = self.height * reduction_factor
             return [
-                self.bbox[0], 
-                self.bbox[1] - ((adj_bbox_height - bbox_height) / 2),
-                self.bbox[2], 
-                self.bbox[3] + ((adj_bbox_height - bbox_height) / 2)
+                bbox[0], 
+                bbox[1] - ((adj_bbox_height - bbox_height) / 2),
+                bbox[2], 
+                bbox[3] + ((adj_bbox_height - bbox_height) / 2)
             ]
         else:
             # We adjust according to the height and increase the width
             reduction_factor = bbox_height / self.height
             adj_bbox_width = self.width * reduction_factor
             return [
-                self.bbox[0] - ((adj_bbox_width - bbox_width) / 2), 
-                self.bbox[1],
-                self.bbox[2] + ((adj_bbox_width - bbox_width) / 2), 
-                self.bbox[3]
+                bbox[0] - ((adj_bbox_width - bbox_width) / 2), 
+                bbox[1],
+                bbox[2] + ((adj_bbox_width - bbox_width) / 2), 
+                bbox[3]
             ]
 
     def add_layer(self, layer):
         self.layers.append(layer)
+        if layer.labels is not None:
+            self.has_labels = True
+
+    def draw_defs(self, elem):
+        for lyr in self.layers:
+            lyr.draw_defs(elem, self)
 
     def draw_content(self, elem):
         for lyr in self.layers:
             lyr.draw_content(elem, self)
 
     def draw_labels(self, elem):
+        # The labels of all layers must not overlap
+        self.label_index = CollisionIndex()
         for lyr in self.layers:
             lyr.draw_labels(elem, self)
 
+    def draw_raster_content(self, canvas):
+        for lyr in self.layers:
+            lyr.draw_raster(canvas, self)
+
     def geo_to_local_coords(self, coords):
         """
         Converts a list of geographic coordinates into local coordinates.
@@ -145,6 +230,8 @@ class Map(Container):
         # Convert it to a list.
         if type(coords) == tuple:
             coords = [coords]
+        if self.projection is not None:
+            coords = self.projection.project_array([c[:2] for c in coords]).tolist()
         bb = self.adjusted_bbox()
         out_coords = []
         for c in coords:
@@ -155,6 +242,30 @@ class Map(Container):
             out_coords.append((x,y))
         return out_coords
 
+    def geo_to_local_array(self, coords):
+        """
+        Vectorized version of geo_to_local_coords for a (n, 2) array of
+        geographic coordinates. Returns a (n, 2) array of local coordinates.
+        """
+        coords = np.asarray(coords, dtype=np.float64)
+        if self.projection is not None:
+            coords = self.projection.project_array(coords)
+        return self.projected_to_local_array(coords)
+
+    def projected_to_local_array(self, coords):
+        """
+        Converts a (n, 2) array of projected coordinates into local
+        coordinates.
+        """
+        coords = np.asarray(coords, dtype=np.float64)
+        bb = self.adjusted_bbox()
+        out = np.empty(coords.shape, dtype=np.float64)
+        out[:,0] = ((coords[:,0] - bb[0]) / (bb[2] - bb[0]) * self.width) + self.x
+        y = ((coords[:,1] - bb[1]) / (bb[3] - bb[1]) * self.height) + self.y
+        # y coordinate needs to be swaped (small is top)
+        out[:,1] = self.y + self.height - (y - self.y)
+        return out
+
     def local_to_geo_coords(self, coords):
         return coords
 
@@ -169,15 +280,21 @@ class Text(Container):
             self.style = StyleBuilder(style)
     
     def draw_content(self, elem):
-        textsize = int(re.findall('([0-9]+)',
-            self.style.style_dict.get('font-size', "12")
-        )[0])
-        txt = self.text.split('\n')
+        textsize = font_size(self.style)
+        # Lines too long for the container are wrapped
+        txt = wrap_text(self.text, mm_to_px(self.width), self.style)
+        # Place the text according to its alignment
+        anchor = self.style.style_dict.get('text-anchor', 'start')
+        x = self.x
+        if anchor == 'middle':
+            x += self.width / 2.
+        elif anchor == 'end':
+            x += self.width
         for i in range(len(txt)):
             y = mm_to_px(self.y) + textsize + i*1.8*textsize
             t = text(
                 content=txt[i], 
-                x=mm_to_px(self.x), y=y
+                x=mm_to_px(x), y=y
             )
             t.set_style(self.style.getStyle())
             elem.addElement(t)
@@ -202,13 +319,22 @@ class ScaleBar(Container):
         # Create a new group
         grp = g()
         grp.setAttribute('id', 'scalebar')
-        # Find the amount of available width
-        bbox = self.map_container.bbox
+        # Find the amount of available width. The step length is in map
+        # units, i.e. in meters if the map has a projection.
+        bbox = self.map_container.projected_bbox()
         step_length = (float(self.step) * self.factor)
         c = [[bbox[0], 0], [bbox[0] + step_length, 0]]
-        px = self.map_container.geo_to_local_coords(c)
+        px = self.map_container.projected_to_local_array(c)
         step_px = abs(px[1][0] - px[0][0])
         nsteps = int(floor(float(self.width) / step_px))
+        # The last label, with the unit, must fit into the container
+        anchor = self.style.style_dict.get('text-anchor', 'start')
+        overhang = {'start': 1., 'middle': .5, 'end': 0.}.get(anchor, 1.)
+        while nsteps > 0:
+            last = '%s %s' % (nsteps*self.step, self.unit)
+            w = px_to_mm(text_width(last, self.style)) * overhang
+            if nsteps*step_px + w <= self.width: break
+            nsteps -= 1
         # Draw the horizontal line
         l = path(pathData="M %f %f L %f %f" % (
             mm_to_px(self.x), mm_to_px(self.y + self.height),
@@ -273,28 +399,18 @@ class Legend(Container):
         y = self.y + self.border
         width = self.width - (2*self.border)
         height = self.height - (2*self.border)
-        if self.title is not None:
-            textsize = int(re.findall('([0-9]+)',
-                self.title_style.get('font-size', "11")
-            )[0])
-            t = text(
-                content=self.title, 
-                x=mm_to_px(x), y=mm_to_px(y) + textsize
-            )
-            t.set_style(StyleBuilder(self.title_style).getStyle())
-            elem.addElement(t)
-            y += int(round(textsize))
-        if self.name is not None:
-            textsize = int(re.findall('([0-9]+)',
-                self.name_style.get('font-size', "11")
-            )[0])
-            t = text(
-                content=self.name, 
-                x=mm_to_px(x), y=mm_to_px(y) + textsize
-            )
-            t.set_style(StyleBuilder(self.name_style).getStyle())
-            elem.addElement(t)
-            y += int(round(textsize))
+        # The title and the name are wrapped to the legend width
+        for content, style in ((self.title, self.title_style), (self.name, self.name_style)):
+            if content is None: continue
+            textsize = font_size(style, 11)
+            for line in wrap_text(content, mm_to_px(width), style):
+                t = text(
+                    content=line, 
+                    x=mm_to_px(x), y=mm_to_px(y) + textsize
+                )
+                t.set_style(StyleBuilder(style).getStyle())
+                elem.addElement(t)
+                y += int(round(textsize))
         self.style.legend(elem, x, y, width, height, self.label_style)
 
 
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Kernel density estimation on regular grids. The points are binned into
+the grid cells, and the grid is convolved with a Gaussian kernel in the
+frequency domain, so the cost depends on the grid size and not on the
+number of points or the bandwidth.
+"""
+
+import numpy as np
+
+
+def fft_size(n):
+    """
+    Returns the smallest integer >= n without prime factors other than 2, 3
+    and 5, for which the FFT is fast.
+    """
+    best = 2 ** int(np.ceil(np.log2(max(n, 1))))
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            m = p35
+            while m < n: m *= 2
+            best = min(best, m)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def bin_points(points, shape, weights=None):
+    """
+    Returns a grid of the given shape (rows, columns) with the number of
+    points (or the sum of their weights) in every cell. points is a (n, 2)
+    array of (column, row) coordinates in grid cells; points outside of the
+    grid are ignored.
+    """
+    rows, cols = shape
+    points = np.asarray(points, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        ij = np.floor(points)
+        inside = (
+            (ij[:,0] >= 0) & (ij[:,0] < cols) & (ij[:,1] >= 0) & (ij[:,1] < rows)
+        )
+    ij = ij[inside].astype(np.int64)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)[inside]
+        valid = np.isfinite(weights)
+        ij, weights = ij[valid], weights[valid]
+    grid = np.bincount(ij[:,1] * cols + ij[:,0], weights=weights, minlength=rows * cols)
+    return grid.reshape(shape).astype(np.float64)
+
+
+def gaussian_smooth(grid, sigma):
+    """
+    Convolves the grid with a Gaussian kernel of standard deviation sigma
+    cells. The grid is padded with zeros by 4 sigma, so that nothing wraps
+    around the edges, and the kernel is applied as its exact Fourier
+    transform. The sum of the grid is preserved.
+    """
+    if sigma <= 0: return grid.astype(np.float64)
+    rows, cols = grid.shape
+    pad = int(np.ceil(4 * sigma))
+    fr, fc = fft_size(rows + pad), fft_size(cols + pad)
+    spectrum = np.fft.rfft2(grid, (fr, fc))
+    ky = np.fft.fftfreq(fr)
+    kx = np.fft.rfftfreq(fc)
+    # The Gaussian is separable, and so is its transform
+    spectrum *= np.exp(-2 * (np.pi * sigma * ky) ** 2)[:,np.newaxis]
+    spectrum *= np.exp(-2 * (np.pi * sigma * kx) ** 2)[np.newaxis,:]
+    return np.fft.irfft2(spectrum, (fr, fc))[:rows,:cols]
+
+
+def kernel_density(points, shape, sigma, weights=None, margin=None):
+    """
+    Returns the kernel density of the points on a grid of the given shape,
+    in points (or weights) per cell. points is a (n, 2) array of (column,
+    row) coordinates in grid cells, and sigma the bandwidth of the Gaussian
+    kernel in cells. Points outside of the grid contribute if they lie
+    within margin cells (by default 4 sigma).
+    """
+    if margin is None: margin = int(np.ceil(4 * sigma))
+    rows, cols = shape
+    points = np.asarray(points, dtype=np.float64) + margin
+    grid = bin_points(points, (rows + 2 * margin, cols + 2 * margin), weights)
+    density = gaussian_smooth(grid, sigma)
+    # Negative values are rounding errors of the FFT
+    return np.maximum(density[margin:margin+rows, margin:margin+cols], 0)
@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+"""
+Packed representation of feature geometries as flat NumPy arrays.
+"""
+
+import numpy as np
+
+
+class PackedGeometries(object):
+    """
+    The geometries of a list of features packed into flat arrays.
+    All vertices are stored in coords, a (n, 2) float64 array. Ring i is
+    coords[ring_offsets[i]:ring_offsets[i+1]], and feature j owns the rings
+    feature_offsets[j] to feature_offsets[j+1].
+    kind is 'polygon' for closed rings, 'line' for open rings and 'point'
+    for single-vertex rings.
+    """
+    def __init__(self, coords, ring_offsets, feature_offsets, kind='polygon'):
+        self.coords = coords
+        self.ring_offsets = ring_offsets
+        self.feature_offsets = feature_offsets
+        self.kind = kind
+        self._projected = {}
+
+    @property
+    def nfeatures(self):
+        return len(self.feature_offsets) - 1
+
+    @property
+    def nrings(self):
+        return len(self.ring_offsets) - 1
+
+    def with_coords(self, coords):
+        """
+        Returns a copy sharing the offsets, but with new coordinates,
+        e.g. the transformed coordinates.
+        """
+        return PackedGeometries(coords, self.ring_offsets, self.feature_offsets, self.kind)
+
+    def projected(self, projection):
+        """
+        Returns the geometries projected with a projection.Projection, or
+        the geometries themselves if projection is None. The result is 
+        cached per projection, so that redraws and several maps with the
+        same projection project the coordinates only once. Rings and lines
+        crossing the seam of the projection are split, so the result may
+        have more rings.
+        """
+        if projection is None: return self
+        key = projection.key()
+        proj = self._projected.get(key)
+        if proj is None:
+            proj = self._projected[key] = projection.project_packed(self)
+        return proj
+    
+    def feature_rings(self, j):
+        """
+        Returns the list of coordinate arrays of the rings of feature j.
+        """
+        offs = self.ring_offsets
+        return [
+            self.coords[offs[i]:offs[i+1]]
+            for i in range(self.feature_offsets[j], self.feature_offsets[j+1])
+        ]
+
+    def feature_window(self, j):
+        """
+        Returns the coordinates and the ring offsets (starting at 0) of
+        feature j.
+        """
+        r0, r1 = self.feature_offsets[j], self.feature_offsets[j+1]
+        offs = self.ring_offsets[r0:r1+1]
+        return self.coords[offs[0]:offs[-1]], offs - offs[0]
+
+    def ring_ids(self):
+        """
+        Returns for each vertex the index of its ring.
+        """
+        return np.repeat(np.arange(self.nrings), np.diff(self.ring_offsets))
+
+    def feature_ids(self):
+        """
+        Returns for each ring the index of its feature.
+        """
+        return np.repeat(np.arange(self.nfeatures), np.diff(self.feature_offsets))
+
+    def next_vertex(self):
+        """
+        Returns for each vertex the index of the next vertex of its ring,
+        going back to the first vertex at the end of the ring.
+        """
+        starts, ends = self.ring_offsets[:-1], self.ring_offsets[1:]
+        nonempty = ends > starts
+        nxt = np.arange(1, len(self.coords) + 1)
+        nxt[ends[nonempty] - 1] = starts[nonempty]
+        return nxt
+
+    def ring_areas(self):
+        """
+        Returns the area of each ring (always positive).
+        """
+        x0, y0 = self.coords[:,0], self.coords[:,1]
+        nxt = self.next_vertex()
+        cross = x0 * y0[nxt] - x0[nxt] * y0
+        return np.abs(np.bincount(self.ring_ids(), weights=cross, minlength=self.nrings)) / 2
+
+    def ring_bounds(self):
+        """
+        Returns a (nrings, 4) array with the bounding box of each ring as
+        (xmin, ymin, xmax, ymax). Rings without vertices get NaN.
+        """
+        bounds = np.empty((self.nrings, 4), dtype=np.float64)
+        bounds.fill(np.nan)
+        nonempty = np.flatnonzero(np.diff(self.ring_offsets) > 0)
+        if len(nonempty) == 0: return bounds
+        starts = self.ring_offsets[nonempty]
+        for col in (0, 1):
+            bounds[nonempty, col] = np.minimum.reduceat(self.coords[:,col], starts)
+            bounds[nonempty, col+2] = np.maximum.reduceat(self.coords[:,col], starts)
+        return bounds
+
+    def feature_bounds(self):
+        """
+        Returns a (nfeatures, 4) array with the bounding box of each feature
+        as (xmin, ymin, xmax, ymax). Features without vertices get NaN.
+        """
+        bounds = np.empty((self.nfeatures, 4), dtype=np.float64)
+        bounds.fill(np.nan)
+        vertex_offsets = self.ring_offsets[self.feature_offsets]
+        nonempty = np.flatnonzero(np.diff(vertex_offsets) > 0)
+        if len(nonempty) == 0: return bounds
+        starts = vertex_offsets[nonempty]
+        for col in (0, 1):
+            bounds[nonempty, col] = np.minimum.reduceat(self.coords[:,col], starts)
+            bounds[nonempty, col+2] = np.maximum.reduceat(self.coords[:,col], starts)
+        return bounds
+
+
+
+def pack_polygons(features):
+    """
+    Packs the exterior rings of all Polygon and MultiPolygon features.
+    Features with other or without geometries get no rings.
+    """
+    rings = []
+    ring_sizes = []
+    feature_sizes = []
+    for feat in features:
+        geom = feat['geometry']
+        nrings = 0
+        if geom is not None and geom['type'] in ('Polygon', 'MultiPolygon'):
+            if geom['type'] == 'Polygon':
+                polygons = [geom['coordinates']]
+            else:
+                polygons = geom['coordinates']
+            for poly in polygons:
+                if len(poly) == 0 or poly[0] is None: continue
+                ring = poly[0]
+                rings.append(ring)
+                ring_sizes.append(len(ring))
+                nrings += 1
+        feature_sizes.append(nrings)
+    return _pack(rings, ring_sizes, feature_sizes, 'polygon')
+
+
+def pack_lines(features):
+    """
+    Packs the lines of all LineString and MultiLineString features, with
+    one ring per line. Features with other or without geometries get no
+    rings.
+    """
+    rings = []
+    ring_sizes = []
+    feature_sizes = []
+    for feat in features:
+        geom = feat['geometry']
+        nlines = 0
+        if geom is not None and geom['type'] in ('LineString', 'MultiLineString'):
+            if geom['type'] == 'LineString':
+                lines = [geom['coordinates']]
+            else:
+                lines = geom['coordinates']
+            for line in lines:
+                if line is None or len(line) == 0: continue
+                rings.append(line)
+                ring_sizes.append(len(line))
+                nlines += 1
+        feature_sizes.append(nlines)
+    return _pack(rings, ring_sizes, feature_sizes, 'line')
+
+
+def pack_points(features):
+    """
+    Packs the coordinates of all Point and MultiPoint features. Every point
+    is stored as a ring with a single vertex.
+    """
+    rings = []
+    feature_sizes = []
+    for feat in features:
+        geom = feat['geometry']
+        npoints = 0
+        if geom is not None and geom['type'] in ('Point', 'MultiPoint'):
+            if geom['type'] == 'Point':
+                points = [geom['coordinates']]
+            else:
+                points = geom['coordinates']
+            for pt in points:
+                if pt is None or len(pt) < 2: continue
+                rings.append([pt])
+                npoints += 1
+        feature_sizes.append(npoints)
+    return _pack(rings, [1] * len(rings), feature_sizes, 'point')
+
+
+def _pack(rings, ring_sizes, feature_sizes, kind):
+    ring_offsets = np.zeros(len(ring_sizes) + 1, dtype=np.int64)
+    np.cumsum(ring_sizes, out=ring_offsets[1:])
+    feature_offsets = np.zeros(len(feature_sizes) + 1, dtype=np.int64)
+    np.cumsum(feature_sizes, out=feature_offsets[1:])
+    coords = np.empty((ring_offsets[-1], 2), dtype=np.float64)
+    for i in range(len(rings)):
+        coords[ring_offsets[i]:ring_offsets[i+1]] = [c[:2] for c in rings[i]]
+    return PackedGeometries(coords, ring_offsets, feature_offsets, kind)
+
+
+
+# Number of points tested at once by points_in_rings
+PIP_CHUNK = 100000
+
+
+def points_in_rings(points, rings, packed):
+    """
+    Tests for each point of the (n, 2) array whether it lies inside the
+    ring rings[i] of the packed geometries (even-odd rule). The points
+    are sorted by ring and y, so each edge is only compared with the
+    points within its vertical extent, found by binary search.
+    """
+    n = len(points)
+    inside = np.zeros(n, dtype=bool)
+    coords = packed.coords
+    if n == 0 or len(coords) == 0: return inside
+    nxt = packed.next_vertex()
+    ring_ids = packed.ring_ids()
+    x0, y0 = coords[:,0], coords[:,1]
+    x1, y1 = x0[nxt], y0[nxt]
+    # Sort keys combining the ring and the y coordinate scaled to [0, 1)
+    ymin = min(y0.min(), points[:,1].min())
+    span = max(y0.max(), points[:,1].max()) - ymin
+    scale = 1. / (span * (1 + 1e-9)) if span > 0 else 0.
+    edge_lo = ring_ids + (np.minimum(y0, y1) - ymin) * scale
+    edge_hi = ring_ids + (np.maximum(y0, y1) - ymin) * scale
+    for c in range(0, n, PIP_CHUNK):
+        pts = points[c:c+PIP_CHUNK]
+        keys = rings[c:c+PIP_CHUNK] + (pts[:,1] - ymin) * scale
+        order = np.argsort(keys)
+        keys = keys[order]
+        # The points crossed by the horizontal line through each edge
+        lo = np.searchsorted(keys, edge_lo, side='left')
+        hi = np.searchsorted(keys, edge_hi, side='left')
+        counts = hi - lo
+        edge = np.repeat(np.arange(len(coords)), counts)
+        offsets = np.cumsum(counts) - counts
+        p = order[lo[edge] + np.arange(len(edge)) - offsets[edge]]
+        t = (pts[p,1] - y0[edge]) / (y1[edge] - y0[edge])
+        crossing = pts[p,0] < x0[edge] + t * (x1[edge] - x0[edge])
+        ncross = np.bincount(p[crossing], minlength=len(pts))
+        inside[c:c+PIP_CHUNK] = ncross % 2 == 1
+    return inside
+
+
+def sample_points(packed, counts, seed=0, max_rounds=100):
+    """
+    Returns counts[j] random points inside the rings of feature j of packed
+    polygons, as (m, 2) array, together with the feature of every point.
+    The rings of a feature get points in proportion to their area. The
+    points are drawn in the bounding box of their ring, and those outside
+    of the ring are drawn again (at most max_rounds times). The result only
+    depends on the seed.
+    """
+    rnd = np.random.RandomState(seed)
+    counts = np.asarray(counts, dtype=np.int64)
+    areas = packed.ring_areas()
+    feature_ids = packed.feature_ids()
+    total = np.bincount(feature_ids, weights=areas, minlength=packed.nfeatures)
+    counts = np.where(total > 0, np.maximum(counts, 0), 0)
+    point_features = np.repeat(np.arange(packed.nfeatures), counts)
+    m = len(point_features)
+    if m == 0: return np.zeros((0, 2)), point_features
+    # Choose the ring of every point by area
+    cum = np.cumsum(areas)
+    base = np.concatenate(([0.], cum))[packed.feature_offsets[:-1]]
+    u = base[point_features] + rnd.rand(m) * total[point_features]
+    rings = np.searchsorted(cum, u, side='right')
+    rings = np.clip(rings, packed.feature_offsets[:-1][point_features],
+        packed.feature_offsets[1:][point_features] - 1)
+    bounds = packed.ring_bounds()
+    out = np.empty((m, 2), dtype=np.float64)
+    todo = np.arange(m)
+    for i in range(max_rounds):
+        if len(todo) == 0: break
+        b = bounds[rings[todo]]
+        candidates = b[:,:2] + rnd.rand(len(todo), 2) * (b[:,2:] - b[:,:2])
+        ok = points_in_rings(candidates, rings[todo], packed)
+        out[todo[ok]] = candidates[ok]
+        todo = todo[~ok]
+    # Points that could not be placed are left out
+    placed = np.ones(m, dtype=bool)
+    placed[todo] = False
+    return out[placed], point_features[placed]
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Georeferenced grids of values, opened as memory maps so that only the
+cells that are read are loaded from disk. A grid is a .npy file, whose
+extent is given separately, or a raw binary file with a small header
+(see write_grid). The first row of a grid is its northern (top) edge.
+"""
+
+import struct
+
+import numpy as np
+
+
+# Header of the raw grid files: magic, NumPy dtype string (e.g. '<f4'),
+# rows, columns, extent (xmin, ymin, xmax, ymax) and nodata value, padded
+# to 64 bytes
+GRID_MAGIC = b'THEMGRID'
+GRID_HEADER = struct.Struct('<8s4sII4dd4x')
+
+# Number of cells read at once when averaging blocks
+READ_CHUNK = 1 << 22
+
+
+class Grid(object):
+    """
+    A grid of values, a (rows, columns) array (usually a memory map), with
+    its extent bbox = (xmin, ymin, xmax, ymax) given by the outer edges
+    of the cells. Cells with the nodata value or NaN are missing.
+    """
+    def __init__(self, data, bbox, nodata=None):
+        if data.ndim != 2:
+            raise Exception('Error. A grid must have two dimensions.')
+        self.data = data
+        self.bbox = np.array(bbox, dtype=np.float64)
+        self.nodata = nodata
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def cell_size(self):
+        """
+        The width and height of a cell.
+        """
+        rows, cols = self.data.shape
+        return (
+            (self.bbox[2] - self.bbox[0]) / cols,
+            (self.bbox[3] - self.bbox[1]) / rows
+        )
+
+    def window(self, bbox):
+        """
+        Returns the rows r0 to r1 and columns c0 to c1 (exclusive) of the
+        cells intersecting the bbox, or None if there is none.
+        """
+        rows, cols = self.data.shape
+        dx, dy = self.cell_size
+        x0, y0, x1, y1 = self.bbox
+        c0 = max(0, int(np.floor((bbox[0] - x0) / dx)))
+        c1 = min(cols, int(np.ceil((bbox[2] - x0) / dx)))
+        r0 = max(0, int(np.floor((y1 - bbox[3]) / dy)))
+        r1 = min(rows, int(np.ceil((y1 - bbox[1]) / dy)))
+        if c0 >= c1 or r0 >= r1: return None
+        return r0, r1, c0, c1
+
+    def block_average(self, r0, r1, c0, c1, fy, fx):
+        """
+        Returns the mean of the valid cells of every block of fy rows and
+        fx columns of the window, as float64 array with NaN for blocks
+        without valid cells. The blocks are aligned on the window corner,
+        and the last blocks may be partial. The window is read in chunks
+        of rows, so the memory used does not depend on its size.
+        """
+        nrows = -(-(r1 - r0) // fy)
+        ncols = -(-(c1 - c0) // fx)
+        out = np.empty((nrows, ncols), dtype=np.float64)
+        step = max(1, READ_CHUNK // ((c1 - c0) * fy)) * fy
+        for start in range(r0, r1, step):
+            end = min(r1, start + step)
+            values = np.array(self.data[start:end, c0:c1], dtype=np.float64)
+            if self.nodata is not None:
+                values[values == self.nodata] = np.nan
+            # Pad the partial blocks with missing cells
+            h = -(-(end - start) // fy) * fy
+            padded = np.empty((h, ncols * fx))
+            padded.fill(np.nan)
+            padded[:end-start,:c1-c0] = values
+            valid = np.isfinite(padded)
+            padded[~valid] = 0
+            shape = (h // fy, fy, ncols, fx)
+            sums = padded.reshape(shape).sum(axis=3).sum(axis=1)
+            counts = valid.reshape(shape).sum(axis=3).sum(axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                out[(start - r0) // fy:(start - r0) // fy + h // fy] = sums / counts
+        return out
+
+
+def open_grid(path, bbox=None, nodata=None):
+    """
+    Opens a grid as memory map. The extent bbox (and the nodata value) must
+    be given for .npy files, and override the header of raw grid files.
+    """
+    if path.endswith('.npy'):
+        if bbox is None:
+            raise Exception('Error. The extent of a .npy grid must be given.')
+        return Grid(np.load(path, mmap_mode='r'), bbox, nodata)
+    f = open(path, 'rb')
+    try:
+        header = f.read(GRID_HEADER.size)
+    finally:
+        f.close()
+    if len(header) < GRID_HEADER.size or not header.startswith(GRID_MAGIC):
+        raise Exception('Error. %s is not a grid file.' % path)
+    magic, dtype, rows, cols, x0, y0, x1, y1, nd = GRID_HEADER.unpack(header)
+    data = np.memmap(path, dtype=np.dtype(dtype.strip()), mode='r',
+        offset=GRID_HEADER.size, shape=(rows, cols))
+    if bbox is None: bbox = (x0, y0, x1, y1)
+    if nodata is None and not np.isnan(nd): nodata = nd
+    return Grid(data, bbox, nodata)
+
+
+def write_grid(path, data, bbox, nodata=None):
+    """
+    Writes a (rows, columns) array as raw grid file with its extent and
+    nodata value.
+    """
+    data = np.asarray(data)
+    dtype = data.dtype.str.encode('ascii')
+    if len(dtype) > 4:
+        raise Exception('Error. Unsupported grid type %s.' % data.dtype)
+    if nodata is None: nodata = np.nan
+    rows, cols = data.shape
+    f = open(path, 'wb')
+    try:
+        f.write(GRID_HEADER.pack(GRID_MAGIC, dtype.ljust(4), rows, cols,
+            bbox[0], bbox[1], bbox[2], bbox[3], nodata))
+        np.ascontiguousarray(data).tofile(f)
+    finally:
+        f.close()
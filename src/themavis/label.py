@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+"""
+Label placement. Anchors are computed for all features at once from the
+packed geometries, and the labels are placed in priority order, skipping
+labels that would overlap already placed ones.
+"""
+
+from xml.sax.saxutils import escape
+
+from pysvg.builders import StyleBuilder
+from pysvg.text import text
+
+import numpy as np
+
+from textmetrics import font_size, text_width
+
+
+class LabelStyle(object):
+    """
+    Describes the labels of a layer. attr is the attribute with the label
+    text. Labels are placed by decreasing value of the priority attribute,
+    or by decreasing feature size (area, length) if there is none. padding
+    is the minimal distance in millimeters between two labels.
+    """
+    def __init__(self, attr, style=None, priority=None, padding=1):
+        self.attr = attr
+        self.priority = priority
+        self.padding = padding
+        if style == None:
+            style = {
+                'font-family': 'Helvetica',
+                'font-size': '8pt',
+                'fill': 'black'
+            }
+        self.style = StyleBuilder(dict(style))
+        self.style.style_dict['text-anchor'] = 'middle'
+
+    def font_size(self):
+        """
+        Returns the font size in pixels (points at 72 dpi).
+        """
+        return font_size(self.style)
+
+    def text_width(self, content):
+        """
+        Returns the width of the text in pixels.
+        """
+        return text_width(content, self.style)
+
+    def text_for_feature(self, feature):
+        """
+        Returns the label text for the feature, or None.
+        """
+        v = feature['properties'].get(self.attr)
+        if v is None: return None
+        if isinstance(v, unicode):
+            return v
+        return unicode(str(v), 'utf-8')
+
+    def label_elem(self, content, x, y):
+        """
+        Returns a text element centered on (x, y) in pixels.
+        """
+        t = text(
+            content=escape(content).encode('utf-8'),
+            x=x, y=y + 0.35 * self.font_size()
+        )
+        t.set_style(self.style.getStyle())
+        return t
+
+
+
+
+class CollisionIndex(object):
+    """
+    A uniform grid of boxes (xmin, ymin, xmax, ymax). A box only needs to
+    be compared with the boxes in the cells it overlaps, so placing n labels
+    takes about linear time.
+    """
+    def __init__(self, cell_size=20):
+        self.cell_size = float(cell_size)
+        self.cells = {}
+        self.boxes = []
+
+    def _cells(self, box):
+        c = self.cell_size
+        i0, i1 = int(np.floor(box[0] / c)), int(np.floor(box[2] / c))
+        j0, j1 = int(np.floor(box[1] / c)), int(np.floor(box[3] / c))
+        return [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)]
+
+    def collides(self, box):
+        boxes = self.boxes
+        for cell in self._cells(box):
+            for k in self.cells.get(cell, ()):
+                b = boxes[k]
+                if box[0] < b[2] and b[0] < box[2] and box[1] < b[3] and b[1] < box[3]:
+                    return True
+        return False
+
+    def insert(self, box):
+        k = len(self.boxes)
+        self.boxes.append(box)
+        for cell in self._cells(box):
+            self.cells.setdefault(cell, []).append(k)
+
+    def insert_if_free(self, box):
+        """
+        Inserts the box if it doesn't overlap any box of the index.
+        Returns whether the box was inserted.
+        """
+        if self.collides(box): return False
+        self.insert(box)
+        return True
+
+
+
+def place_labels(index, boxes, order, frame):
+    """
+    Inserts the boxes, a (n, 4) array, into the collision index in the given
+    order. Boxes overlapping an already placed box or not entirely within
+    the frame (xmin, ymin, xmax, ymax) are skipped. Returns the indices of
+    the placed boxes.
+    """
+    inside = (
+        (boxes[:,0] >= frame[0]) & (boxes[:,1] >= frame[1]) &
+        (boxes[:,2] <= frame[2]) & (boxes[:,3] <= frame[3])
+    )
+    placed = []
+    for i in order:
+        if inside[i] and index.insert_if_free(tuple(boxes[i])):
+            placed.append(i)
+    return placed
+
+
+def polygon_anchors(packed):
+    """
+    Returns a (nfeatures, 2) array with an interior point for every feature,
+    and the area of the ring used. The anchor lies on the horizontal line
+    through the centroid of the largest ring of the feature, in the middle
+    of the widest span inside the ring. Features without rings get NaN.
+    """
+    nf = packed.nfeatures
+    anchors = np.empty((nf, 2), dtype=np.float64)
+    anchors.fill(np.nan)
+    areas = np.zeros(nf, dtype=np.float64)
+    n = len(packed.coords)
+    if n == 0 or packed.nrings == 0: return anchors, areas
+    coords, offs = packed.coords, packed.ring_offsets
+    ring_ids = packed.ring_ids()
+    nxt = packed.next_vertex()
+    x0, y0 = coords[:,0], coords[:,1]
+    x1, y1 = x0[nxt], y0[nxt]
+    cross = x0 * y1 - x1 * y0
+    nr = packed.nrings
+    a = np.bincount(ring_ids, weights=cross, minlength=nr) / 2
+    cy = np.bincount(ring_ids, weights=(y0 + y1) * cross, minlength=nr)
+    ring_area = np.abs(a)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cy = cy / (6 * a)
+    # The largest ring of every feature
+    feature_ids = packed.feature_ids()
+    order = np.lexsort((-ring_area, feature_ids))
+    first = np.ones(nr, dtype=bool)
+    first[1:] = feature_ids[order][1:] != feature_ids[order][:-1]
+    best = order[first]
+    best_feature = feature_ids[best]
+    # Degenerated rings have no centroid, use the middle of their bbox
+    scan_y = cy[best]
+    bad = ~np.isfinite(scan_y)
+    if bad.any():
+        for k in np.flatnonzero(bad):
+            r = best[k]
+            ys = y0[offs[r]:offs[r+1]]
+            scan_y[k] = (ys.min() + ys.max()) / 2 if len(ys) else np.nan
+    # Crossings of the edges of the chosen rings with their scan line
+    line_y = np.empty(nr)
+    line_y.fill(np.nan)
+    line_y[best] = scan_y
+    ly = line_y[ring_ids]
+    e = np.flatnonzero(np.isfinite(ly))
+    e = e[(y0[e] <= ly[e]) != (y1[e] <= ly[e])]
+    t = (ly[e] - y0[e]) / (y1[e] - y0[e])
+    xs = x0[e] + t * (x1[e] - x0[e])
+    rid = ring_ids[e]
+    o = np.lexsort((xs, rid))
+    xs, rid = xs[o], rid[o]
+    # Spans between crossings 2k and 2k+1 of a ring are inside
+    if len(xs) > 1:
+        first_cross = np.ones(len(xs), dtype=bool)
+        first_cross[1:] = rid[1:] != rid[:-1]
+        pos = np.arange(len(xs)) - np.maximum.accumulate(np.where(first_cross, np.arange(len(xs)), 0))
+        k = np.flatnonzero((pos[:-1] % 2 == 0) & (rid[:-1] == rid[1:]))
+        width = xs[k+1] - xs[k]
+        # Widest span per ring
+        so = np.lexsort((-width, rid[k]))
+        sk = k[so]
+        top = np.ones(len(sk), dtype=bool)
+        top[1:] = rid[sk][1:] != rid[sk][:-1]
+        sk = sk[top]
+        span_x = np.empty(nr)
+        span_x.fill(np.nan)
+        span_x[rid[sk]] = (xs[sk] + xs[sk+1]) / 2
+        anchors[best_feature, 0] = span_x[best]
+        anchors[best_feature, 1] = scan_y
+    areas[best_feature] = ring_area[best]
+    return anchors, areas
+
+
+def line_anchors(packed):
+    """
+    Returns a (nfeatures, 2) array with the point at half the length of the
+    longest line of every feature, and the length of this line.
+    """
+    nf = packed.nfeatures
+    anchors = np.empty((nf, 2), dtype=np.float64)
+    anchors.fill(np.nan)
+    lengths = np.zeros(nf, dtype=np.float64)
+    n = len(packed.coords)
+    if n < 2: return anchors, lengths
+    coords, offs = packed.coords, packed.ring_offsets
+    ring_ids = packed.ring_ids()
+    nr = packed.nrings
+    # Segment i goes from vertex i to i+1 within the same line
+    seg_len = np.zeros(n)
+    same = ring_ids[1:] == ring_ids[:-1]
+    d = coords[1:] - coords[:-1]
+    seg_len[:-1] = np.where(same, np.hypot(d[:,0], d[:,1]), 0)
+    ring_len = np.bincount(ring_ids, weights=seg_len, minlength=nr)
+    feature_ids = packed.feature_ids()
+    order = np.lexsort((-ring_len, feature_ids))
+    first = np.ones(nr, dtype=bool)
+    first[1:] = feature_ids[order][1:] != feature_ids[order][:-1]
+    best = order[first]
+    # Distance along the line at every vertex
+    along = np.cumsum(seg_len) - seg_len
+    along -= along[offs[:-1][ring_ids]]
+    # The segment containing the middle starts at the last vertex before
+    # half of the length
+    half = np.empty(nr)
+    half.fill(np.nan)
+    half[best] = ring_len[best] / 2
+    with np.errstate(invalid='ignore'):
+        before = np.bincount(ring_ids, weights=along <= half[ring_ids], minlength=nr)
+    i = offs[:-1][best] + np.maximum(before[best].astype(np.int64) - 1, 0)
+    p = coords[i]
+    j = np.flatnonzero(seg_len[i] > 0)
+    t = (half[best][j] - along[i[j]]) / seg_len[i[j]]
+    p[j] += t[:,np.newaxis] * (coords[i[j] + 1] - p[j])
+    anchors[feature_ids[best]] = p
+    lengths[feature_ids[best]] = ring_len[best]
+    return anchors, lengths
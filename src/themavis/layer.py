@@ -1,15 +1,87 @@
 #!/usr/bin/env python
 
 
+import base64
+import itertools
 import json
+import os
 
-from style import SimpleSurfaceStyle
-from utils import mm_to_px, parse
+from binning import BIN_SHAPES, aggregate, cell_centers, cell_outline
+from binning import hexagon_cells, square_cells
+from cartogram import resolve_overlaps
+from clip import clip_polygons, clip_lines
+from color import Color, ColorMap, ColorRamp, colormaps, parse_color
+from density import kernel_density
+from geometry import pack_polygons, pack_lines, pack_points, sample_points
+from grid import open_grid
+from label import CollisionIndex, place_labels, polygon_anchors, line_anchors
+from raster import encode_png, encode_indexed_png
+from stats import AttributeStatistics, attribute_values, statistics_cache
+from style import SimpleSurfaceStyle, SimpleLineStyle, QuantileSurfaceStyle
+from svgwriter import PathRecords, encode_rings
+from symbol import SYMBOL_SHAPES, symbol_element, unit_outline
+from utils import LRUCache, mm_to_px, mm_to_px_int, px_to_mm, parse, random_string
 
-from pysvg.structure import g
+from pysvg.builders import StyleBuilder
+from pysvg.structure import g, use
 import pysvg.structure
 import pysvg.shape
 
+import numpy as np
+
+
+POLYGON_TYPES = ('Polygon', 'MultiPolygon')
+LINE_TYPES = ('LineString', 'MultiLineString')
+
+# Margin in millimeters around the map for culling and clipping features,
+# so that the strokes of features just outside of the map remain visible.
+CULLING_MARGIN = 2
+
+# Number of maps (projections and frames) for which a layer keeps the
+# data derived for drawing, e.g. the dots or the density grid
+LAYER_CACHE_SIZE = 4
+
+# Number of features styled at once by the direct writer
+STYLE_BATCH = 4096
+
+# Unique ids for data modified by joins or direct edits
+_modified_data = itertools.count()
+
+
+def update_statistics(style, features, statistics):
+    """
+    Runs the statistics pass of a style on a list of features, if the
+    style needs one. Styles working on the values of a single attribute
+    get them from statistics, a function returning the
+    stats.AttributeStatistics of an attribute, instead.
+    """
+    if not style.needs_statistics(): return
+    attr = style.statistics_attribute()
+    if attr is not None:
+        style.set_statistics(statistics(attr), fixed=False)
+        return
+    style.init_statistics()
+    for feat in features:
+        style.update_statistics(feat)
+    style.finalize_statistics()
+
+
+def frame_image(x0, y0, width, height, png, dpi=72):
+    """
+    Returns an image element embedding the PNG file content, whose upper
+    left pixel is (x0, y0) at the given resolution, and whose size is
+    width by height pixels.
+    """
+    # SVG user units are pixels at 72 dpi
+    f = 72. / dpi
+    img = pysvg.structure.image(
+        x='%.2f' % (x0 * f), y='%.2f' % (y0 * f), 
+        width='%.2f' % (width * f), height='%.2f' % (height * f),
+        preserveAspectRatio='none'
+    )
+    img.set_xlink_href('data:image/png;base64,' + base64.b64encode(png))
+    return img
+
 
 
 class Layer(object):
@@ -18,12 +90,19 @@ class Layer(object):
     """
     def __init__(self, name):
         self.name = name
+        self.labels = None
+    
+    def draw_defs(self, elem, map):
+        pass
     
     def draw_content(self, elem, map):
         pass
     
     def draw_labels(self, elem, map):
         pass
+    
+    def draw_raster(self, canvas, map):
+        pass
 
 
 
@@ -31,8 +110,14 @@ class Layer(object):
 class VectorLayer(Layer):
     """
     VectorLayer represents any GeoJSON vector dataset.
+    With direct=True, the features are written straight to the SVG output
+    when the page is written, instead of creating a pysvg path per feature.
+    With clip=True, polygons and lines are cut at the map frame, so only
+    the visible part of the geometries is written.
+    labels is a label.LabelStyle, or None for a layer without labels.
+    After editing the features directly, call invalidate().
     """
-    def __init__(self, name, datasource, style=None):
+    def __init__(self, name, datasource, style=None, direct=False, clip=False, labels=None):
         Layer.__init__(self, name)
         self.datasource = datasource
         # Open the GeoJson datasource
@@ -46,7 +131,31 @@ class VectorLayer(Layer):
             print "Error. Unable to open datasource %s" % self.datasource
             return
         self.features = fc['features']
-        self.style = style or SimpleSurfaceStyle()
+        self.style = style or self.default_style()
+        self.direct = direct
+        self.clip = clip
+        self.labels = labels
+        self._polygons = None
+        self._lines = None
+        self._points = None
+        # Identifies the data in the statistics cache. Layers read from the
+        # same unchanged file share their statistics, until they are
+        # joined or invalidated.
+        self.data_id = (os.path.abspath(datasource), os.path.getmtime(datasource))
+        self.data_version = 0
+    
+    def default_style(self):
+        """
+        Returns a line style for layers with only lines, and a surface
+        style otherwise.
+        """
+        types = set([
+            feat['geometry']['type'] for feat in self.features 
+            if feat['geometry'] is not None
+        ])
+        if len(types) > 0 and types.issubset(LINE_TYPES):
+            return SimpleLineStyle()
+        return SimpleSurfaceStyle()
     
     def join(self, layer_attr, data_table, data_attr, prefix=''):
         """
@@ -62,18 +171,253 @@ class VectorLayer(Layer):
             if feat is None: continue
             for k in d:
                 feat['properties'][prefix+k] = parse(d[k])
+        self.invalidate(geometries=False)
+    
+    def invalidate(self, geometries=True):
+        """
+        Must be called after editing the features directly. The data is
+        then specific to this layer, so the statistics cache and the other
+        layers read from the same file do not see the edits. With
+        geometries=False, only the properties are assumed to have changed
+        and the packed geometries are kept.
+        """
+        self.data_id = ('modified', next(_modified_data))
+        self.data_version += 1
+        if geometries:
+            self._polygons = None
+            self._lines = None
+            self._points = None
+    
+    def packed_polygons(self):
+        """
+        Returns the exterior rings of all polygon features packed into
+        flat arrays (see geometry.PackedGeometries). Computed once.
+        """
+        if self._polygons is None:
+            self._polygons = pack_polygons(self.features)
+        return self._polygons
+    
+    def packed_lines(self):
+        """
+        Returns the lines of all line features packed into flat arrays,
+        with one ring per line. Computed once.
+        """
+        if self._lines is None:
+            self._lines = pack_lines(self.features)
+        return self._lines
+    
+    def packed_points(self):
+        """
+        Returns the points of all features packed into flat arrays, with
+        one single-vertex ring per point. Computed once.
+        """
+        if self._points is None:
+            self._points = pack_points(self.features)
+        return self._points
+    
+    def local_geometries(self, packed, map_container):
+        """
+        Transforms packed geometries at once into local coordinates (mm).
+        Returns the transformed geometries and a boolean array telling for
+        each feature whether it is within the map. If the layer clips, the
+        polygons and lines are clipped to the map frame.
+        """
+        projected = packed.projected(map_container.projection)
+        local = projected.with_coords(
+            map_container.projected_to_local_array(projected.coords)
+        )
+        bounds = local.feature_bounds()
+        m = map_container
+        # Features without vertices have NaN bounds and are not visible
+        visible = np.isfinite(bounds[:,0])
+        b = bounds[visible]
+        visible[visible] = (
+            (b[:,2] >= m.x - CULLING_MARGIN) &
+            (b[:,0] <= m.x + m.width + CULLING_MARGIN) &
+            (b[:,3] >= m.y - CULLING_MARGIN) &
+            (b[:,1] <= m.y + m.height + CULLING_MARGIN)
+        )
+        if self.clip:
+            rect = (
+                m.x - CULLING_MARGIN, m.y - CULLING_MARGIN,
+                m.x + m.width + CULLING_MARGIN, m.y + m.height + CULLING_MARGIN
+            )
+            if local.kind == 'polygon':
+                local = clip_polygons(local, rect)
+            elif local.kind == 'line':
+                local = clip_lines(local, rect)
+            # Features may be clipped away completely
+            visible &= np.diff(local.feature_offsets) > 0
+        return local, visible
+    
+    def attribute_array(self, attr):
+        """
+        Returns the values of an attribute for all features as float64
+        array. Missing and non-numeric values are NaN.
+        """
+        return attribute_values(self.features, attr)
+    
+    def statistics(self, attr):
+        """
+        Returns the stats.AttributeStatistics of an attribute. They are
+        kept in the shared statistics cache, so all styles, maps and
+        layers with the same data compute them only once.
+        """
+        key = (self.data_id, self.data_version, attr)
+        st = statistics_cache.get(key)
+        if st is None:
+            st = AttributeStatistics(self.attribute_array(attr))
+            statistics_cache.put(key, st)
+        return st
+    
+    def update_style_statistics(self):
+        """
+        Runs the statistics pass if the style needs one (see
+        update_statistics).
+        """
+        update_statistics(self.style, self.features, self.statistics)
+    
+    def path_data(self, map_container):
+        """
+        Generates a tuple (feature index, path data) for every polygon and
+        line feature within the map. The coordinates of all features are 
+        transformed at once from the packed arrays.
+        """
+        polys, polys_visible = self.local_geometries(self.packed_polygons(), map_container)
+        lines, lines_visible = self.local_geometries(self.packed_lines(), map_container)
+        polys = polys.with_coords(mm_to_px(polys.coords))
+        lines = lines.with_coords(mm_to_px(lines.coords))
+        for j in range(len(self.features)):
+            feat = self.features[j]
+            geom = feat['geometry']
+            if geom is None: continue
+            if geom['type'] in POLYGON_TYPES:
+                offs = self.packed_polygons().feature_offsets
+                if geom['type'] == 'Polygon' and offs[j] == offs[j+1]:
+                    print "Warning. One geometry could not be converted to SVG."
+                    continue
+                if not polys_visible[j]: continue
+                px, ring_offsets = polys.feature_window(j)
+                yield j, encode_rings(px, ring_offsets)
+            elif geom['type'] in LINE_TYPES:
+                if not lines_visible[j]: continue
+                px, ring_offsets = lines.feature_window(j)
+                yield j, encode_rings(px, ring_offsets, closed=False)
+    
+    def path_records(self, map_container):
+        """
+        Generates a tuple (path data, style string) for every polygon feature.
+        Only the features drawn are styled, in batches of STYLE_BATCH, and
+        the style strings are computed once per style.
+        """
+        styles = {}
+        paths = self.path_data(map_container)
+        while True:
+            batch = list(itertools.islice(paths, STYLE_BATCH))
+            if len(batch) == 0: break
+            builders = self.style.styles_for_features([self.features[j] for j, d in batch])
+            for (j, d), builder in zip(batch, builders):
+                style = styles.get(id(builder))
+                if style is None:
+                    style = styles[id(builder)] = builder.getStyle()
+                yield d, style
     
     def draw_content(self, elem, map_container):
         # Check if the style needs to update some statistics
-        if self.style.needs_statistics():
-            self.style.init_statistics()
-            for feat in self.features:
-                self.style.update_statistics(feat)
-            self.style.finalize_statistics()
+        self.update_style_statistics()
+        if self.direct:
+            # The records are generated while the page is written
+            elem.addElement(PathRecords(self.path_records(map_container)))
+            return
         # Read all features
-        for feat in self.features:
-            geom_elem = self.geometry_for_feature(feat, map_container)
-            if geom_elem is not None: elem.addElement(geom_elem)
+        for j, d in self.path_data(map_container):
+            p = pysvg.shape.path()
+            p.set_d(d)
+            self.style.style_feature(self.features[j], p)
+            elem.addElement(p)
+    
+    def draw_raster(self, canvas, map_container):
+        """
+        Fills and strokes the polygons and strokes the lines directly on
+        a raster canvas.
+        """
+        self.update_style_statistics()
+        polys, polys_visible = self.local_geometries(self.packed_polygons(), map_container)
+        lines, lines_visible = self.local_geometries(self.packed_lines(), map_container)
+        visible = np.flatnonzero(polys_visible | lines_visible)
+        builders = self.style.styles_for_features([self.features[j] for j in visible])
+        for j, builder in zip(visible.tolist(), builders):
+            if polys_visible[j]:
+                coords, ring_offsets = polys.feature_window(j)
+                closed = True
+            else:
+                coords, ring_offsets = lines.feature_window(j)
+                closed = False
+            canvas.paint(coords, ring_offsets, builder.style_dict, closed)
+    
+    def label_anchors(self, map_container):
+        """
+        Returns the label anchor of every feature in local coordinates (mm),
+        and the size of the feature (area or length). Features outside of
+        the map get NaN anchors.
+        """
+        anchors = np.empty((len(self.features), 2), dtype=np.float64)
+        anchors.fill(np.nan)
+        sizes = np.zeros(len(self.features), dtype=np.float64)
+        # Lines, then polygons, so polygons win for mixed features
+        lines, lines_visible = self.local_geometries(self.packed_lines(), map_container)
+        a, l = line_anchors(lines)
+        anchors[lines_visible] = a[lines_visible]
+        sizes[lines_visible] = l[lines_visible]
+        polys, polys_visible = self.local_geometries(self.packed_polygons(), map_container)
+        a, area = polygon_anchors(polys)
+        anchors[polys_visible] = a[polys_visible]
+        sizes[polys_visible] = area[polys_visible]
+        # The first point of point features
+        pts, pts_visible = self.local_geometries(self.packed_points(), map_container)
+        j = np.flatnonzero(pts_visible & np.isnan(anchors[:,0]))
+        anchors[j] = pts.coords[pts.ring_offsets[pts.feature_offsets[j]]]
+        return anchors, sizes
+    
+    def draw_labels(self, elem, map_container):
+        """
+        Places the labels by decreasing priority, skipping the labels that
+        would overlap a label already placed on the map.
+        """
+        if self.labels is None: return
+        labels = self.labels
+        anchors, sizes = self.label_anchors(map_container)
+        if labels.priority is not None:
+            priority = self.attribute_array(labels.priority)
+        else:
+            priority = sizes
+        candidates = []
+        texts = []
+        for j in np.flatnonzero(np.isfinite(anchors[:,0])):
+            content = labels.text_for_feature(self.features[j])
+            if content is None or len(content) == 0: continue
+            candidates.append(j)
+            texts.append(content)
+        if len(candidates) == 0: return
+        candidates = np.array(candidates)
+        px = mm_to_px(anchors[candidates])
+        half_width = np.array([labels.text_width(t) for t in texts]) / 2
+        half_height = labels.font_size() / 2.
+        pad = mm_to_px(labels.padding) / 2.
+        boxes = np.column_stack((
+            px[:,0] - half_width - pad, px[:,1] - half_height - pad,
+            px[:,0] + half_width + pad, px[:,1] + half_height + pad
+        ))
+        m = map_container
+        frame = mm_to_px(np.array([m.x, m.y, m.x + m.width, m.y + m.height]))
+        prio = priority[candidates]
+        prio = np.where(np.isnan(prio), -np.inf, prio)
+        order = np.argsort(-prio, kind='mergesort')
+        index = getattr(map_container, 'label_index', None)
+        if index is None:
+            index = CollisionIndex()
+        for i in place_labels(index, boxes, order, frame):
+            elem.addElement(labels.label_elem(texts[i], px[i,0], px[i,1]))
     
     def geometry_for_feature(self, feat, map_container):
         """
@@ -109,17 +453,664 @@ class VectorLayer(Layer):
         else:
             ring = geom['coordinates'][0]
             if ring is None: return None
-            npts = len(ring)
-            x, y = map_container.geo_to_local_coords((ring[0][0], ring[0][1]))[0]
-            p.appendMoveToPath(mm_to_px(x), mm_to_px(y), relative=False)
-            for i in range(1, npts):
-                x, y = map_container.geo_to_local_coords((ring[i][0], ring[i][1]))[0]
-                p.appendLineToPath(mm_to_px(x), mm_to_px(y), relative=False)
-            p.appendCloseCurve()
+            px = mm_to_px(map_container.geo_to_local_array([c[:2] for c in ring]))
+            p.set_d(p.get_d() + encode_rings(px, [0, len(ring)]))
         return p
         
 
 
+class ProportionalSymbolLayer(VectorLayer):
+    """
+    A point layer with one symbol per point, whose area is proportional to
+    the value of an attribute. The symbol shape is defined once in the defs
+    of the document, and each point is a use element referencing it. The
+    largest symbols are drawn first, so the smaller ones remain visible.
+    """
+    def __init__(self, name, datasource, attr, max_radius=5, max_value=None, 
+        shape='circle', style=None):
+        """
+        max_radius is the radius in millimeters of the symbol for max_value.
+        If max_value is None, the largest absolute value of the attribute
+        is used.
+        """
+        VectorLayer.__init__(self, name, datasource, style)
+        if shape not in SYMBOL_SHAPES:
+            raise Exception('Error. Unknown symbol shape %s.' % shape)
+        self.attr = attr
+        self.max_radius = max_radius
+        self.max_value = max_value
+        self.shape = shape
+        self.symbol_id = None
+    
+    def symbol_radii(self, values):
+        """
+        Returns the symbol radius in millimeters for an array of values.
+        Missing values give NaN.
+        """
+        values = np.abs(values)
+        max_value = self.max_value
+        if max_value is None:
+            finite = values[np.isfinite(values)]
+            if len(finite) == 0: return values
+            max_value = finite.max()
+        if max_value == 0: return np.zeros(values.shape)
+        return self.max_radius * np.sqrt(values / abs(float(max_value)))
+    
+    def symbol_centers(self, map_container):
+        """
+        Returns the feature index, the center in local coordinates and the
+        radius in millimeters of every symbol, one per point.
+        """
+        pts = self.packed_points()
+        feature_ids = pts.feature_ids()
+        radii = self.symbol_radii(self.attribute_array(self.attr))[feature_ids]
+        centers = map_container.projected_to_local_array(
+            pts.projected(map_container.projection).coords
+        )
+        return feature_ids, centers, radii
+    
+    def symbols(self, map_container):
+        """
+        Returns the feature index, the center and the radius in millimeters
+        of every visible symbol, from the largest to the smallest symbol.
+        """
+        feature_ids, centers, radii = self.symbol_centers(map_container)
+        # Skip empty symbols, and symbols entirely outside of the map
+        m = map_container
+        visible = np.isfinite(radii)
+        visible[visible] &= radii[visible] > 0
+        visible[visible] &= (
+            (centers[visible,0] + radii[visible] >= m.x) &
+            (centers[visible,0] - radii[visible] <= m.x + m.width) &
+            (centers[visible,1] + radii[visible] >= m.y) &
+            (centers[visible,1] - radii[visible] <= m.y + m.height)
+        )
+        idx = np.flatnonzero(visible)
+        order = idx[np.argsort(-radii[idx], kind='mergesort')]
+        return feature_ids[order], centers[order], radii[order]
+    
+    def draw_defs(self, elem, map_container):
+        self.symbol_id = random_string(16)
+        elem.addElement(symbol_element(self.shape, self.symbol_id))
+    
+    def draw_content(self, elem, map_container):
+        self.update_style_statistics()
+        if self.symbol_id is None:
+            # A symbol can be defined anywhere in the document
+            self.draw_defs(elem, map_container)
+        href = '#%s' % self.symbol_id
+        feature_ids, centers, radii = self.symbols(map_container)
+        corners = mm_to_px(centers - radii[:,np.newaxis]).tolist()
+        sizes = mm_to_px(2 * radii).tolist()
+        # Consecutive symbols with the same style share a group, so the
+        # use elements don't need a style attribute
+        current = None
+        for j, (x, y), size in zip(feature_ids.tolist(), corners, sizes):
+            builder = self.style.style_for_feature(self.features[j])
+            if builder is not current:
+                grp = g()
+                grp.set_style(builder.getStyle())
+                elem.addElement(grp)
+                current = builder
+            u = use()
+            u.set_xlink_href(href)
+            u.set_x('%.2f' % x)
+            u.set_y('%.2f' % y)
+            u.set_width('%.2f' % size)
+            u.set_height('%.2f' % size)
+            grp.addElement(u)
+    
+    def draw_raster(self, canvas, map_container):
+        self.update_style_statistics()
+        outline = unit_outline(self.shape)
+        offsets = [0, len(outline)]
+        feature_ids, centers, radii = self.symbols(map_container)
+        for j, c, r in zip(feature_ids, centers, radii):
+            style = self.style.style_for_feature(self.features[j])
+            canvas.paint(outline * r + c, offsets, style.style_dict)
+
+
+
+
+class GraduatedSymbolLayer(ProportionalSymbolLayer):
+    """
+    A point layer with symbols of a few discrete sizes. A value below
+    limits[i] gets radii[i], values above all limits get the last radius.
+    For n radii, we need to have n-1 limits.
+    """
+    def __init__(self, name, datasource, attr, limits, radii, shape='circle', style=None):
+        ProportionalSymbolLayer.__init__(self, name, datasource, attr, 
+            max(radii), None, shape, style)
+        if len(radii) != len(limits) + 1:
+            raise Exception('Error. For n radii, n-1 limits are needed.')
+        self.limits = np.array(limits, dtype=np.float64)
+        self.radii = np.array(radii, dtype=np.float64)
+    
+    def symbol_radii(self, values):
+        out = np.empty(len(values), dtype=np.float64)
+        out.fill(np.nan)
+        valid = np.isfinite(values)
+        out[valid] = self.radii[np.searchsorted(self.limits, values[valid], side='right')]
+        return out
+
+
+
+
+class DorlingCartogramLayer(ProportionalSymbolLayer):
+    """
+    A Dorling cartogram: every feature is replaced by a circle whose area
+    is proportional to the value of an attribute, and the circles are moved
+    apart until no two circles are closer than gap millimeters. The circles
+    start at the label anchor of polygon features, or at the first point of
+    point features.
+    The layout is computed in local coordinates, as the circles have a
+    fixed size on the page, and kept until the map frame, the projection,
+    the data or the symbol sizes change.
+    """
+    def __init__(self, name, datasource, attr, max_radius=5, max_value=None, 
+        style=None, gap=0.2, iterations=500, attraction=0.1):
+        ProportionalSymbolLayer.__init__(self, name, datasource, attr, 
+            max_radius, max_value, 'circle', style)
+        self.gap = gap
+        self.iterations = iterations
+        self.attraction = attraction
+        self._layouts = LRUCache(LAYER_CACHE_SIZE)
+    
+    def feature_anchors(self, projection):
+        """
+        Returns the start position of every feature in projected
+        coordinates, NaN for features without geometry.
+        """
+        anchors, areas = polygon_anchors(self.packed_polygons().projected(projection))
+        pts = self.packed_points().projected(projection)
+        j = np.flatnonzero(np.isnan(anchors[:,0]) & (np.diff(pts.feature_offsets) > 0))
+        anchors[j] = pts.coords[pts.ring_offsets[pts.feature_offsets[j]]]
+        return anchors
+    
+    def symbol_centers(self, map_container):
+        m = map_container
+        projection = m.projection
+        key = (
+            self.attr, projection and projection.key(), tuple(m.adjusted_bbox()),
+            m.x, m.y, m.width, m.height, self.data_version, self.max_radius, 
+            self.max_value, self.gap
+        )
+        layout = self._layouts.get(key)
+        if layout is None:
+            radii = self.symbol_radii(self.attribute_array(self.attr))
+            centers = m.projected_to_local_array(self.feature_anchors(projection))
+            with np.errstate(invalid='ignore'):
+                feature_ids = np.flatnonzero(
+                    np.isfinite(centers[:,0]) & np.isfinite(radii) & (radii > 0)
+                )
+            radii = radii[feature_ids]
+            centers = resolve_overlaps(centers[feature_ids], radii, self.gap, 
+                self.iterations, self.attraction)[0]
+            layout = (feature_ids, centers, radii)
+            self._layouts.put(key, layout)
+        return layout
+
+
+
+
+class DotDensityLayer(VectorLayer):
+    """
+    A dot density layer. Every polygon feature gets one dot for each
+    value_per_dot units of an attribute, placed at random inside the
+    polygon. attrs is an attribute or a list of attributes, one per
+    category of dots, and colors the list of their colors (Colors, SVG
+    color strings or a ColorMap).
+    The dots are placed once per projection in the projected coordinates,
+    with a fixed seed, so a map always gets the same dots. Each category is
+    written as a single path, each dot being a line of length zero with
+    round caps.
+    """
+    def __init__(self, name, datasource, attrs, value_per_dot, colors=None, 
+        dot_radius=0.25, opacity=1, seed=0):
+        VectorLayer.__init__(self, name, datasource)
+        if isinstance(attrs, basestring): attrs = [attrs]
+        self.attrs = list(attrs)
+        self.value_per_dot = float(value_per_dot)
+        if colors is None:
+            colors = ['black'] * len(self.attrs)
+        elif isinstance(colors, ColorMap):
+            colors = colors.colors
+        if len(colors) != len(self.attrs):
+            raise Exception('Error. One color per attribute is needed.')
+        self.colors = [Color(parse_color(c)) for c in colors]
+        self.dot_radius = dot_radius
+        self.opacity = opacity
+        self.seed = seed
+        self._dots = LRUCache(LAYER_CACHE_SIZE)
+    
+    def dot_counts(self, attr):
+        """
+        Returns the number of dots of every feature for an attribute.
+        """
+        values = self.attribute_array(attr)
+        values[~np.isfinite(values)] = 0
+        return np.round(np.maximum(values, 0) / self.value_per_dot).astype(np.int64)
+    
+    def dots(self, map_container):
+        """
+        Returns for each category the visible dots in local coordinates
+        (mm) as (n, 2) array.
+        """
+        projection = map_container.projection
+        key = (
+            projection and projection.key(), self.data_version, 
+            tuple(self.attrs), self.value_per_dot, self.seed
+        )
+        dots = self._dots.get(key)
+        if dots is None:
+            polys = self.packed_polygons().projected(projection)
+            dots = [
+                sample_points(polys, self.dot_counts(attr), self.seed + i)[0]
+                for i, attr in enumerate(self.attrs)
+            ]
+            self._dots.put(key, dots)
+        m = map_container
+        r = self.dot_radius
+        out = []
+        for pts in dots:
+            local = m.projected_to_local_array(pts)
+            visible = (
+                (local[:,0] >= m.x - r) & (local[:,0] <= m.x + m.width + r) &
+                (local[:,1] >= m.y - r) & (local[:,1] <= m.y + m.height + r)
+            )
+            out.append(local[visible])
+        return out
+    
+    def draw_content(self, elem, map_container):
+        for color, local in zip(self.colors, self.dots(map_container)):
+            if len(local) == 0: continue
+            p = pysvg.shape.path()
+            p.set_d(''.join(['M%.2f %.2fh0' % (x, y) for x, y in mm_to_px(local).tolist()]))
+            p.set_style(StyleBuilder({
+                'fill': 'none',
+                'stroke': color.hex,
+                'stroke-width': '%.2f' % mm_to_px(2 * self.dot_radius),
+                'stroke-linecap': 'round',
+                'stroke-opacity': self.opacity
+            }).getStyle())
+            elem.addElement(p)
+    
+    def draw_raster(self, canvas, map_container):
+        # Each dot is an octagon, all dots of a category are filled at once
+        outline = unit_outline('circle', 8) * self.dot_radius
+        for color, local in zip(self.colors, self.dots(map_container)):
+            if len(local) == 0: continue
+            coords = (local[:,np.newaxis,:] + outline).reshape((-1, 2))
+            offsets = np.arange(0, len(coords) + 1, len(outline))
+            canvas.fill(mm_to_px(coords, canvas.dpi), offsets, color.rgb, 
+                self.opacity, rule='nonzero')
+
+
+
+
+class BinningLayer(VectorLayer):
+    """
+    Aggregates the points of a layer into a regular grid of hexagons or
+    squares, and draws every non-empty cell. A cell has the property count
+    (its number of points), and with an attribute attr also sum and mean
+    (of the values of its points). The style colors the cells by one of
+    them, by default with quantile classes of the count.
+    With space='page', cell_size is the side of the cells in millimeters,
+    and the grid starts at the corner of the map. With space='projected',
+    cell_size is in projected units and the grid starts at the origin of
+    the projection, so the cells don't depend on the map frame.
+    The cells with the same style are written as a single path.
+    """
+    def __init__(self, name, datasource, cell_size=5, shape='hexagon', attr=None, 
+        space='page', style=None):
+        VectorLayer.__init__(self, name, datasource, style)
+        if shape not in BIN_SHAPES:
+            raise Exception('Error. Unknown bin shape %s.' % shape)
+        if space not in ('page', 'projected'):
+            raise Exception('Error. Unknown binning space %s.' % space)
+        self.cell_size = float(cell_size)
+        self.shape = shape
+        self.attr = attr
+        self.space = space
+        self._cells = LRUCache(LAYER_CACHE_SIZE)
+    
+    def default_style(self):
+        return QuantileSurfaceStyle('count', colormaps.get('ylorrd5'), 
+            [0.2, 0.4, 0.6, 0.8], style={
+                'fill-opacity': 0.9,
+                'stroke': 'white',
+                'stroke-width': 0.2,
+            })
+    
+    def cells_key(self, map_container):
+        """
+        Returns a key identifying the cells of a map: the data, the
+        projection, the grid parameters, and the map frame in page space.
+        """
+        m = map_container
+        key = (
+            'cells', self.data_id, self.data_version, 
+            m.projection and m.projection.key(), self.cell_size, self.shape, 
+            self.attr, self.space
+        )
+        if self.space == 'page':
+            key += (tuple(m.adjusted_bbox()), m.x, m.y, m.width, m.height)
+        return key
+    
+    def aggregated_cells(self, map_container):
+        """
+        Returns the non-empty cells as a list of features with the cell
+        properties and no geometry, and the (n, 2) array of their centers
+        in page or projected coordinates. Computed once per projection, and
+        per map frame in page space.
+        """
+        m = map_container
+        projection = m.projection
+        key = self.cells_key(m)
+        cells = self._cells.get(key)
+        if cells is None:
+            pts = self.packed_points().projected(projection)
+            coords = pts.coords
+            if self.space == 'page':
+                coords = m.projected_to_local_array(coords) - (m.x, m.y)
+            valid = np.isfinite(coords).all(axis=1)
+            weights = None
+            if self.attr is not None:
+                weights = self.attribute_array(self.attr)[pts.feature_ids()[valid]]
+            if self.shape == 'hexagon':
+                ids = hexagon_cells(coords[valid], self.cell_size)
+            else:
+                ids = square_cells(coords[valid], self.cell_size)
+            ids, counts, sums, means = aggregate(ids, weights)
+            centers = cell_centers(ids, self.cell_size, self.shape)
+            if self.space == 'page':
+                centers += (m.x, m.y)
+            if weights is None:
+                features = [
+                    {'type': 'Feature', 'geometry': None, 'properties': {'count': c}}
+                    for c in counts.tolist()
+                ]
+            else:
+                features = [
+                    {'type': 'Feature', 'geometry': None, 'properties': {
+                        'count': c, 'sum': s, 'mean': None if np.isnan(v) else v
+                    }} for c, s, v in zip(counts.tolist(), sums.tolist(), means.tolist())
+                ]
+            cells = (features, centers)
+            self._cells.put(key, cells)
+        return cells
+    
+    def cell_statistics(self, map_container, attr):
+        """
+        Returns the stats.AttributeStatistics of a cell property. They are
+        kept in the shared statistics cache, like the statistics of the
+        feature attributes.
+        """
+        key = self.cells_key(map_container) + (attr,)
+        st = statistics_cache.get(key)
+        if st is None:
+            features = self.aggregated_cells(map_container)[0]
+            st = AttributeStatistics(attribute_values(features, attr))
+            statistics_cache.put(key, st)
+        return st
+    
+    def styled_cells(self, map_container):
+        """
+        Returns the outline of a cell around the origin, and a list of
+        (StyleBuilder, centers) with the centers of the visible cells in
+        local coordinates (mm) grouped by style.
+        """
+        m = map_container
+        features, centers = self.aggregated_cells(m)
+        update_statistics(self.style, features, lambda attr: self.cell_statistics(m, attr))
+        size = self.cell_size
+        if self.space == 'projected':
+            bb = m.adjusted_bbox()
+            size *= m.width / (bb[2] - bb[0])
+            centers = m.projected_to_local_array(centers)
+        outline = cell_outline(size, self.shape)
+        visible = np.flatnonzero(
+            (centers[:,0] >= m.x - size) & (centers[:,0] <= m.x + m.width + size) &
+            (centers[:,1] >= m.y - size) & (centers[:,1] <= m.y + m.height + size)
+        )
+        builders = self.style.styles_for_features([features[i] for i in visible])
+        groups = {}
+        order = []
+        for i, builder in zip(visible.tolist(), builders):
+            group = groups.get(id(builder))
+            if group is None:
+                group = groups[id(builder)] = (builder, [])
+                order.append(group)
+            group[1].append(i)
+        return outline, [(builder, centers[idx]) for builder, idx in order]
+    
+    def draw_content(self, elem, map_container):
+        outline, groups = self.styled_cells(map_container)
+        # Every cell is a move to its first corner followed by the same
+        # relative path
+        px = mm_to_px(outline)
+        steps = (px[1:] - px[:-1]).tolist()
+        cell_path = ''.join(['l%.2f %.2f' % (dx, dy) for dx, dy in steps]) + 'z'
+        for builder, centers in groups:
+            p = pysvg.shape.path()
+            p.set_d(''.join([
+                'M%.2f %.2f%s' % (x, y, cell_path) 
+                for x, y in mm_to_px(centers + outline[0]).tolist()
+            ]))
+            p.set_style(builder.getStyle())
+            elem.addElement(p)
+    
+    def draw_raster(self, canvas, map_container):
+        outline, groups = self.styled_cells(map_container)
+        for builder, centers in groups:
+            coords = (centers[:,np.newaxis,:] + outline).reshape((-1, 2))
+            offsets = np.arange(0, len(coords) + 1, len(outline))
+            canvas.paint(coords, offsets, builder.style_dict)
+
+
+
+
+class HeatmapLayer(VectorLayer):
+    """
+    A kernel density heatmap of the points of a layer, drawn as a single
+    image covering the map frame. The points (weighted by the attribute
+    attr if given) are binned into a grid of the pixels of the output, and
+    convolved with a Gaussian kernel whose standard deviation is bandwidth
+    millimeters. The density, in points per square millimeter, is colored
+    on a ColorRamp (or a ColorMap to build one from) from 0 to vmax, by
+    default the maximum density in the map. Densities below fade times
+    vmax become progressively transparent. The image hides the layers
+    below it, so the heatmap is usually added before the vector layers.
+    dpi is the resolution of the image in the SVG output, the raster
+    output uses the resolution of the canvas.
+    """
+    def __init__(self, name, datasource, bandwidth=5, attr=None, colors=None, 
+        vmax=None, fade=0.1, opacity=0.8, dpi=72):
+        VectorLayer.__init__(self, name, datasource)
+        self.bandwidth = float(bandwidth)
+        self.attr = attr
+        if colors is None:
+            colors = colormaps.get('ylorrd9')
+        if not isinstance(colors, ColorRamp):
+            colors = ColorRamp(colors)
+        self.ramp = colors
+        self.vmax = vmax
+        self.fade = fade
+        self.opacity = opacity
+        self.dpi = dpi
+        self._density = LRUCache(LAYER_CACHE_SIZE)
+    
+    def density(self, map_container, dpi=72):
+        """
+        Returns the pixel (x0, y0) of the upper left corner of the map frame
+        at the given resolution, and the density grid of the pixels of the
+        frame. Computed once per projection, frame and resolution.
+        """
+        m = map_container
+        projection = m.projection
+        key = (
+            projection and projection.key(), tuple(m.adjusted_bbox()), 
+            m.x, m.y, m.width, m.height, dpi, self.data_version, 
+            self.bandwidth, self.attr
+        )
+        d = self._density.get(key)
+        if d is None:
+            x0, y0 = mm_to_px_int(m.x, dpi), mm_to_px_int(m.y, dpi)
+            x1 = mm_to_px_int(m.x + m.width, dpi)
+            y1 = mm_to_px_int(m.y + m.height, dpi)
+            pts = self.packed_points().projected(projection)
+            px = mm_to_px(m.projected_to_local_array(pts.coords), dpi) - (x0, y0)
+            weights = None
+            if self.attr is not None:
+                weights = self.attribute_array(self.attr)[pts.feature_ids()]
+            # Side of a pixel in millimeters
+            cell = 25.4 / dpi
+            grid = kernel_density(px, (y1 - y0, x1 - x0), self.bandwidth / cell, weights)
+            d = (x0, y0, grid / cell ** 2)
+            self._density.put(key, d)
+        return d
+    
+    def colorize(self, grid):
+        """
+        Returns the (height, width, 4) uint8 RGBA image of a density grid.
+        """
+        vmax = self.vmax
+        if vmax is None: vmax = grid.max() if grid.size else 0
+        rgba = np.empty(grid.shape + (4,), dtype=np.uint8)
+        rgba[:,:,:3] = self.ramp.lut[self.ramp.indices(grid, 0, vmax)]
+        if vmax > 0 and self.fade > 0:
+            alpha = np.clip(grid / (self.fade * vmax), 0, 1)
+        else:
+            alpha = (grid > 0).astype(np.float64)
+        rgba[:,:,3] = np.round(alpha * self.opacity * 255)
+        return rgba
+    
+    def draw_content(self, elem, map_container):
+        x0, y0, grid = self.density(map_container, self.dpi)
+        if grid.size == 0: return
+        h, w = grid.shape
+        png = encode_png(self.colorize(grid), 9)
+        elem.addElement(frame_image(x0, y0, w, h, png, self.dpi))
+    
+    def draw_raster(self, canvas, map_container):
+        x0, y0, grid = self.density(map_container, canvas.dpi)
+        if grid.size == 0: return
+        canvas.composite_image(x0, y0, self.colorize(grid))
+
+
+
+
+class RasterLayer(Layer):
+    """
+    A grid of values (see grid.open_grid) colored on a ColorRamp (or a
+    ColorMap to build one from) from vmin to vmax, by default the range of
+    the values shown. Missing values are transparent. The grid is not
+    reprojected: its extent is in the coordinates of the map, i.e. in the
+    projected coordinates if the map has a projection.
+    Only the window of the grid within Map.adjusted_bbox() is read. It is
+    averaged over blocks of cells not larger than an output pixel, and
+    written as a single indexed PNG image covering the map frame. dpi is
+    the resolution of the image in the SVG output, the raster output uses
+    the resolution of the canvas.
+    """
+    def __init__(self, name, datasource, bbox=None, nodata=None, colors=None, 
+        vmin=None, vmax=None, opacity=1, dpi=72):
+        Layer.__init__(self, name)
+        self.datasource = datasource
+        self.grid = open_grid(datasource, bbox, nodata)
+        if colors is None:
+            colors = colormaps.get('ylgnbu9')
+        if not isinstance(colors, ColorRamp):
+            colors = ColorRamp(colors)
+        self.ramp = colors
+        self.vmin = vmin
+        self.vmax = vmax
+        self.opacity = opacity
+        self.dpi = dpi
+        self._values = LRUCache(LAYER_CACHE_SIZE)
+    
+    def values(self, map_container, dpi=72):
+        """
+        Returns the pixel (x0, y0) of the upper left corner of the map frame
+        at the given resolution, and the values of the pixels of the frame,
+        NaN outside of the grid. Computed once per frame and resolution.
+        """
+        m = map_container
+        bb = m.adjusted_bbox()
+        key = (tuple(bb), m.x, m.y, m.width, m.height, dpi)
+        v = self._values.get(key)
+        if v is not None: return v
+        x0, y0 = mm_to_px_int(m.x, dpi), mm_to_px_int(m.y, dpi)
+        x1 = mm_to_px_int(m.x + m.width, dpi)
+        y1 = mm_to_px_int(m.y + m.height, dpi)
+        values = np.empty((y1 - y0, x1 - x0), dtype=np.float64)
+        values.fill(np.nan)
+        grid = self.grid
+        window = grid.window(bb)
+        if window is not None:
+            r0, r1, c0, c1 = window
+            dx, dy = grid.cell_size
+            # Blocks of cells not larger than a pixel (nor than the window,
+            # for grids smaller than a pixel), aligned on the grid
+            pixel = (bb[2] - bb[0]) / m.width * px_to_mm(1., dpi)
+            fx = max(1, min(int(pixel / dx), c1 - c0))
+            fy = max(1, min(int(pixel / dy), r1 - r0))
+            r0 -= r0 % fy
+            c0 -= c0 % fx
+            blocks = grid.block_average(r0, r1, c0, c1, fy, fx)
+            # The block containing the center of every pixel
+            xs = px_to_mm(np.arange(x0, x1) + 0.5, dpi)
+            ys = px_to_mm(np.arange(y0, y1) + 0.5, dpi)
+            xs = bb[0] + (xs - m.x) / m.width * (bb[2] - bb[0])
+            ys = bb[3] - (ys - m.y) / m.height * (bb[3] - bb[1])
+            bx = np.floor((xs - grid.bbox[0]) / (dx * fx)).astype(np.int64) - c0 // fx
+            by = np.floor((grid.bbox[3] - ys) / (dy * fy)).astype(np.int64) - r0 // fy
+            cols = (bx >= 0) & (bx < blocks.shape[1])
+            rows = (by >= 0) & (by < blocks.shape[0])
+            values[np.ix_(rows, cols)] = blocks[np.ix_(by[rows], bx[cols])]
+        v = (x0, y0, values)
+        self._values.put(key, v)
+        return v
+    
+    def palette_image(self, values):
+        """
+        Returns the palette indices of the values, and the palette, a
+        (n, 4) uint8 RGBA array of at most 255 colors of the ramp and a
+        transparent color for the missing values.
+        """
+        valid = np.isfinite(values)
+        vmin, vmax = self.vmin, self.vmax
+        if valid.any():
+            if vmin is None: vmin = values[valid].min()
+            if vmax is None: vmax = values[valid].max()
+        size = len(self.ramp)
+        n = min(size, 255)
+        palette = np.zeros((n + 1, 4), dtype=np.uint8)
+        palette[:n,:3] = self.ramp.lut[np.round(np.arange(n) * (size - 1) / (n - 1.)).astype(np.int64)]
+        palette[:n,3] = int(round(self.opacity * 255))
+        indices = np.empty(values.shape, dtype=np.uint8)
+        indices.fill(n)
+        if valid.any():
+            idx = self.ramp.indices(values[valid], vmin, vmax)
+            indices[valid] = np.round(idx * (n - 1) / (size - 1.))
+        return indices, palette
+    
+    def draw_content(self, elem, map_container):
+        x0, y0, values = self.values(map_container, self.dpi)
+        if values.size == 0: return
+        h, w = values.shape
+        png = encode_indexed_png(*self.palette_image(values), level=9)
+        elem.addElement(frame_image(x0, y0, w, h, png, self.dpi))
+    
+    def draw_raster(self, canvas, map_container):
+        x0, y0, values = self.values(map_container, canvas.dpi)
+        if values.size == 0: return
+        indices, palette = self.palette_image(values)
+        canvas.composite_image(x0, y0, palette[indices])
+
+
+
+
 class DataTable(object):
     """
     A data table created from a CSV file
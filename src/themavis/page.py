@@ -4,7 +4,8 @@ from pysvg.shape import rect
 from pysvg.structure import svg, g, clipPath, defs
 
 from container import Container
-from utils import mm_to_px, random_string
+from raster import Canvas
+from utils import mm_to_px, mm_to_px_int, random_string
 
 
 class Page(object):
@@ -28,9 +29,11 @@ class Page(object):
         self.width = width
         self.height = height
     
-    def write(self, path):
+    def write(self, path, compresslevel=None):
         """
         Writes the page to the SVG file with the provided path.
+        If the path ends with .svgz or a compresslevel (1-9) is given, the
+        output is gzip compressed while it is written.
         """
         # Create a new SVG document
         doc = svg(
@@ -49,6 +52,7 @@ class Page(object):
         contour_group.setAttribute('id', 'contours')
         my_defs = defs()
         for c in self.containers:
+            if c.has_content: c.draw_defs(my_defs)
             if c.has_background: c.draw_background(background_group)
             if c.needs_clipping and (c.has_content or c.has_labels):
                 path_id = random_string(16)
@@ -82,5 +86,29 @@ class Page(object):
         doc.addElement(label_group)
         doc.addElement(contour_group)
         # Write the SVG document to the file
-        doc.save(path)
+        doc.save(path, compresslevel=compresslevel)
     
+    def write_png(self, path, dpi=72, supersample=4, background=(255,255,255), level=6):
+        """
+        Renders the page directly to a PNG file, without going through SVG.
+        Container backgrounds, contours and the polygons of vector layers are
+        rasterized; text is not. supersample is the number of samples per
+        pixel along each axis used for antialiasing (1 disables it), level
+        the zlib compression level.
+        """
+        canvas = Canvas(
+            mm_to_px_int(self.width, dpi), mm_to_px_int(self.height, dpi),
+            dpi=dpi, supersample=supersample, background=background
+        )
+        # Same drawing order as in the SVG output
+        for c in self.containers:
+            if c.has_background: c.draw_raster_background(canvas)
+        for c in self.containers:
+            if not c.has_content: continue
+            if c.needs_clipping:
+                canvas.set_clip(c.x, c.y, c.width, c.height)
+            c.draw_raster_content(canvas)
+            canvas.reset_clip()
+        for c in self.containers:
+            if c.has_contour: c.draw_raster_contour(canvas)
+        canvas.write_png(path, level)
@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+"""
+Map projections working on NumPy arrays of geographic coordinates.
+All projections are on a sphere, and return coordinates in meters.
+"""
+
+import numpy as np
+
+from clip import clip_polygons, clip_lines, _repack
+
+
+EARTH_RADIUS = 6371008.8
+
+# Step in degrees for the vertices added along the seam and the poles
+SEAM_STEP = 1.
+
+
+class Projection(object):
+    """
+    Base class of all projections. Subclasses implement forward(), which
+    projects longitude and latitude arrays in radians. Projections with 
+    has_seam are cut along the meridian opposite to lon0.
+    """
+    has_seam = True
+
+    def __init__(self, *params):
+        self.params = params
+        self.lon0 = 0.
+
+    def key(self):
+        """
+        Returns a hashable key identifying the projection and its parameters,
+        used for caching projected coordinates.
+        """
+        return (self.__class__.__name__,) + tuple(self.params)
+
+    def project_array(self, coords):
+        """
+        Projects a (n, 2) array of longitude / latitude in degrees.
+        Returns a (n, 2) array in meters. Points that cannot be projected
+        are NaN.
+        """
+        coords = np.asarray(coords, dtype=np.float64)
+        out = np.empty(coords.shape, dtype=np.float64)
+        if len(coords) == 0: return out
+        lon = np.radians(coords[:,0])
+        lat = np.radians(np.clip(coords[:,1], -90, 90))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x, y = self.forward(lon, lat)
+        out[:,0] = x
+        out[:,1] = y
+        out[~np.isfinite(out)] = np.nan
+        return out
+
+    def project_packed(self, packed):
+        """
+        Projects packed geometries (see geometry.PackedGeometries). Rings
+        and lines crossing the seam are split first.
+        """
+        if self.has_seam:
+            packed = split_at_seam(packed, np.degrees(self.lon0))
+        return packed.with_coords(self.project_array(packed.coords))
+
+    def forward(self, lon, lat):
+        raise NotImplementedError()
+
+    def __repr__(self):
+        return '%s%r' % (self.__class__.__name__, tuple(self.params))
+
+
+
+
+class Mercator(Projection):
+    """
+    The spherical Mercator projection. Latitudes are limited to max_lat.
+    """
+    def __init__(self, lon0=0, max_lat=85.0511287798):
+        Projection.__init__(self, lon0, max_lat)
+        self.lon0 = np.radians(lon0)
+        self.max_lat = np.radians(max_lat)
+
+    def forward(self, lon, lat):
+        lat = np.clip(lat, -self.max_lat, self.max_lat)
+        x = EARTH_RADIUS * _wrap(lon - self.lon0)
+        y = EARTH_RADIUS * np.log(np.tan(np.pi / 4 + lat / 2))
+        return x, y
+
+
+
+
+class LambertAzimuthalEqualArea(Projection):
+    """
+    The Lambert azimuthal equal-area projection centered on (lon0, lat0).
+    The antipode of the center cannot be projected.
+    """
+    has_seam = False
+
+    def __init__(self, lon0=0, lat0=0):
+        Projection.__init__(self, lon0, lat0)
+        self.lon0 = np.radians(lon0)
+        self.lat0 = np.radians(lat0)
+
+    def forward(self, lon, lat):
+        dlon = lon - self.lon0
+        sin_lat0, cos_lat0 = np.sin(self.lat0), np.cos(self.lat0)
+        sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+        cos_dlon = np.cos(dlon)
+        k = np.sqrt(2 / (1 + sin_lat0 * sin_lat + cos_lat0 * cos_lat * cos_dlon))
+        x = EARTH_RADIUS * k * cos_lat * np.sin(dlon)
+        y = EARTH_RADIUS * k * (cos_lat0 * sin_lat - sin_lat0 * cos_lat * cos_dlon)
+        return x, y
+
+
+
+
+class Albers(Projection):
+    """
+    The Albers equal-area conic projection with standard parallels lat1 and
+    lat2, and origin (lon0, lat0).
+    """
+    def __init__(self, lon0=0, lat0=0, lat1=29.5, lat2=45.5):
+        Projection.__init__(self, lon0, lat0, lat1, lat2)
+        self.lon0 = np.radians(lon0)
+        lat0, lat1, lat2 = np.radians([lat0, lat1, lat2])
+        self.n = (np.sin(lat1) + np.sin(lat2)) / 2
+        if self.n == 0:
+            raise Exception('Error. The standard parallels must not be symmetric to the equator.')
+        self.c = np.cos(lat1) ** 2 + 2 * self.n * np.sin(lat1)
+        self.rho0 = EARTH_RADIUS * np.sqrt(self.c - 2 * self.n * np.sin(lat0)) / self.n
+
+    def forward(self, lon, lat):
+        rho = EARTH_RADIUS * np.sqrt(self.c - 2 * self.n * np.sin(lat)) / self.n
+        theta = self.n * _wrap(lon - self.lon0)
+        return rho * np.sin(theta), self.rho0 - rho * np.cos(theta)
+
+
+
+
+# Robinson's table of parallel lengths (X) and distances from the equator
+# (Y) for every 5 degrees of latitude.
+ROBINSON_X = np.array([
+    1.0000, 0.9986, 0.9954, 0.9900, 0.9822, 0.9730, 0.9600, 0.9427, 0.9216,
+    0.8962, 0.8679, 0.8350, 0.7986, 0.7597, 0.7186, 0.6732, 0.6213, 0.5722,
+    0.5322
+])
+ROBINSON_Y = np.array([
+    0.0000, 0.0620, 0.1240, 0.1860, 0.2480, 0.3100, 0.3720, 0.4340, 0.4958,
+    0.5571, 0.6176, 0.6769, 0.7346, 0.7903, 0.8435, 0.8936, 0.9394, 0.9761,
+    1.0000
+])
+
+class Robinson(Projection):
+    """
+    The Robinson projection, with linear interpolation of Robinson's table.
+    """
+    def __init__(self, lon0=0):
+        Projection.__init__(self, lon0)
+        self.lon0 = np.radians(lon0)
+
+    def forward(self, lon, lat):
+        lat_deg = np.abs(np.degrees(lat))
+        table_lat = np.arange(0, 91, 5)
+        px = np.interp(lat_deg, table_lat, ROBINSON_X)
+        py = np.interp(lat_deg, table_lat, ROBINSON_Y)
+        x = 0.8487 * EARTH_RADIUS * px * _wrap(lon - self.lon0)
+        y = 1.3523 * EARTH_RADIUS * py * np.sign(lat)
+        return x, y
+
+
+
+
+class EqualEarth(Projection):
+    """
+    The Equal Earth projection (Savric, Patterson and Jenny, 2018).
+    """
+    A1, A2, A3, A4 = 1.340264, -0.081106, 0.000893, 0.003796
+
+    def __init__(self, lon0=0):
+        Projection.__init__(self, lon0)
+        self.lon0 = np.radians(lon0)
+
+    def forward(self, lon, lat):
+        A1, A2, A3, A4 = self.A1, self.A2, self.A3, self.A4
+        theta = np.arcsin(np.sqrt(3) / 2 * np.sin(lat))
+        t2 = theta * theta
+        t6 = t2 * t2 * t2
+        x = (2 * np.sqrt(3) * _wrap(lon - self.lon0) * np.cos(theta) /
+            (3 * (9 * A4 * t6 * t2 + 7 * A3 * t6 + 3 * A2 * t2 + A1)))
+        y = theta * (A4 * t6 * t2 + A3 * t6 + A2 * t2 + A1)
+        return EARTH_RADIUS * x, EARTH_RADIUS * y
+
+
+
+def split_at_seam(packed, lon0=0):
+    """
+    Splits the rings and lines of packed geographic geometries that cross
+    the meridian opposite to lon0. Crossing rings are unwrapped into a
+    continuous range of longitudes, rings around a pole are closed along
+    the seam and the pole, and the parts beyond the seam are clipped off
+    and shifted by 360 degrees. The edges along the seam and the poles are
+    densified, as they are curved in many projections. Rings not crossing
+    the seam are left unchanged.
+    """
+    coords = packed.coords
+    n = len(coords)
+    if n == 0 or packed.kind == 'point': return packed
+    closed = packed.kind == 'polygon'
+    ring_offsets = packed.ring_offsets
+    starts, ends = ring_offsets[:-1], ring_offsets[1:]
+    nonempty = ends > starts
+    rel = _wrap_degrees(coords[:,0] - lon0)
+    # Find the edges jumping over the seam
+    nxt = np.arange(1, n + 1)
+    nxt[ends[nonempty] - 1] = starts[nonempty]
+    crossing = np.abs(rel[nxt] - rel) > 180
+    if not closed:
+        crossing[ends[nonempty] - 1] = False
+    ring_ids = packed.ring_ids()
+    crossing_rings = np.flatnonzero(
+        np.bincount(ring_ids[crossing], minlength=packed.nrings) > 0
+    )
+    if len(crossing_rings) == 0: return packed
+    # Unwrap the crossing rings, and make copies shifted by 360 degrees
+    pieces = []
+    for r in crossing_rings:
+        s, e = ring_offsets[r], ring_offsets[r+1]
+        lon, lat = rel[s:e], coords[s:e,1]
+        if closed:
+            # Start after a crossing edge, so that the closing edge crosses
+            # the seam
+            c = np.flatnonzero(crossing[s:e])[0] + 1
+            lon, lat = np.roll(lon, -c), np.roll(lat, -c)
+        u = lon.copy()
+        u[1:] -= 360 * np.cumsum(np.round(np.diff(lon) / 360))
+        ring = np.column_stack((u, lat))
+        if closed:
+            # A ring around a pole does not come back to its start. It is
+            # closed along the seam and the pole.
+            dc = lon[0] - lon[-1]
+            a, b = u[-1], u[-1] + dc - 360 * np.round(dc / 360)
+            turn = b - u[0]
+            if abs(turn) > 180:
+                m = 180 + 360 * np.floor((max(a, b) - 180) / 360)
+                lat_m = lat[-1] + (m - a) / (b - a) * (lat[0] - lat[-1])
+                pole = lat.mean() >= 0 and 90 or -90
+                ring = np.vstack((ring, [
+                    (m, lat_m), (m, pole), (m - turn, pole), (m - turn, lat_m)
+                ]))
+        pieces.append(ring)
+    # Every shifted copy is a feature of its own. Copy i is a copy of
+    # piece i % len(pieces).
+    shifts = (-720, -360, 0, 360, 720)
+    ncopies = len(pieces) * len(shifts)
+    candidates = _repack(
+        np.concatenate([ring + (sh, 0) for sh in shifts for ring in pieces]),
+        [len(ring) for ring in pieces] * len(shifts), np.arange(ncopies),
+        ncopies, packed.kind
+    )
+    rect = (-180, -90, 180, 90)
+    if closed:
+        split = clip_polygons(candidates, rect)
+        # Copies only touching the rectangle are clipped to flat rings
+        keep_ring = split.ring_areas() > 0
+        split = _densify_borders(_repack(split.coords[keep_ring[split.ring_ids()]],
+            np.diff(split.ring_offsets)[keep_ring], split.feature_ids()[keep_ring],
+            split.nfeatures, split.kind))
+    else:
+        split = clip_lines(candidates, rect)
+    split_src = crossing_rings[split.feature_ids() % len(pieces)]
+    # Merge the unchanged and the split rings, ordered by source ring
+    keep = np.ones(packed.nrings, dtype=bool)
+    keep[crossing_rings] = False
+    keep_src = np.flatnonzero(keep)
+    split_coords = split.coords.copy()
+    split_coords[:,0] += lon0
+    all_coords = np.concatenate((coords[keep[ring_ids]], split_coords))
+    all_sizes = np.concatenate((np.diff(ring_offsets)[keep_src], np.diff(split.ring_offsets)))
+    all_src = np.concatenate((keep_src, split_src))
+    order = np.argsort(all_src, kind='mergesort')
+    all_starts = np.cumsum(all_sizes) - all_sizes
+    sizes = all_sizes[order]
+    first = np.cumsum(sizes) - sizes
+    idx = np.repeat(all_starts[order] - first, sizes) + np.arange(sizes.sum())
+    return _repack(all_coords[idx], sizes, packed.feature_ids()[all_src[order]],
+        packed.nfeatures, packed.kind)
+
+
+def _densify_borders(packed, step=SEAM_STEP):
+    """
+    Adds vertices every step degrees to the ring edges along the seam at
+    -180 or 180 degrees, and along the poles.
+    """
+    coords, ring_offsets = packed.coords, packed.ring_offsets
+    n = len(coords)
+    if n == 0: return packed
+    starts, ends = ring_offsets[:-1], ring_offsets[1:]
+    nonempty = ends > starts
+    nxt = np.arange(1, n + 1)
+    nxt[ends[nonempty] - 1] = starts[nonempty]
+    x, y = coords[:,0], coords[:,1]
+    on_seam = (np.abs(x) == 180) & (x[nxt] == x)
+    on_pole = (np.abs(y) == 90) & (y[nxt] == y)
+    extra = np.where(on_seam, np.ceil(np.abs(y[nxt] - y) / step) - 1, 0)
+    extra = np.where(on_pole, np.ceil(np.abs(x[nxt] - x) / step) - 1, extra)
+    extra = np.maximum(extra, 0).astype(np.int64)
+    counts = 1 + extra
+    pos = np.cumsum(counts) - counts
+    out = np.empty((counts.sum(), 2), dtype=np.float64)
+    out[pos] = coords
+    e = np.repeat(np.arange(n), extra)
+    k = np.arange(len(e)) - np.repeat(np.cumsum(extra) - extra, extra) + 1
+    t = (k / (extra[e] + 1.))[:,np.newaxis]
+    out[pos[e] + k] = coords[e] + t * (coords[nxt[e]] - coords[e])
+    sizes = np.bincount(packed.ring_ids(), weights=counts, minlength=packed.nrings)
+    return _repack(out, sizes.astype(np.int64), packed.feature_ids(),
+        packed.nfeatures, packed.kind)
+
+
+def _wrap_degrees(lon):
+    """
+    Wraps longitudes in degrees to [-180, 180).
+    """
+    return (lon + 180) % 360 - 180
+
+
+def _wrap(lon):
+    """
+    Wraps longitudes in radians to [-pi, pi]. Values already in the range
+    are returned unchanged, so that the antimeridian itself is kept. A small
+    tolerance keeps vertices split at the seam on their side.
+    """
+    eps = 1e-9
+    outside = (lon < -np.pi - eps) | (lon > np.pi + eps)
+    if not outside.any(): return lon
+    lon = lon.copy()
+    lon[outside] = (lon[outside] + np.pi) % (2 * np.pi) - np.pi
+    return lon
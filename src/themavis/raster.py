@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+"""
+Direct raster output. Polygons are filled into a NumPy RGBA buffer with a
+vectorized scanline algorithm and the result is encoded as PNG using zlib.
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+from color import parse_color
+from utils import mm_to_px
+
+
+class Canvas(object):
+    """
+    A RGBA raster canvas. Drawing coordinates are in millimeters on the page,
+    like the container coordinates. Colors are stored premultiplied as
+    float32. With supersampling, shapes are rasterized at supersample times
+    the resolution and averaged down, which gives antialiased edges.
+    """
+    def __init__(self, width, height, dpi=72, supersample=4, background=(255,255,255)):
+        """
+        width and height are the size of the canvas in pixels.
+        background is a (r,g,b) tuple, or None for a transparent canvas.
+        """
+        self.width = int(width)
+        self.height = int(height)
+        self.dpi = dpi
+        self.supersample = max(1, int(supersample))
+        self.buffer = np.zeros((self.height, self.width, 4), dtype=np.float32)
+        if background is not None:
+            self.buffer[:,:,:3] = np.array(background[:3], dtype=np.float32) / 255
+            self.buffer[:,:,3] = 1
+        self.reset_clip()
+
+    def set_clip(self, x, y, width, height):
+        """
+        Restricts drawing to the rectangle in millimeters.
+        """
+        self.clip = (
+            max(0, int(round(mm_to_px(x, self.dpi)))),
+            max(0, int(round(mm_to_px(y, self.dpi)))),
+            min(self.width, int(round(mm_to_px(x + width, self.dpi)))),
+            min(self.height, int(round(mm_to_px(y + height, self.dpi))))
+        )
+
+    def reset_clip(self):
+        self.clip = (0, 0, self.width, self.height)
+
+    def paint(self, coords, ring_offsets, style, closed=True):
+        """
+        Fills and strokes the rings according to a SVG style dictionary.
+        coords is a (n, 2) array in millimeters, ring i is
+        coords[ring_offsets[i]:ring_offsets[i+1]]. Open rings (closed=False)
+        are only stroked.
+        """
+        if len(coords) == 0: return
+        opacity = float(style.get('opacity', 1))
+        px = mm_to_px(np.asarray(coords, dtype=np.float64), self.dpi)
+        if closed:
+            fill = parse_color(style.get('fill', 'black'))
+            if fill is not None:
+                self.fill(px, ring_offsets, fill,
+                    opacity * float(style.get('fill-opacity', 1)))
+        stroke = parse_color(style.get('stroke', 'none'))
+        stroke_width = float(style.get('stroke-width', 1))
+        if stroke is not None and stroke_width > 0:
+            # Stroke widths are in SVG user units (72 dpi)
+            self.stroke(px, ring_offsets, stroke, stroke_width * self.dpi / 72.,
+                opacity * float(style.get('stroke-opacity', 1)), closed)
+
+    def fill(self, px, ring_offsets, color, opacity=1, rule='evenodd'):
+        """
+        Fills the rings given in pixel coordinates with the (r,g,b) color.
+        """
+        window, coverage = self.coverage(px, ring_offsets, rule)
+        if window is not None:
+            self.composite(window, coverage, color, opacity)
+
+    def stroke(self, px, ring_offsets, color, width, opacity=1, closed=True):
+        """
+        Strokes the rings given in pixel coordinates. Each segment is turned
+        into a quad with square caps, and the union of the quads is filled.
+        """
+        quads = stroke_quads(px, ring_offsets, width / 2., closed)
+        if len(quads) == 0: return
+        offsets = np.arange(0, len(quads) + 1, 4)
+        self.fill(quads, offsets, color, opacity, rule='nonzero')
+
+    def coverage(self, px, ring_offsets, rule='evenodd'):
+        """
+        Returns the pixel window (x0, y0, x1, y1) covered by the rings and
+        the coverage (0 to 1) of each pixel in the window.
+        """
+        cx0, cy0, cx1, cy1 = self.clip
+        x0 = max(cx0, int(np.floor(px[:,0].min())))
+        y0 = max(cy0, int(np.floor(px[:,1].min())))
+        x1 = min(cx1, int(np.ceil(px[:,0].max())) + 1)
+        y1 = min(cy1, int(np.ceil(px[:,1].max())) + 1)
+        if x0 >= x1 or y0 >= y1:
+            return None, None
+        s = self.supersample
+        w, h = x1 - x0, y1 - y0
+        mask = scanline_mask((px - (x0, y0)) * s, ring_offsets, h*s, w*s, rule)
+        if s == 1:
+            return (x0, y0, x1, y1), mask.astype(np.float32)
+        cov = mask.reshape(h, s, w, s).sum(axis=3, dtype=np.float32).sum(axis=1)
+        return (x0, y0, x1, y1), cov / (s * s)
+
+    def composite(self, window, coverage, color, opacity=1):
+        """
+        Composites a color with the given pixel coverage over the window.
+        """
+        x0, y0, x1, y1 = window
+        alpha = (coverage * opacity)[:,:,np.newaxis]
+        src = np.array([color[0], color[1], color[2], 255], dtype=np.float32) / 255
+        view = self.buffer[y0:y1, x0:x1]
+        view *= 1 - alpha
+        view += alpha * src
+
+    def composite_image(self, x0, y0, rgba, opacity=1):
+        """
+        Composites a (height, width, 4) uint8 RGBA image over the canvas,
+        with its upper left pixel at (x0, y0). The image is cut to the clip
+        rectangle.
+        """
+        cx0, cy0, cx1, cy1 = self.clip
+        h, w = rgba.shape[:2]
+        x1, y1 = min(cx1, x0 + w), min(cy1, y0 + h)
+        ix0, iy0 = max(cx0, x0), max(cy0, y0)
+        if ix0 >= x1 or iy0 >= y1: return
+        src = rgba[iy0-y0:y1-y0, ix0-x0:x1-x0].astype(np.float32) / 255
+        alpha = src[:,:,3:] * opacity
+        view = self.buffer[iy0:y1, ix0:x1]
+        view *= 1 - alpha
+        view[:,:,:3] += alpha * src[:,:,:3]
+        view[:,:,3:] += alpha
+
+    def to_rgba(self):
+        """
+        Returns the canvas as a (height, width, 4) uint8 RGBA array.
+        """
+        alpha = self.buffer[:,:,3:]
+        rgb = self.buffer[:,:,:3] / np.where(alpha > 0, alpha, 1)
+        out = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        out[:,:,:3] = np.clip(np.round(rgb * 255), 0, 255)
+        out[:,:,3] = np.clip(np.round(alpha[:,:,0] * 255), 0, 255)
+        return out
+
+    def write_png(self, path, level=6):
+        f = open(path, 'wb')
+        f.write(encode_png(self.to_rgba(), level))
+        f.close()
+
+
+
+def scanline_mask(px, ring_offsets, height, width, rule='evenodd'):
+    """
+    Rasterizes the closed rings into a boolean (height, width) mask. A pixel
+    is set if its center is inside according to the fill rule ('evenodd' or
+    'nonzero').
+    The crossings of all edges with all scanlines are computed at once and
+    sorted by row and x. Consecutive crossings delimit the spans, which are
+    accumulated with a difference array.
+    """
+    mask = np.zeros((height, width), dtype=bool)
+    ring_offsets = np.asarray(ring_offsets)
+    starts, ends = ring_offsets[:-1], ring_offsets[1:]
+    nonempty = ends > starts
+    starts, ends = starts[nonempty], ends[nonempty]
+    n = len(px)
+    if n == 0 or len(starts) == 0: return mask
+    # Edge i goes from vertex i to the next vertex of the same ring
+    nxt = np.arange(1, n + 1)
+    nxt[ends - 1] = starts
+    x0, y0 = px[:,0], px[:,1]
+    x1, y1 = x0[nxt], y0[nxt]
+    # Rows whose pixel center y+0.5 lies in [ymin, ymax)
+    r0 = np.clip(np.ceil(np.minimum(y0, y1) - 0.5), 0, height).astype(np.int64)
+    r1 = np.clip(np.ceil(np.maximum(y0, y1) - 0.5), 0, height).astype(np.int64)
+    counts = r1 - r0
+    ncross = counts.sum()
+    if ncross == 0: return mask
+    e = np.repeat(np.arange(n), counts)
+    first = np.cumsum(counts) - counts
+    rows = r0[e] + (np.arange(ncross) - np.repeat(first, counts))
+    t = (rows + 0.5 - y0[e]) / (y1[e] - y0[e])
+    xs = x0[e] + t * (x1[e] - x0[e])
+    order = np.lexsort((xs, rows))
+    rows, xs = rows[order], xs[order]
+    # Every row has an even number of crossings and a winding sum of zero,
+    # so a global parity or cumulative winding number is correct per row.
+    if rule == 'nonzero':
+        winding = np.where(y1[e] > y0[e], 1, -1)[order]
+        inside = np.cumsum(winding)[:-1] != 0
+    else:
+        inside = (np.arange(ncross - 1) % 2) == 0
+    k = np.flatnonzero(inside)
+    ca = np.clip(np.ceil(xs[k] - 0.5), 0, width).astype(np.int64)
+    cb = np.clip(np.ceil(xs[k+1] - 0.5), 0, width).astype(np.int64)
+    keep = cb > ca
+    rr, ca, cb = rows[k][keep], ca[keep], cb[keep]
+    size = height * (width + 1)
+    acc = np.bincount(rr * (width + 1) + ca, minlength=size)
+    acc -= np.bincount(rr * (width + 1) + cb, minlength=size)
+    mask[:] = np.cumsum(acc.reshape(height, width + 1)[:,:width], axis=1) > 0
+    return mask
+
+
+def stroke_quads(px, ring_offsets, half_width, closed=True):
+    """
+    Returns the (4*m, 2) vertices of one quad per non-degenerate segment of
+    the rings, extended by half_width at both ends. All quads have the same
+    orientation, so their union is obtained with the nonzero fill rule.
+    """
+    ring_offsets = np.asarray(ring_offsets)
+    starts, ends = ring_offsets[:-1], ring_offsets[1:]
+    nonempty = ends > starts
+    starts, ends = starts[nonempty], ends[nonempty]
+    n = len(px)
+    if n == 0 or len(starts) == 0: return np.empty((0, 2))
+    nxt = np.arange(1, n + 1)
+    nxt[ends - 1] = starts
+    valid = np.ones(n, dtype=bool)
+    if not closed:
+        valid[ends - 1] = False
+    p0 = px[valid]
+    p1 = px[nxt[valid]]
+    d = p1 - p0
+    length = np.hypot(d[:,0], d[:,1])
+    keep = length > 0
+    p0, p1, d, length = p0[keep], p1[keep], d[keep], length[keep]
+    t = d / length[:,np.newaxis] * half_width
+    nrm = np.column_stack((-t[:,1], t[:,0]))
+    a, b = p0 - t, p1 + t
+    quads = np.empty((len(p0), 4, 2), dtype=np.float64)
+    quads[:,0] = a + nrm
+    quads[:,1] = b + nrm
+    quads[:,2] = b - nrm
+    quads[:,3] = a - nrm
+    return quads.reshape(-1, 2)
+
+
+def _png_chunk(tag, data):
+    """
+    Returns a PNG chunk with its length and checksum.
+    """
+    crc = zlib.crc32(tag + data) & 0xffffffff
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', crc)
+
+
+def encode_png(rgba, level=6):
+    """
+    Encodes a (height, width, 4) uint8 array as a RGBA PNG image and returns
+    the file content.
+    """
+    height, width = rgba.shape[:2]
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)    # Filter 0
+    raw[:,1:] = rgba.reshape(height, width * 4)
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)),
+        _png_chunk(b'IDAT', zlib.compress(raw.tostring(), level)),
+        _png_chunk(b'IEND', b''),
+    ])
+
+
+def encode_indexed_png(indices, palette, level=6):
+    """
+    Encodes a (height, width) array of indices into a palette of at most
+    256 RGBA colors, a (n, 4) uint8 array, as an indexed PNG image and
+    returns the file content. Images colored through a lookup table need
+    a quarter of the raw data of a RGBA image.
+    """
+    palette = np.asarray(palette, dtype=np.uint8)
+    if len(palette) > 256:
+        raise Exception('Error. A PNG palette has at most 256 colors.')
+    height, width = indices.shape
+    raw = np.zeros((height, width + 1), dtype=np.uint8)    # Filter 0
+    raw[:,1:] = indices
+    chunks = [
+        b'\x89PNG\r\n\x1a\n',
+        _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 3, 0, 0, 0)),
+        _png_chunk(b'PLTE', palette[:,:3].tostring()),
+    ]
+    # Trailing opaque entries can be left out of the transparency chunk
+    alpha = palette[:,3]
+    translucent = np.flatnonzero(alpha < 255)
+    if len(translucent):
+        chunks.append(_png_chunk(b'tRNS', alpha[:translucent[-1]+1].tostring()))
+    chunks.append(_png_chunk(b'IDAT', zlib.compress(raw.tostring(), level)))
+    chunks.append(_png_chunk(b'IEND', b''))
+    return b''.join(chunks)
@@ -1,6 +1,93 @@
-from math import modf, floor
- 
- 
+import numpy as np
+
+from utils import LRUCache
+
+
+# Parameters (a, b, c, d) of the Hyndman and Fan quantile types 1 to 9
+HF_PARAMETERS = [
+    (0,   0, 1, 0), # inverse empirical distrib.function., R type 1
+    (0.5, 0, 1, 0), # similar to type 1, averaged, R type 2
+    (0.5, 0, 0, 0), # nearest order statistic,(SAS) R type 3
+    (0,   0, 0, 1), # California linear interpolation, R type 4
+    (0.5, 0, 0, 1), # hydrologists method, R type 5
+    (0,   1, 0, 1), # mean-based estimate(Weibull method), (SPSS,Minitab), type 6 
+    (1,  -1, 0, 1), # mode-based method,(S, S-Plus), R type 7
+    (1.0/3, 1.0/3, 0, 1), # median-unbiased ,  R type 8
+    (3/8.0, 0.25, 0, 1)   # normal-unbiased, R type 9.
+]
+
+# Up to this number of order statistics, they are selected with a partial
+# sort instead of sorting the whole array
+PARTITION_MAX = 16
+
+
+def attribute_value(feature, attr):
+    """
+    Returns the value of an attribute of a feature as float. Missing and
+    non-numeric values are NaN.
+    """
+    try:
+        return float(feature['properties'][attr])
+    except (KeyError, TypeError, ValueError):
+        return np.nan
+
+
+def attribute_values(features, attr):
+    """
+    Returns the values of an attribute for a list of features as float64
+    array (see attribute_value).
+    """
+    values = np.empty(len(features), dtype=np.float64)
+    for i in range(len(features)):
+        values[i] = attribute_value(features[i], attr)
+    return values
+
+
+def quantiles(x, q, qtype=7, issorted=False):
+    """
+    Args:
+       x - input data
+       q - sequence of probabilities
+       qtype - algorithm (Hyndman and Fan type 1 to 9)
+       issorted - True if x already sorted.
+    
+    Computes the quantiles of x for all probabilities in q at once, and
+    returns them as array. NaN values in x must be removed beforehand.
+    The data is sorted only once, or partially sorted with np.partition
+    if only a few order statistics are needed.
+    """
+    if not (1 <= qtype <= 9):
+        raise Exception('Error. Unknown quantile type %s.' % qtype)
+    x = np.asarray(x, dtype=np.float64).ravel()
+    q = np.asarray(q, dtype=np.float64).ravel()
+    n = len(x)
+    if n == 0:
+        out = np.empty(len(q))
+        out.fill(np.nan)
+        return out
+    a, b, c, d = HF_PARAMETERS[qtype-1]
+    h = a + (n+b) * q - 1
+    j = np.floor(h)
+    g = h - j
+    j = j.astype(np.int64)
+    lo = np.clip(j, 0, n-1)
+    hi = np.clip(j+1, 0, n-1)
+    if issorted:
+        y = x
+    else:
+        kth = np.unique(np.concatenate((lo, hi)))
+        if len(kth) <= PARTITION_MAX:
+            y = np.partition(x, kth)
+        else:
+            y = np.sort(x)
+    ylo, yhi = y[lo], y[hi]
+    out = np.where(g == 0, ylo, ylo + (yhi - ylo) * (c + d * g))
+    # Out of range probabilities give the extreme values
+    out[j < 0] = y[0]
+    out[j >= n] = y[n-1]
+    return out
+
+
 def quantile(x, q,  qtype=7, issorted=False):
     """
     Args:
@@ -19,36 +106,166 @@ def quantile(x, q,  qtype=7, issorted=False):
     Ernesto P.Adorio Ph.D.
     UP Extension Program in Pampanga, Clark Field.
     """
-    if not issorted:
-        y = sorted(x)
-    else:
-        y = x
     if not (1 <= qtype <= 9): 
        return None  # error!
+    return quantiles(x, [q], qtype, issorted)[0]
+
+
+
+class KLLSketch(object):
+    """
+    A mergeable sketch of the distribution of a stream of values, after
+    Karnin, Lang and Liberty, "Optimal Quantile Approximation in Streams"
+    (2016). The memory use is O(k) values whatever the length of the
+    stream.
     
-    # Parameters for the Hyndman and Fan algorithm
-    abcd = [(0,   0, 1, 0), # inverse empirical distrib.function., R type 1
-            (0.5, 0, 1, 0), # similar to type 1, averaged, R type 2
-            (0.5, 0, 0, 0), # nearest order statistic,(SAS) R type 3
-            (0,   0, 0, 1), # California linear interpolation, R type 4
-            (0.5, 0, 0, 1), # hydrologists method, R type 5
-            (0,   1, 0, 1), # mean-based estimate(Weibull method), (SPSS,Minitab), type 6 
-            (1,  -1, 0, 1), # mode-based method,(S, S-Plus), R type 7
-            (1.0/3, 1.0/3, 0, 1), # median-unbiased ,  R type 8
-            (3/8.0, 0.25, 0, 1)   # normal-unbiased, R type 9.
-           ]
-    
-    a, b, c, d = abcd[qtype-1]
-    n = len(x)
-    g, j = modf( a + (n+b) * q -1)
-    if j < 0:
-        return y[0]
-    elif j >= n:           
-        return y[n-1]   # oct. 8, 2010 y[n]???!! uncaught  off by 1 error!!!
-    
-    j = int(floor(j))
-    if g ==  0:
-       return y[j]
-    else:
-       return y[j] + (y[j+1]- y[j])* (c + d * g)
+    The values are kept in levels, a value of level h standing for 2**h
+    values of the stream. A full level is sorted and every other value is
+    moved to the next level (a compaction). The capacity of the levels
+    decreases geometrically from the top level down.
+    
+    Error bound: the rank of a quantile returned by the sketch differs
+    from the requested rank by at most about 1.65% of the number of values
+    for k=200, with 99% probability. The error decreases proportionally
+    to 1/k. The minimum and maximum are exact.
+    """
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self.rnd = np.random.RandomState(seed)
+    
+    def capacity(self, h):
+        depth = len(self.levels) - 1 - h
+        return max(2, int(np.ceil(self.k * (2/3.) ** depth)))
+    
+    def update(self, values):
+        """
+        Adds an array of values to the sketch. NaN values are ignored.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if len(values) == 0: return
+        self.n += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self.compress()
+    
+    def merge(self, other):
+        """
+        Adds the values summarized by another sketch to this one.
+        """
+        if other.n == 0: return
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h in range(len(other.levels)):
+            self.levels[h] = np.concatenate((self.levels[h], other.levels[h]))
+        self.compress()
+    
+    def compress(self):
+        # Compact the lowest full level until the sketch fits its capacity
+        while sum([len(l) for l in self.levels]) > sum([self.capacity(h) for h in range(len(self.levels))]):
+            h = 0
+            while len(self.levels[h]) < self.capacity(h):
+                h += 1
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            level = np.sort(self.levels[h])
+            # With an odd number of values, the first one stays
+            keep = len(level) % 2
+            offset = self.rnd.randint(2)
+            self.levels[h] = level[:keep]
+            self.levels[h+1] = np.concatenate((self.levels[h+1], level[keep+offset::2]))
+    
+    def weighted_values(self):
+        """
+        Returns the sorted values of the sketch and their weights.
+        """
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.repeat(2.**h, len(l)) for h, l in enumerate(self.levels)
+        ])
+        order = np.argsort(values, kind='mergesort')
+        return values[order], weights[order]
+    
+    def quantiles(self, q):
+        """
+        Returns the approximate quantiles of the values for the sequence
+        of probabilities q. The probabilities 0 and 1 give the minimum and
+        maximum.
+        """
+        q = np.asarray(q, dtype=np.float64).ravel()
+        out = np.empty(len(q))
+        out.fill(np.nan)
+        if self.n == 0: return out
+        values, weights = self.weighted_values()
+        cum = np.cumsum(weights)
+        i = np.searchsorted(cum, q * cum[-1], side='left')
+        out = values[np.clip(i, 0, len(values) - 1)]
+        out[q <= 0] = self.min
+        out[q >= 1] = self.max
+        return out
+    
+    def rank(self, value):
+        """
+        Returns the approximate fraction of the values smaller than value.
+        """
+        if self.n == 0: return np.nan
+        values, weights = self.weighted_values()
+        return weights[values < value].sum() / weights.sum()
+    
+    def __len__(self):
+        return sum([len(l) for l in self.levels])
+
+
+
+class AttributeStatistics(object):
+    """
+    Statistics of the numeric values of an attribute: count, min, max, the
+    sorted values, and sketches of them. Statistics of streamed data may
+    only have a sketch and no sorted values.
+    """
+    def __init__(self, values=None, sketch=None):
+        self.sketches = {}
+        if values is not None:
+            values = np.asarray(values, dtype=np.float64).ravel()
+            self.sorted_values = np.sort(values[np.isfinite(values)])
+            self.count = len(self.sorted_values)
+            self.min = self.sorted_values[0] if self.count else np.nan
+            self.max = self.sorted_values[-1] if self.count else np.nan
+        else:
+            self.sorted_values = None
+            self.count = sketch.n
+            self.min = sketch.min if sketch.n else np.nan
+            self.max = sketch.max if sketch.n else np.nan
+            self.sketches[sketch.k] = sketch
+    
+    def sketch(self, k=200):
+        """
+        Returns a KLLSketch of the values. Computed once for every k.
+        """
+        s = self.sketches.get(k)
+        if s is None:
+            s = self.sketches[k] = KLLSketch(k)
+            s.update(self.sorted_values)
+        return s
+    
+    def quantiles(self, q, qtype=7):
+        """
+        Returns the quantiles of the values, or the approximate quantiles
+        of the sketch if there are no sorted values.
+        """
+        if self.sorted_values is None:
+            return self.sketches.values()[0].quantiles(q)
+        return quantiles(self.sorted_values, q, qtype, issorted=True)
+
 
+# Statistics shared by all layers and styles, with keys (data key, attribute).
+# See layer.VectorLayer.statistics.
+statistics_cache = LRUCache(64)
@@ -3,14 +3,21 @@
 from pysvg.builders import StyleBuilder
 from pysvg.shape import rect, line
 from pysvg.text import text
+from bisect import bisect_right
 from copy import deepcopy
 
-from color import Color
-from stats import quantile
+from color import Color, ColorRamp
+from stats import AttributeStatistics, KLLSketch, attribute_value, attribute_values, quantiles
+from textmetrics import font_size
 from utils import mm_to_px
 
 import numpy as np
-import re
+
+
+# Number of values collected before they are added to a sketch
+SKETCH_BUFFER = 4096
+# Number of quantiles of a sketch given to the classifiers
+SKETCH_SAMPLE = 1001
 
 
 class SimpleSurfaceStyle(object):
@@ -32,11 +39,30 @@ class SimpleSurfaceStyle(object):
         """
         Styles the provided feature.
         """
-        elem.set_style(self.style.getStyle())
+        elem.set_style(self.style_for_feature(feature).getStyle())
+    
+    def style_for_feature(self, feature):
+        """
+        Returns the StyleBuilder for the provided feature.
+        """
+        return self.style
+    
+    def styles_for_features(self, features):
+        """
+        Returns the StyleBuilder of every feature of a list.
+        """
+        return [self.style_for_feature(f) for f in features]
     
     def needs_statistics(self):
         return False
     
+    def statistics_attribute(self):
+        """
+        Returns the attribute of the statistics if the style only needs
+        statistics of a single attribute (see set_statistics), or None.
+        """
+        return None
+    
     def init_statistics(self):
         pass
     
@@ -52,6 +78,26 @@ class SimpleSurfaceStyle(object):
 
 
 
+class SimpleLineStyle(SimpleSurfaceStyle):
+    """
+    A simple style for lines. Lines are only stroked, never filled.
+    """
+    def __init__(self, style=None):
+        # Provide a default style if none is specified
+        if style == None:
+            style = {
+                'stroke': 'black',
+                'stroke-width': 0.5,
+                'stroke-linejoin': 'round',
+                'stroke-linecap': 'round'
+            }
+        style = dict(style)
+        style['fill'] = 'none'
+        self.style = StyleBuilder(style)
+
+
+
+
 class DiscreteSurfaceStyle(SimpleSurfaceStyle):
     """
     Chooses a discrete color for a feature based on the value of an
@@ -74,31 +120,45 @@ class DiscreteSurfaceStyle(SimpleSurfaceStyle):
             self.styles[val] = StyleBuilder(deepcopy(style))
         
         
-    def style_feature(self, feature, elem):
+    def style_for_feature(self, feature):
         """
-        Styles the provided feature.
+        Returns the StyleBuilder for the provided feature.
         """
         v = feature['properties'][self.attr]
         try: 
             v = int(v)
         except: 
             v = str(v)
-        elem.set_style(self.styles.get(v, self.default_style).getStyle())
+        return self.styles.get(v, self.default_style)
 
 
 
 
-class QuantileSurfaceStyle(SimpleSurfaceStyle):
+class ClassedSurfaceStyle(SimpleSurfaceStyle):
     """
-    Chooses a discrete color for a feature based on the quantiles.
-    For n colors, we need to have n-1 quantile limits.
+    Chooses a discrete color for a feature based on class limits computed
+    from the values of an attribute. The classifier is called with the
+    array of values and the number of colors n, and returns n-1 limits,
+    e.g. one of the functions of themavis.classify.
+    With a sketch_size, the values are summarized in a stats.KLLSketch of
+    this size instead of being kept in memory, and the classifier gets
+    SKETCH_SAMPLE evenly spaced quantiles of the sketch as values.
+    The colors, the classifier and the sketch size may be changed between
+    two drawings, the styles and limits are updated by set_statistics.
+    Statistics given to set_statistics or merged (see merge_statistics)
+    are kept, and the layers skip the statistics pass of the style, until
+    fixed_statistics is set to False.
     """
-    def __init__(self, attr, colors, quantiles, default_color=Color((220,220,220)), style=None):
+    def __init__(self, attr, colors, classifier, default_color=Color((220,220,220)), style=None, sketch_size=None):
         # Store the attributes
         self.attr = attr
         self.colors = colors
-        self.quantiles = np.array(quantiles)
-        self.quantiles.sort()
+        self.classifier = classifier
+        self.sketch_size = sketch_size
+        self.sketch = None
+        self.statistics = None
+        self.fixed_statistics = False
+        self.limits_key = None
         self.mark_style = {'fill': 'none', 'stroke-width': 0.25, 'stroke': 'black'}
         self.mark_length = 1
         self.ndecimals = 4
@@ -109,51 +169,124 @@ class QuantileSurfaceStyle(SimpleSurfaceStyle):
                 'stroke': 'black',
                 'stroke-width': 0.3,
             }
-        style['fill'] = default_color.hex
-        self.default_style = StyleBuilder(deepcopy(style))
+        self.base_style = dict(style)
+        self.base_style['fill'] = default_color.hex
+        self.default_style = StyleBuilder(deepcopy(self.base_style))
+        self.update_styles()
+    
+    def update_styles(self):
+        """
+        Creates the StyleBuilder of every color, unless the colors did
+        not change.
+        """
+        if getattr(self, 'styled_colors', None) is self.colors: return
         self.styles = []
         for c in self.colors.colors:
+            style = deepcopy(self.base_style)
             style['fill'] = c.hex
-            self.styles.append(StyleBuilder(deepcopy(style)))
+            self.styles.append(StyleBuilder(style))
+        self.styled_colors = self.colors
     
-    def style_feature(self, feature, elem):
+    def style_for_feature(self, feature):
         """
-        Styles the provided feature.
+        Returns the StyleBuilder for the provided feature.
         """
-        v = feature['properties'][self.attr]
-        if v == None:
-            elem.set_style(self.default_style.getStyle())
-            return
-        for i in range(len(self.limits)):
-            l = self.limits[i]
-            if v < l:
-                elem.set_style(self.styles[i].getStyle())
-                return
-        elem.set_style(self.styles[i+1].getStyle())
+        v = attribute_value(feature, self.attr)
+        if np.isnan(v):
+            return self.default_style
+        return self.styles[bisect_right(self.limits, v)]
     
     def needs_statistics(self):
-        return True
+        return not self.fixed_statistics
+    
+    def statistics_attribute(self):
+        # With a sketch, the values are streamed through the statistics
+        # pass instead of being kept in the shared statistics
+        if self.sketch_size is not None: return None
+        return self.attr
     
     def init_statistics(self):
         self.values = []
+        if self.sketch_size is not None:
+            self.sketch = KLLSketch(self.sketch_size)
     
     def update_statistics(self, feat):
-        if feat['properties'][self.attr] != None:
-            self.values.append(feat['properties'][self.attr])
+        v = attribute_value(feat, self.attr)
+        if not np.isnan(v):
+            self.values.append(v)
+            # Only a small buffer is kept when using a sketch
+            if self.sketch is not None and len(self.values) >= SKETCH_BUFFER:
+                self.sketch.update(self.values)
+                self.values = []
+    
+    def merge_statistics(self, other):
+        """
+        Merges the statistics of another style of the same type, e.g. of
+        another layer with a part of the data, into the statistics of this
+        style, and fixes them (see set_statistics). Both styles must have
+        statistics, and either both use a sketch, or none of them does.
+        """
+        if self.statistics is None or other.statistics is None:
+            raise Exception('Error. Both styles need statistics for merging them.')
+        if (self.sketch_size is None) != (other.sketch_size is None):
+            raise Exception('Error. Cannot merge the statistics of a style with a sketch and one without.')
+        if self.sketch_size is None:
+            statistics = AttributeStatistics(np.concatenate((
+                self.statistics.sorted_values, other.statistics.sorted_values
+            )))
+        else:
+            sketch = KLLSketch(self.sketch_size)
+            sketch.merge(self.statistics.sketch(self.sketch_size))
+            sketch.merge(other.statistics.sketch(other.sketch_size))
+            statistics = AttributeStatistics(sketch=sketch)
+        self.set_statistics(statistics)
     
     def finalize_statistics(self):
-        self.values = np.array(self.values, dtype=np.float32)
-        self.limits = [np.percentile(self.values, q*100) for q in self.quantiles]
-        self.limits.sort()
+        if self.sketch is not None:
+            self.sketch.update(self.values)
+            statistics = AttributeStatistics(sketch=self.sketch)
+        else:
+            statistics = AttributeStatistics(self.values)
+        self.values = []
+        self.set_statistics(statistics, fixed=False)
+    
+    def set_statistics(self, statistics, fixed=True):
+        """
+        Computes the class limits from the stats.AttributeStatistics of the
+        attribute. Nothing is done if neither the statistics nor the
+        classification (see classification_key) changed. Unless fixed is
+        False (as in the statistics pass of the layers), the statistics
+        are kept for all later drawings.
+        """
+        self.fixed_statistics = fixed
+        self.update_styles()
+        key = (statistics, self.classification_key())
+        if key == self.limits_key: return
+        self.limits_key = key
+        self.statistics = statistics
+        if self.sketch_size is None:
+            values = statistics.sorted_values
+        else:
+            sketch = statistics.sketch(self.sketch_size)
+            values = sketch.quantiles(np.linspace(0, 1, SKETCH_SAMPLE))
+        limits = self.classifier(values, len(self.colors.colors))
+        self.limits = sorted(limits)[:len(self.colors.colors)-1]
+    
+    def classification_key(self):
+        """
+        Returns a tuple of the parameters the class limits depend on,
+        besides the statistics.
+        """
+        return (self.classifier, self.colors, len(self.colors.colors), self.sketch_size)
     
     def legend(self, elem, x, y, width, height, label_style):
-        n = len(self.colors.colors)
+        # Some classifiers return fewer limits than colors, only the
+        # classes in use are shown
+        n = len(self.limits) + 1
         box_height = int(np.floor(float(height) / (n+2)))
         box_width = min(8, width/2)
         mark_style = StyleBuilder(self.mark_style)
-        textsize = int(re.findall('([0-9]+)',
-            label_style.get('font-size', "8")
-        )[0])
+        textsize = font_size(label_style, 8)
         label_x = x + box_width + self.mark_length + 1
         for i in range(n):
             box = rect(
@@ -184,14 +317,14 @@ class QuantileSurfaceStyle(SimpleSurfaceStyle):
                 elem.addElement(label)
          
         label = text(
-            content="Min: %0.*f" % (self.ndecimals, np.min(self.values)), 
+            content="Min: %0.*f" % (self.ndecimals, self.statistics.min), 
             x=mm_to_px(label_x), y=mm_to_px(y+n*box_height)+(textsize/2)
         )
         label.set_style(StyleBuilder(label_style).getStyle())
         elem.addElement(label)
         
         label = text(
-            content="Max: %0.*f" % (self.ndecimals, np.max(self.values)), 
+            content="Max: %0.*f" % (self.ndecimals, self.statistics.max), 
             x=mm_to_px(label_x), y=mm_to_px(y+0*box_height)+(textsize/2)
         )
         label.set_style(StyleBuilder(label_style).getStyle())
@@ -201,6 +334,164 @@ class QuantileSurfaceStyle(SimpleSurfaceStyle):
 
 
 
+class QuantileSurfaceStyle(ClassedSurfaceStyle):
+    """
+    Chooses a discrete color for a feature based on the quantiles.
+    For n colors, we need to have n-1 quantile limits. qtype is the
+    Hyndman and Fan quantile type (see stats.quantiles).
+    """
+    def __init__(self, attr, colors, quantiles, default_color=Color((220,220,220)), style=None, qtype=7, sketch_size=None):
+        self.quantiles = np.array(quantiles)
+        self.quantiles.sort()
+        self.qtype = qtype
+        ClassedSurfaceStyle.__init__(self, attr, colors, self.quantile_limits, 
+            default_color, style, sketch_size)
+    
+    def quantile_limits(self, values, n):
+        q = np.sort(self.quantiles)
+        return list(quantiles(values, q, self.qtype, issorted=True))
+    
+    def classification_key(self):
+        return ClassedSurfaceStyle.classification_key(self) + (
+            tuple(np.sort(self.quantiles).tolist()), self.qtype
+        )
+
+
+
+
+class ContinuousSurfaceStyle(SimpleSurfaceStyle):
+    """
+    Gives every feature the color of its attribute value on a continuous
+    color ramp (color.ColorRamp, or a ColorMap to build one from). vmin
+    and vmax are the values at the ends of the ramp, by default the
+    minimum and maximum of the attribute. Features with the same color
+    share their StyleBuilder.
+    """
+    def __init__(self, attr, ramp, vmin=None, vmax=None, default_color=Color((220,220,220)), style=None):
+        self.attr = attr
+        if not isinstance(ramp, ColorRamp):
+            ramp = ColorRamp(ramp)
+        self.ramp = ramp
+        self.vmin = vmin
+        self.vmax = vmax
+        self.statistics = None
+        self.fixed_statistics = False
+        self.mark_style = {'fill': 'none', 'stroke-width': 0.25, 'stroke': 'black'}
+        self.ndecimals = 4
+        self.legend_steps = 64
+        # Provide a default style if none is specified
+        if style == None:
+            style = {
+                'fill-opacity': 0.7,
+                'stroke': 'black',
+                'stroke-width': 0.3,
+            }
+        self.base_style = dict(style)
+        self.base_style['fill'] = default_color.hex
+        self.default_style = StyleBuilder(deepcopy(self.base_style))
+        # The styles by index in the lookup table of the ramp
+        self.styles = {}
+    
+    def value_range(self):
+        """
+        Returns the values at both ends of the ramp. Without vmin or vmax,
+        the statistics pass (see layer.VectorLayer.update_style_statistics)
+        must have been run.
+        """
+        vmin, vmax = self.vmin, self.vmax
+        if (vmin is None or vmax is None) and self.statistics is None:
+            raise Exception('Error. The statistics of %s are needed for the range of the color ramp, give vmin and vmax or run the statistics pass first.' % self.attr)
+        if vmin is None: vmin = self.statistics.min
+        if vmax is None: vmax = self.statistics.max
+        return vmin, vmax
+    
+    def style_for_index(self, i):
+        if i < 0: return self.default_style
+        builder = self.styles.get(i)
+        if builder is None:
+            style = deepcopy(self.base_style)
+            style['fill'] = self.ramp.hex[i]
+            builder = self.styles[i] = StyleBuilder(style)
+        return builder
+    
+    def style_for_feature(self, feature):
+        """
+        Returns the StyleBuilder for the provided feature.
+        """
+        return self.styles_for_features([feature])[0]
+    
+    def styles_for_features(self, features):
+        """
+        Returns the StyleBuilder of every feature of a list. The colors of
+        all features are looked up at once.
+        """
+        values = attribute_values(features, self.attr)
+        vmin, vmax = self.value_range()
+        idx = self.ramp.indices(values, vmin, vmax)
+        return [self.style_for_index(i) for i in idx.tolist()]
+    
+    def needs_statistics(self):
+        return not self.fixed_statistics
+    
+    def statistics_attribute(self):
+        return self.attr
+    
+    def init_statistics(self):
+        self.values = []
+    
+    def update_statistics(self, feat):
+        v = attribute_value(feat, self.attr)
+        if not np.isnan(v):
+            self.values.append(v)
+    
+    def finalize_statistics(self):
+        self.set_statistics(AttributeStatistics(self.values), fixed=False)
+        self.values = []
+    
+    def set_statistics(self, statistics, fixed=True):
+        """
+        Sets the stats.AttributeStatistics of the attribute. Unless fixed
+        is False, they are kept for all later drawings (see
+        ClassedSurfaceStyle).
+        """
+        self.statistics = statistics
+        self.fixed_statistics = fixed
+    
+    def legend(self, elem, x, y, width, height, label_style):
+        n = self.legend_steps
+        bar_height = float(height) * 0.8
+        step = bar_height / n
+        box_width = min(8, width/2)
+        textsize = font_size(label_style, 8)
+        label_x = x + box_width + 2
+        vmin, vmax = self.value_range()
+        # The ramp from the maximum at the top to the minimum at the bottom
+        for i in range(n):
+            idx = int(round((n-i-0.5) / n * (len(self.ramp) - 1)))
+            box = rect(
+                x = mm_to_px(x), y = mm_to_px(y + i*step),
+                width = mm_to_px(box_width), height = mm_to_px(step)
+            )
+            box.set_style(StyleBuilder({'fill': self.ramp.hex[idx], 'stroke': 'none'}).getStyle())
+            elem.addElement(box)
+        outline = rect(
+            x = mm_to_px(x), y = mm_to_px(y),
+            width = mm_to_px(box_width), height = mm_to_px(bar_height)
+        )
+        outline.set_style(StyleBuilder(self.mark_style).getStyle())
+        elem.addElement(outline)
+        for content, ly in (("Max: %0.*f" % (self.ndecimals, vmax), y), 
+                            ("Min: %0.*f" % (self.ndecimals, vmin), y + bar_height)):
+            label = text(
+                content=content, 
+                x=mm_to_px(label_x), y=mm_to_px(ly)+(textsize/2)
+            )
+            label.set_style(StyleBuilder(label_style).getStyle())
+            elem.addElement(label)
+
+
+
+
 
 
 
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Direct SVG writing of feature geometries, bypassing the pysvg object graph.
+"""
+
+from pysvg.core import BaseElement
+from pysvg.shape import path
+
+
+def vertex_strings(px):
+    """
+    Formats a (n, 2) array of coordinates as one 'x  y' string per vertex,
+    the way pysvg.shape.path formats absolute path commands.
+    """
+    vals = map(repr, px.ravel().tolist())
+    return [x + '  ' + y for x, y in zip(vals[0::2], vals[1::2])]
+
+
+def encode_rings(px, ring_offsets, closed=True):
+    """
+    Returns the path data for the rings in px, a (n, 2) array, where ring i
+    is px[ring_offsets[i]:ring_offsets[i+1]]. This is the same string as
+    obtained with appendMoveToPath, appendLineToPath and appendCloseCurve
+    with absolute coordinates.
+    """
+    vertices = vertex_strings(px)
+    end = closed and ' z' or ' '
+    parts = []
+    for i in range(len(ring_offsets) - 1):
+        vtx = vertices[ring_offsets[i]:ring_offsets[i+1]]
+        parts.append('M ' + ' L '.join(vtx) + end)
+    return ''.join(parts)
+
+
+def path_attribute_order():
+    """
+    Returns the attribute names of a path with path data and style, in the
+    order pysvg writes them.
+    """
+    p = path()
+    p.set_d('')
+    p.set_style('')
+    return list(p._attributes.keys())
+
+
+class PathRecords(BaseElement):
+    """
+    A pseudo element that writes one <path> element per record when the
+    document is serialized, without creating pysvg objects for them.
+    records is an iterable of (path data, style string) tuples, that is
+    consumed lazily while writing. It can be added to any pysvg element, and
+    the output is identical to adding pysvg path elements with the same
+    path data and style.
+    """
+    __slots__ = ('records',)
+
+    def __init__(self, records):
+        BaseElement.__init__(self, 'path')
+        self.records = records
+
+    def iterXML(self):
+        order = path_attribute_order()
+        template = '<path ' + ''.join([k + '="%s" ' for k in order]) + ' />\n'
+        style_first = order[0] == 'style'
+        quoted = {}
+        for d, style in self.records:
+            # Style strings are shared between many records
+            q = quoted.get(style)
+            if q is None:
+                q = quoted[style] = self.quote_attrib(str(style))
+            if style_first:
+                yield template % (q, d)
+            else:
+                yield template % (d, q)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Marker shapes for point symbols. Each shape is defined once as a SVG symbol
+of radius 1, and placed with use elements scaled to the symbol size.
+"""
+
+import numpy as np
+
+import pysvg.shape
+from pysvg.structure import symbol
+
+
+SYMBOL_SHAPES = ('circle', 'square', 'triangle', 'diamond')
+
+# The shapes are scaled by the use elements, so the stroke width would be
+# scaled as well without non-scaling-stroke.
+SHAPE_STYLE = 'vector-effect:non-scaling-stroke'
+
+
+def unit_outline(shape, segments=32):
+    """
+    Returns the outline of the shape with radius 1 around the origin as a
+    (n, 2) array. Circles are approximated with the given number of segments.
+    """
+    if shape == 'circle':
+        a = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+        return np.column_stack((np.cos(a), np.sin(a)))
+    if shape == 'square':
+        return np.array([(-1., -1.), (1., -1.), (1., 1.), (-1., 1.)])
+    if shape == 'triangle':
+        h = np.sqrt(3) / 2
+        return np.array([(0., -1.), (h, 0.5), (-h, 0.5)])
+    if shape == 'diamond':
+        return np.array([(0., -1.), (1., 0.), (0., 1.), (-1., 0.)])
+    raise Exception('Error. Unknown symbol shape %s.' % shape)
+
+
+def symbol_element(shape, symbol_id):
+    """
+    Returns a symbol element with the given id for the shape. The symbol
+    has no fill or stroke of its own, so it takes the style of the use
+    element referencing it.
+    """
+    sym = symbol(id=symbol_id, viewBox='-1 -1 2 2')
+    # Do not clip the part of the stroke outside of the view box
+    sym.set_style('overflow:visible')
+    if shape == 'circle':
+        elem = pysvg.shape.circle(cx=0, cy=0, r=1)
+    else:
+        outline = unit_outline(shape)
+        elem = pysvg.shape.polygon(
+            points=' '.join(['%s,%s' % (repr(x), repr(y)) for x, y in outline.tolist()])
+        )
+    elem.set_style(SHAPE_STYLE)
+    sym.addElement(elem)
+    return sym
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+"""
+Text measurement from the advance widths of the standard PDF fonts.
+Widths are in 1/1000 em for the printable ASCII characters 32 to 126.
+Other characters are measured by their base letter if they have one
+(e.g. accented letters), or with the width of 'n'.
+"""
+
+import re
+import unicodedata
+
+from utils import LRUCache
+
+
+_WIDTHS = {
+    'Helvetica': """
+        278 278 355 556 556 889 667 191 333 333 389 584 278 333 278 278
+        556 556 556 556 556 556 556 556 556 556 278 278 584 584 584 556
+        1015 667 667 722 722 667 611 778 722 278 500 667 556 833 722 778
+        667 778 722 667 611 722 667 944 667 667 611 278 278 278 469 556
+        333 556 556 500 556 556 278 556 556 222 222 500 222 833 556 556
+        556 556 333 500 278 556 500 722 500 500 500 334 260 334 584""",
+    'Helvetica-Bold': """
+        278 333 474 556 556 889 722 238 333 333 389 584 278 333 278 278
+        556 556 556 556 556 556 556 556 556 556 333 333 584 584 584 611
+        975 722 722 722 722 667 611 778 722 278 556 722 611 833 722 778
+        667 778 722 667 611 722 667 944 667 667 611 333 278 333 584 556
+        333 556 611 556 611 556 333 611 611 278 278 556 278 889 611 611
+        611 611 389 556 333 611 556 778 556 556 500 389 280 389 584""",
+    'Times': """
+        250 333 408 500 500 833 778 180 333 333 500 564 250 333 250 278
+        500 500 500 500 500 500 500 500 500 500 278 278 564 564 564 444
+        921 722 667 667 722 611 556 722 722 333 389 722 611 889 722 722
+        556 722 667 556 611 722 722 944 722 722 611 333 278 333 469 500
+        333 444 500 444 500 444 333 500 500 278 278 500 278 778 500 500
+        500 500 333 389 278 500 500 722 500 500 444 480 200 480 541""",
+    'Times-Bold': """
+        250 333 555 500 500 1000 833 278 333 333 500 570 250 333 250 278
+        500 500 500 500 500 500 500 500 500 500 333 333 570 570 570 500
+        930 722 667 722 722 667 611 778 778 389 500 778 667 944 722 778
+        611 778 722 556 667 722 722 1000 722 722 667 333 278 333 581 500
+        333 500 556 444 556 444 333 500 556 278 333 556 278 833 556 500
+        556 556 444 389 333 556 500 722 500 500 444 394 220 394 520""",
+    'Courier': ' '.join(['600'] * 95),
+    'Courier-Bold': ' '.join(['600'] * 95),
+}
+
+# Generic and common font family names, and the standard font with the
+# most similar metrics
+_FAMILIES = {
+    'helvetica': 'Helvetica', 'arial': 'Helvetica', 'sans-serif': 'Helvetica',
+    'liberation sans': 'Helvetica', 'nimbus sans': 'Helvetica',
+    'times': 'Times', 'times new roman': 'Times', 'serif': 'Times',
+    'liberation serif': 'Times', 'georgia': 'Times',
+    'courier': 'Courier', 'courier new': 'Courier', 'monospace': 'Courier',
+    'liberation mono': 'Courier',
+}
+
+# Conversion factors of CSS length units to pixels (at 72 dpi)
+_UNITS = {
+    '': 1., 'px': 1., 'pt': 1., 'pc': 12., 'in': 72., 'mm': 72 / 25.4,
+    'cm': 72 / 2.54,
+}
+
+DEFAULT_FONT_SIZE = 12.
+
+
+
+class FontMetrics(object):
+    """
+    The advance widths of a font. Measured strings are kept in a LRU cache.
+    """
+    def __init__(self, name, widths, cache_size=4096):
+        self.name = name
+        self.widths = dict(
+            (unichr(32 + i), int(w)) for i, w in enumerate(widths.split())
+        )
+        self.default_width = self.widths['n']
+        self.cache = LRUCache(cache_size)
+
+    def char_width(self, c):
+        w = self.widths.get(c)
+        if w is None:
+            base = unicodedata.normalize('NFD', c)[:1]
+            w = self.widths.get(base, self.default_width)
+            if unicodedata.combining(c): w = 0
+            self.widths[c] = w
+        return w
+
+    def advance(self, content):
+        """
+        Returns the width of a string in em.
+        """
+        if not isinstance(content, unicode):
+            content = unicode(str(content), 'utf-8')
+        w = self.cache.get(content)
+        if w is None:
+            w = sum([self.char_width(c) for c in content]) / 1000.
+            self.cache.put(content, w)
+        return w
+
+
+
+_metrics = {}
+_font_sizes = {}
+
+
+def get_metrics(family='Helvetica', weight='normal'):
+    """
+    Returns the FontMetrics for a CSS font-family list and font-weight.
+    Unknown families use the metrics of Helvetica.
+    """
+    key = (family, weight)
+    m = _metrics.get(key)
+    if m is None:
+        name = 'Helvetica'
+        for f in str(family).split(','):
+            f = f.strip().strip('\'"').lower()
+            if f in _FAMILIES:
+                name = _FAMILIES[f]
+                break
+        bold = str(weight).lower() in ('bold', 'bolder', '600', '700', '800', '900')
+        if bold: name += '-Bold'
+        # Share the metrics (and their cache) between equivalent keys
+        m = _metrics.get(name)
+        if m is None:
+            m = _metrics[name] = FontMetrics(name, _WIDTHS[name])
+        _metrics[key] = m
+    return m
+
+
+def font_size(style, default=DEFAULT_FONT_SIZE):
+    """
+    Returns the font size in pixels at 72 dpi (i.e. in points) of a style
+    dictionary or StyleBuilder. The parsed values are cached.
+    """
+    value = _style_dict(style).get('font-size')
+    if value is None: return default
+    size = _font_sizes.get(value)
+    if size is None:
+        m = re.match(r'\s*([0-9]*\.?[0-9]+)\s*([a-z]*)', str(value))
+        if m is None or m.group(2) not in _UNITS:
+            size = default
+        else:
+            size = float(m.group(1)) * _UNITS[m.group(2)]
+        _font_sizes[value] = size
+    return size
+
+
+def style_metrics(style):
+    """
+    Returns the FontMetrics of a style dictionary or StyleBuilder.
+    """
+    d = _style_dict(style)
+    return get_metrics(d.get('font-family', 'Helvetica'), d.get('font-weight', 'normal'))
+
+
+def text_width(content, style):
+    """
+    Returns the width in pixels of a single line of text.
+    """
+    return style_metrics(style).advance(content) * font_size(style)
+
+
+def wrap_text(content, width, style):
+    """
+    Breaks a text into lines not wider than width pixels, at spaces.
+    Existing line breaks are kept, and words wider than width get a line
+    of their own.
+    """
+    size = font_size(style)
+    metrics = style_metrics(style)
+    max_em = width / size
+    space = metrics.advance(' ')
+    out = []
+    for paragraph in content.split('\n'):
+        words = paragraph.split(' ')
+        line, line_width = words[0], metrics.advance(words[0])
+        for word in words[1:]:
+            w = metrics.advance(word)
+            if line_width + space + w <= max_em:
+                line += ' ' + word
+                line_width += space + w
+            else:
+                out.append(line)
+                line, line_width = word, w
+        out.append(line)
+    return out
+
+
+def _style_dict(style):
+    return getattr(style, 'style_dict', style)
@@ -3,6 +3,7 @@
 Some functions useful all over the module.
 """
 
+from collections import OrderedDict
 from random import choice
 
 
@@ -29,6 +30,32 @@ def parse(val):
     return v
 
 
+class LRUCache(object):
+    """
+    A mapping keeping the maxsize most recently used entries.
+    """
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            value = self.data.pop(key)
+        except KeyError:
+            return default
+        self.data[key] = value
+        return value
+
+    def put(self, key, value):
+        self.data.pop(key, None)
+        self.data[key] = value
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def __len__(self):
+        return len(self.data)
+
+
 def random_string(length=10):
     s = ''
     while len(s) < length:
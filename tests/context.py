@@ -0,0 +1,16 @@
+"""
+Makes the themavis sources (and the bundled pysvg) importable when the
+tests are run from the source tree:
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+
+root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+for d in ('src', 'lib'):
+    if os.path.join(root, d) not in sys.path:
+        sys.path.insert(0, os.path.join(root, d))
+
+datadir = os.path.join(root, 'data')
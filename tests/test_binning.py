@@ -0,0 +1,126 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import context
+import themavis as tm
+from themavis.binning import aggregate, cell_centers, cell_outline, hexagon_cells, square_cells
+from pysvg.structure import g
+
+
+class CellsTest(unittest.TestCase):
+    def test_square_cells(self):
+        pts = np.array([(0., 0.), (4.99, 9.99), (5., 10.), (-0.01, -12.)])
+        cells = square_cells(pts, 5)
+        self.assertEqual(cells.tolist(), [[0, 0], [0, 1], [1, 2], [-1, -3]])
+        self.assertEqual(cell_centers(cells, 5, 'square').tolist(),
+            [[2.5, 2.5], [2.5, 7.5], [7.5, 12.5], [-2.5, -12.5]])
+
+    def test_nearest_hexagon(self):
+        # A point lies in the hexagon with the closest center
+        pts = np.random.RandomState(0).rand(3000, 2) * 40 - 20
+        cells = hexagon_cells(pts, 2.)
+        centers = cell_centers(cells, 2.)
+        dist = np.hypot(*(pts - centers).T)
+        for dq, dr in ((1, 0), (0, 1), (-1, 1), (-1, 0), (0, -1), (1, -1)):
+            other = cell_centers(cells + (dq, dr), 2.)
+            self.assertTrue((dist <= np.hypot(*(pts - other).T) + 1e-9).all())
+        self.assertTrue(dist.max() <= 2. + 1e-9)
+
+    def test_hexagon_round_trip(self):
+        cells = np.array([(0, 0), (3, -1), (-2, 5), (7, 7)])
+        self.assertEqual(hexagon_cells(cell_centers(cells, 1.5), 1.5).tolist(), cells.tolist())
+
+    def test_outline(self):
+        hexagon = cell_outline(2.)
+        self.assertEqual(hexagon.shape, (6, 2))
+        self.assertTrue(np.allclose(np.hypot(*hexagon.T), 2))
+        self.assertEqual(np.abs(cell_outline(4., 'square')).max(), 2)
+        self.assertRaises(Exception, cell_outline, 1., 'triangle')
+        self.assertRaises(Exception, cell_centers, [(0, 0)], 1., 'triangle')
+
+
+class AggregateTest(unittest.TestCase):
+    def test_counts(self):
+        cells = [(0, 0), (2, -1), (0, 0), (-3, 4), (2, -1), (0, 0)]
+        out, counts, sums, means = aggregate(cells)
+        found = dict(zip(map(tuple, out.tolist()), counts.tolist()))
+        self.assertEqual(found, {(0, 0): 3, (2, -1): 2, (-3, 4): 1})
+        self.assertTrue(sums is None and means is None)
+
+    def test_weights_with_nan(self):
+        cells = [(1, 1), (1, 1), (1, 1), (5, 2), (5, 2)]
+        out, counts, sums, means = aggregate(cells, [1., np.nan, 5., np.nan, np.nan])
+        i = out.tolist().index([1, 1])
+        self.assertEqual((counts[i], sums[i], means[i]), (3, 6., 3.))
+        self.assertEqual((counts[1-i], sums[1-i]), (2, 0.))
+        self.assertTrue(np.isnan(means[1-i]))
+
+    def test_empty(self):
+        out, counts, sums, means = aggregate(np.zeros((0, 2)), np.zeros(0))
+        self.assertEqual((len(out), len(counts), len(sums), len(means)), (0, 0, 0, 0))
+        self.assertTrue(aggregate(np.zeros((0, 2)))[2] is None)
+
+
+class BinningLayerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'incidents.geojson')
+        rnd = np.random.RandomState(2)
+        features = [
+            {'type': 'Feature', 'properties': {'v': v},
+                'geometry': {'type': 'Point', 'coordinates': [x, y]}}
+            for (x, y), v in zip((rnd.rand(400, 2) * 80 - 40).tolist(), rnd.rand(400).tolist())
+        ]
+        features[0]['properties']['v'] = None
+        features.append({'type': 'Feature', 'properties': {'v': 1}, 'geometry': None})
+        with open(self.path, 'w') as f:
+            json.dump({'type': 'FeatureCollection', 'features': features}, f)
+        self.map = tm.container.Map(0, 0, 100, 100, (-50, -50, 50, 50))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_invalid(self):
+        self.assertRaises(Exception, tm.layer.BinningLayer, 'b', self.path, shape='circle')
+        self.assertRaises(Exception, tm.layer.BinningLayer, 'b', self.path, space='screen')
+
+    def test_cells(self):
+        lyr = tm.layer.BinningLayer('b', self.path, 10, 'square', attr='v')
+        features, centers = lyr.aggregated_cells(self.map)
+        counts = [f['properties']['count'] for f in features]
+        self.assertEqual(sum(counts), 400)
+        # The grid starts at the corner of the map, the points cover 8 x 8 squares
+        self.assertEqual(len(features), 64)
+        self.assertTrue(np.allclose((centers - 5) % 10, 0))
+        total = sum(f['properties']['sum'] for f in features)
+        # The feature without geometry is in no cell
+        self.assertAlmostEqual(total, np.nansum(lyr.attribute_array('v')[:-1]))
+
+    def test_cells_cached(self):
+        lyr = tm.layer.BinningLayer('b', self.path, 4, space='projected')
+        cells = lyr.aggregated_cells(self.map)
+        self.assertTrue(lyr.aggregated_cells(self.map) is cells)
+        # Projected cells don't depend on the map frame
+        moved = tm.container.Map(10, 10, 50, 50, (-50, -50, 50, 50))
+        self.assertTrue(lyr.aggregated_cells(moved) is cells)
+        lyr.space = 'page'
+        self.assertFalse(lyr.aggregated_cells(moved) is cells)
+
+    def test_draw_grouped_by_style(self):
+        lyr = tm.layer.BinningLayer('b', self.path, 6)
+        self.map.add_layer(lyr)
+        elem = g()
+        lyr.draw_content(elem, self.map)
+        # One path per class of the default quantile style
+        self.assertTrue(1 < len(elem._subElements) <= 5)
+        ncells = len(lyr.aggregated_cells(self.map)[0])
+        self.assertEqual(elem.getXML().count('z'), ncells)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import context
+import themavis as tm
+from themavis.cartogram import neighbor_pairs, resolve_overlaps
+
+
+def min_clearance(centers, radii):
+    """
+    The smallest distance between the edges of two circles, all pairs.
+    """
+    d = centers[:,np.newaxis,:] - centers[np.newaxis,:,:]
+    dist = np.hypot(d[...,0], d[...,1]) - radii[:,np.newaxis] - radii[np.newaxis,:]
+    dist[np.diag_indices(len(centers))] = np.inf
+    return dist.min()
+
+
+class NeighborPairsTest(unittest.TestCase):
+    def test_all_close_pairs(self):
+        pts = np.random.RandomState(0).rand(400, 2) * 100 - 30
+        i, j = neighbor_pairs(pts, 7.5)
+        self.assertTrue((i < j).all())
+        pairs = set(zip(i.tolist(), j.tolist()))
+        self.assertEqual(len(pairs), len(i))
+        d = np.hypot(*(pts[:,np.newaxis,:] - pts[np.newaxis,:,:]).transpose(2, 0, 1))
+        close = zip(*np.nonzero(np.triu(d < 7.5, 1)))
+        self.assertTrue(set(close).issubset(pairs))
+        # Only pairs of the same or adjacent cells
+        cells = np.floor(pts / 7.5)
+        self.assertTrue((np.abs(cells[i] - cells[j]) <= 1).all())
+
+    def test_same_cell(self):
+        i, j = neighbor_pairs(np.array([(1., 1.), (1.5, 1.2), (1.2, 1.9)]), 2)
+        self.assertEqual(sorted(zip(i.tolist(), j.tolist())), [(0, 1), (0, 2), (1, 2)])
+
+
+class ResolveOverlapsTest(unittest.TestCase):
+    def test_no_overlaps(self):
+        rnd = np.random.RandomState(4)
+        centers = rnd.rand(300, 2) * 60
+        radii = rnd.rand(300) * 3 + 0.5
+        start = centers.copy()
+        pos, iterations = resolve_overlaps(centers, radii, gap=0.5, iterations=2000)
+        self.assertTrue(iterations < 2000)
+        self.assertTrue(min_clearance(pos, radii) > 0.5 - 0.01)
+        self.assertTrue(np.array_equal(centers, start))
+
+    def test_stays_put_without_overlaps(self):
+        centers = np.array([(0., 0.), (10., 0.), (0., 10.)])
+        pos, iterations = resolve_overlaps(centers, [1, 2, 3])
+        self.assertEqual(iterations, 0)
+        self.assertTrue(np.array_equal(pos, centers))
+
+    def test_same_position(self):
+        pos = resolve_overlaps(np.zeros((4, 2)), [1., 1., 1., 1.])[0]
+        self.assertTrue(np.isfinite(pos).all())
+        self.assertTrue(min_clearance(pos, np.ones(4)) > -0.01)
+
+    def test_larger_circle_moves_less(self):
+        pos = resolve_overlaps(np.array([(0., 0.), (1., 0.)]), [4., 1.])[0]
+        self.assertTrue(abs(pos[0,0]) < abs(pos[1,0] - 1))
+        self.assertAlmostEqual(pos[1,0] - pos[0,0], 5, 1)
+
+    def test_single_circle(self):
+        pos, iterations = resolve_overlaps(np.array([(3., 4.)]), [2.])
+        self.assertEqual((pos.tolist(), iterations), ([[3., 4.]], 0))
+
+
+class DorlingCartogramLayerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'districts.geojson')
+        features = [
+            {'type': 'Feature', 'properties': {'votes': v},
+                'geometry': {'type': 'Polygon', 'coordinates': [[
+                    [x, 0], [x + 2, 0], [x + 2, 2], [x, 2], [x, 0]]]}}
+            for x, v in zip(range(0, 20, 2), [100, 80, 60, 90, 40, 100, 70, 0, None, 50])
+        ]
+        features.append({'type': 'Feature', 'properties': {'votes': 30},
+            'geometry': {'type': 'Point', 'coordinates': [5, 20]}})
+        with open(self.path, 'w') as f:
+            json.dump({'type': 'FeatureCollection', 'features': features}, f)
+        self.map = tm.container.Map(0, 0, 100, 100, (-10, -40, 30, 40))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_anchors(self):
+        lyr = tm.layer.DorlingCartogramLayer('d', self.path, 'votes')
+        anchors = lyr.feature_anchors(None)
+        self.assertTrue(np.allclose(anchors[0], (1, 1)))
+        self.assertTrue(np.allclose(anchors[10], (5, 20)))
+
+    def test_layout(self):
+        lyr = tm.layer.DorlingCartogramLayer('d', self.path, 'votes', gap=0.3)
+        feature_ids, centers, radii = lyr.symbol_centers(self.map)
+        self.assertEqual(sorted(feature_ids.tolist()), [0, 1, 2, 3, 4, 5, 6, 9, 10])
+        self.assertTrue(min_clearance(centers, radii) > 0.3 - 0.01)
+
+    def test_layout_cached(self):
+        lyr = tm.layer.DorlingCartogramLayer('d', self.path, 'votes')
+        layout = lyr.symbol_centers(self.map)
+        self.assertTrue(lyr.symbol_centers(self.map) is layout)
+        # A new layout for a new gap, and for another map frame
+        lyr.gap = 1
+        self.assertFalse(lyr.symbol_centers(self.map) is layout)
+        other = tm.container.Map(0, 0, 50, 100, (-10, -40, 30, 40))
+        lyr.symbol_centers(other)
+        self.assertEqual(len(lyr._layouts), 3)
+        lyr.gap = 0.2
+        self.assertTrue(lyr.symbol_centers(self.map) is layout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import itertools
+import unittest
+
+import numpy as np
+
+import context
+import themavis as tm
+from pysvg.structure import g
+from themavis import classify
+from themavis.stats import AttributeStatistics
+
+
+def brute_force_jenks(values, k):
+    # Tries every split of the sorted distinct values into k classes
+    x = np.unique(values)
+    best, best_limits = np.inf, None
+    for splits in itertools.combinations(range(1, len(x)), k - 1):
+        bounds = (0,) + splits + (len(x),)
+        cost = 0.
+        for i, j in zip(bounds[:-1], bounds[1:]):
+            cls = values[(values >= x[i]) & (values <= x[j-1])]
+            cost += ((cls - cls.mean()) ** 2).sum()
+        if cost < best - 1e-9:
+            best, best_limits = cost, [x[i] for i in splits]
+    return best_limits
+
+
+class FisherJenksTest(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rnd = np.random.RandomState(3)
+        for k in (2, 3, 4):
+            values = np.round(rnd.lognormal(size=14), 2)
+            self.assertEqual(list(classify.fisher_jenks(values, k)), brute_force_jenks(values, k))
+
+    def test_separated_groups(self):
+        values = np.concatenate((np.zeros(5), np.ones(5) * 10, np.ones(5) * 20))
+        self.assertEqual(list(classify.fisher_jenks(values, 3)), [10, 20])
+
+    def test_few_distinct_values(self):
+        limits = classify.fisher_jenks([1, 1, 2, 2, np.nan], 5)
+        self.assertEqual(list(limits), [2])
+
+    def test_sample_keeps_range(self):
+        values = np.random.RandomState(0).rand(5000)
+        limits = classify.fisher_jenks(values, 4, sample=500)
+        self.assertEqual(len(limits), 3)
+        self.assertTrue(np.all(np.diff(limits) > 0))
+        self.assertTrue(values.min() < limits[0] and limits[-1] <= values.max())
+
+
+class ClassifierTest(unittest.TestCase):
+    def test_equal_interval(self):
+        self.assertTrue(np.allclose(classify.equal_interval([0, 4, 10], 5), [2, 4, 6, 8]))
+
+    def test_std_mean(self):
+        values = np.array([1., 2, 3, 4, 5])
+        limits = classify.std_mean(values, 4)
+        self.assertAlmostEqual(limits[1], 3)
+        self.assertAlmostEqual(limits[2] - limits[1], values.std())
+
+    def test_geometric_interval(self):
+        self.assertTrue(np.allclose(classify.geometric_interval([1, 1000], 3), [10, 100]))
+        self.assertRaises(Exception, classify.geometric_interval, [0, 1], 3)
+
+    def test_head_tail(self):
+        values = np.array([1] * 80 + [10] * 15 + [100] * 4 + [1000])
+        limits = classify.head_tail(values)
+        self.assertEqual(len(limits), 2)
+        self.assertAlmostEqual(limits[0], values.mean())
+        self.assertAlmostEqual(limits[1], 280)
+        self.assertEqual(len(classify.head_tail(values, max_classes=2)), 1)
+
+
+class ClassedLegendTest(unittest.TestCase):
+    def test_legend_with_fewer_limits(self):
+        # head_tail finds 2 classes for 5 colors: only those are shown
+        style = tm.style.ClassedSurfaceStyle('v', tm.color.colormaps.get('ylorrd5'), classify.head_tail)
+        style.set_statistics(AttributeStatistics([1] * 9 + [100]))
+        self.assertEqual(len(style.limits), 1)
+        elem = g()
+        style.legend(elem, 0, 0, 40, 60, {'font-size': '8pt'})
+        svg = elem.getXML()
+        self.assertEqual(svg.count('<rect'), 2)
+        self.assertTrue(style.colors.colors[0].hex in svg)
+        self.assertFalse(style.colors.colors[2].hex in svg)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import unittest
+
+import numpy as np
+
+import context
+import themavis as tm
+from themavis.clip import clip_lines, clip_polygons
+from themavis.geometry import PackedGeometries
+
+
+def packed(rings, kind, features=None):
+    sizes = [len(r) for r in rings]
+    offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+    if features is None: features = range(len(rings) + 1)
+    return PackedGeometries(np.array([c for r in rings for c in r], dtype=np.float64),
+        offsets, np.array(features, dtype=np.int64), kind)
+
+
+class ClipPolygonsTest(unittest.TestCase):
+    def test_diamond(self):
+        # A diamond of area 2 around the corner of the unit square: the
+        # part inside is a quarter
+        p = packed([[(1, 0), (2, 1), (1, 2), (0, 1)]], 'polygon')
+        out = clip_polygons(p, (1, 1, 5, 5))
+        self.assertAlmostEqual(out.ring_areas()[0], 0.5)
+        self.assertTrue((out.coords >= 1).all())
+
+    def test_inside_outside_and_features(self):
+        inside = [(2, 2), (3, 2), (3, 3)]
+        outside = [(20, 20), (30, 20), (30, 30)]
+        p = packed([inside, outside, inside], 'polygon', [0, 2, 2, 3])
+        out = clip_polygons(p, (0, 0, 10, 10))
+        self.assertEqual(out.nfeatures, 3)
+        self.assertEqual(list(out.feature_offsets), [0, 1, 1, 2])
+        self.assertTrue(np.array_equal(out.coords[:3], inside))
+
+    def test_random_convex_areas(self):
+        # The clipped area of a rectangle is the area of the intersection
+        rnd = np.random.RandomState(2)
+        for i in range(20):
+            x0, y0 = rnd.uniform(-5, 5, 2)
+            w, h = rnd.uniform(0.1, 8, 2)
+            p = packed([[(x0, y0), (x0 + w, y0), (x0 + w, y0 + h), (x0, y0 + h)]], 'polygon')
+            out = clip_polygons(p, (0, 0, 4, 3))
+            iw = max(0, min(x0 + w, 4) - max(x0, 0))
+            ih = max(0, min(y0 + h, 3) - max(y0, 0))
+            area = out.ring_areas().sum() if out.nrings else 0
+            self.assertAlmostEqual(area, iw * ih)
+
+
+class ClipLinesTest(unittest.TestCase):
+    def test_leave_and_enter(self):
+        p = packed([[(1, 1), (5, 1), (5, 3), (1, 3)]], 'line')
+        out = clip_lines(p, (0, 0, 2, 4))
+        self.assertEqual(out.nrings, 2)
+        self.assertEqual(out.coords.tolist(), [[1, 1], [2, 1], [2, 3], [1, 3]])
+        self.assertEqual(list(out.feature_offsets), [0, 2])
+
+    def test_crossing_segment(self):
+        p = packed([[(-1, 1), (3, 1)], [(5, 5), (6, 6)]], 'line')
+        out = clip_lines(p, (0, 0, 2, 2))
+        self.assertEqual(out.coords.tolist(), [[0, 1], [2, 1]])
+        self.assertEqual(list(out.feature_offsets), [0, 1, 1])
+
+
+class ClippedLayerTest(unittest.TestCase):
+    def test_paths_within_frame(self):
+        m = tm.container.Map(10, 10, 50, 50, (0, 30, 30, 60))
+        lyr = tm.layer.VectorLayer('countries',
+            os.path.join(context.datadir, 'naturalearth', 'ne_110m_admin_0_countries.geojson'), clip=True)
+        polys, visible = lyr.local_geometries(lyr.packed_polygons(), m)
+        margin = tm.layer.CULLING_MARGIN
+        coords = polys.coords[np.repeat(visible[polys.feature_ids()], np.diff(polys.ring_offsets))]
+        self.assertTrue(len(coords) > 0)
+        self.assertTrue((coords >= 10 - margin - 1e-9).all())
+        self.assertTrue((coords <= 60 + margin + 1e-9).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import pickle
+import unittest
+
+import numpy as np
+
+import context
+from themavis.color import Color, ColorMap, parse_color
+
+
+class ColorTest(unittest.TestCase):
+    def test_encodings(self):
+        c = Color((255, 128.7, 0), 0.5)
+        self.assertEqual(c.rgb, (255, 128, 0))
+        self.assertEqual(c.rgba, (255, 128, 0, 0.5))
+        self.assertEqual(c.hex, '#ff8000')
+        self.assertTrue(c.hex is c.hex)
+        self.assertEqual(Color().hex, '#ffffff')
+
+    def test_immutable(self):
+        c = Color((1, 2, 3))
+        self.assertRaises(AttributeError, setattr, c, 'r', 10)
+        self.assertRaises(AttributeError, setattr, c, 'extra', 1)
+        self.assertFalse(hasattr(c, '__dict__'))
+        self.assertEqual(c.r, 1)
+
+    def test_equality_and_hash(self):
+        self.assertEqual(Color((1, 2, 3)), Color([1, 2, 3]))
+        self.assertNotEqual(Color((1, 2, 3)), Color((1, 2, 3), 0.5))
+        self.assertNotEqual(Color((1, 2, 3)), (1, 2, 3))
+        self.assertEqual(len(set([Color((1, 2, 3)), Color((1, 2, 3)), Color((3, 2, 1))])), 2)
+
+    def test_pickle(self):
+        c = Color((10, 20, 30), 0.25)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copy = pickle.loads(pickle.dumps(c, protocol))
+            self.assertEqual(copy, c)
+            self.assertEqual(copy.hex, '#0a141e')
+
+
+class ParseColorTest(unittest.TestCase):
+    def test_formats(self):
+        self.assertEqual(parse_color('#f80'), (255, 136, 0))
+        self.assertEqual(parse_color(' #FF8800 '), (255, 136, 0))
+        self.assertEqual(parse_color('rgb(1, 2.9, 3)'), (1, 2, 3))
+        self.assertEqual(parse_color('Navy'), (0, 0, 128))
+        self.assertEqual(parse_color(Color((4, 5, 6))), (4, 5, 6))
+        for value in ('none', 'transparent', ''):
+            self.assertTrue(parse_color(value) is None)
+        self.assertRaises(Exception, parse_color, 'octarine')
+
+
+class ColorMapRgbTest(unittest.TestCase):
+    def test_compact_storage(self):
+        cmap = ColorMap('test', ['#000000', (255, 0, 0), Color((0, 0, 255))])
+        self.assertEqual(cmap.rgb.dtype, np.uint8)
+        self.assertEqual(cmap.rgb.shape, (3, 3))
+        self.assertEqual([c.hex for c in cmap.colors], ['#000000', '#ff0000', '#0000ff'])
+        # Vectorized styling indexes the array directly
+        self.assertEqual(cmap.rgb[[2, 0]].tolist(), [[0, 0, 255], [0, 0, 0]])
+
+    def test_colors_not_shared(self):
+        a = ColorMap('a', ['red'])
+        b = ColorMap('b', ['blue', 'lime'])
+        self.assertEqual(len(a.colors), 1)
+        self.assertEqual(len(b.colors), 2)
+        self.assertEqual(len(ColorMap().colors), 0)
+        # Setting new colors drops the cached Colors
+        a.set_rgb(np.array([[1, 2, 3], [4, 5, 6]]))
+        self.assertEqual(a.colors, (Color((1, 2, 3)), Color((4, 5, 6))))
+
+
+if __name__ == '__main__':
+    unittest.main()
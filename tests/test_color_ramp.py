@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+import context
+import themavis as tm
+from themavis.color import ColorRamp, lab_to_rgb, rgb_to_lab
+from themavis.stats import AttributeStatistics, attribute_values
+
+
+def feature(v):
+    return {'type': 'Feature', 'geometry': None, 'properties': {'v': v}}
+
+
+class ColorRampTest(unittest.TestCase):
+    def test_lab_roundtrip(self):
+        rgb = np.array([(0, 0, 0), (255, 255, 255), (255, 0, 0), (12, 200, 99)], dtype=np.float64)
+        self.assertTrue(np.allclose(lab_to_rgb(rgb_to_lab(rgb)), rgb, atol=1e-6))
+        self.assertAlmostEqual(rgb_to_lab(rgb)[1,0], 100, places=4)
+
+    def test_ends_and_positions(self):
+        ramp = ColorRamp([(255, 0, 0), (0, 255, 0), (0, 0, 255)], size=11, positions=[0, 0.2, 1])
+        self.assertEqual(len(ramp), 11)
+        self.assertEqual(ramp.hex[0], '#ff0000')
+        self.assertEqual(ramp.hex[2], '#00ff00')
+        self.assertEqual(ramp.hex[-1], '#0000ff')
+
+    def test_indices(self):
+        ramp = ColorRamp(tm.color.colormaps.get('ylgnbu5'), size=101)
+        idx = ramp.indices([-5, 0, 2.5, 10, 20, np.nan], 0, 10)
+        self.assertEqual(list(idx), [0, 0, 25, 100, 100, -1])
+        # A range without width gives the first color
+        self.assertEqual(list(ramp.indices([3, 4], 3, 3)), [0, 0])
+        self.assertEqual(list(ramp.hex_colors([np.nan, 10], 0, 10, 'none')), ['none', ramp.hex[-1]])
+
+
+class ContinuousStyleTest(unittest.TestCase):
+    def test_shared_missing_values(self):
+        features = [feature(v) for v in (1, '3', None, 'n/a', 5.)]
+        features.append({'properties': {}})
+        values = attribute_values(features, 'v')
+        self.assertTrue(np.array_equal(np.isnan(values), [False, False, True, True, False, True]))
+        ramp = tm.color.colormaps.get('ylorrd5')
+        continuous = tm.style.ContinuousSurfaceStyle('v', ramp)
+        classed = tm.style.ClassedSurfaceStyle('v', ramp, tm.classify.equal_interval)
+        for style in (continuous, classed):
+            style.init_statistics()
+            for f in features:
+                style.update_statistics(f)
+            style.finalize_statistics()
+            self.assertEqual((style.statistics.count, style.statistics.min, style.statistics.max), (3, 1, 5))
+            styles = style.styles_for_features(features)
+            for i in (2, 3, 5):
+                self.assertTrue(styles[i] is style.default_style)
+            self.assertEqual(styles[0].style_dict['fill'], ramp.colors[0].hex)
+            self.assertEqual(styles[4].style_dict['fill'], ramp.colors[-1].hex)
+
+    def test_shared_builders(self):
+        style = tm.style.ContinuousSurfaceStyle('v', tm.color.colormaps.get('reds5'), vmin=0, vmax=1)
+        styles = style.styles_for_features([feature(0.5), feature(0.5), feature(1)])
+        self.assertTrue(styles[0] is styles[1])
+        self.assertFalse(styles[0] is styles[2])
+
+    def test_range_needs_statistics(self):
+        style = tm.style.ContinuousSurfaceStyle('v', tm.color.colormaps.get('reds5'), vmax=1)
+        self.assertRaises(Exception, style.value_range)
+        style.set_statistics(AttributeStatistics([-1., 3.]))
+        self.assertEqual(style.value_range(), (-1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
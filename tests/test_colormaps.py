@@ -0,0 +1,67 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import context
+from themavis.color import ColorMap, ColorMapRegistry, colormaps
+
+
+class RegistryTest(unittest.TestCase):
+    def test_shared_and_frozen(self):
+        cmap = colormaps.get('ylorrd5')
+        self.assertTrue(colormaps.get('ylorrd5') is cmap)
+        self.assertEqual(len(cmap.colors), 5)
+        self.assertTrue(cmap.colors is cmap.colors)
+        self.assertRaises(AttributeError, setattr, cmap, 'cmap_id', 'x')
+        self.assertRaises(ValueError, cmap.rgb.__setitem__, 0, 0)
+        # A ColorMap of its own can be modified
+        own = ColorMap('ylorrd5')
+        own.set_rgb(['red', (0, 0, 255)])
+        self.assertEqual(own.rgb.tolist(), [[255, 0, 0], [0, 0, 255]])
+        self.assertEqual(len(cmap.rgb), 5)
+
+    def test_find(self):
+        found = colormaps.find('seq', 7)
+        self.assertTrue(len(found) > 5)
+        for cmap in found:
+            self.assertEqual((cmap.cmap_type, len(cmap.rgb)), ('seq', 7))
+        ids = [c.cmap_id for c in found]
+        self.assertEqual(ids, sorted(ids))
+        family = colormaps.find(family=colormaps.get('ylgnbu5').family)
+        self.assertTrue(colormaps.get('ylgnbu9') in family)
+        self.assertEqual(colormaps.find('seq', 1000), [])
+
+    def test_unknown(self):
+        self.assertFalse('nosuchmap' in colormaps)
+        self.assertTrue('reds5' in colormaps)
+        self.assertRaises(Exception, colormaps.get, 'nosuchmap')
+
+
+class BundleTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_loaded_on_first_use(self):
+        path = os.path.join(self.tmpdir, 'maps.json')
+        registry = ColorMapRegistry(path)
+        with open(path, 'w') as f:
+            json.dump({'bw2': {'name': 'BW-2', 'type': 'seq', 'crit_val': None,
+                'colors': [[0, 0, 0], [255, 255, 255]]}}, f)
+        self.assertEqual(registry.ids(), ['bw2'])
+        self.assertEqual(registry.families(), ['bw'])
+        self.assertEqual(registry.get('bw2').colors[1].hex, '#ffffff')
+
+    def test_missing_bundle(self):
+        registry = ColorMapRegistry(os.path.join(self.tmpdir, 'none.json'))
+        self.assertRaises(Exception, registry.ids)
+
+
+if __name__ == '__main__':
+    unittest.main()
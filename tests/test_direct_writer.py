@@ -0,0 +1,94 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+import context
+import themavis as tm
+from pysvg.structure import g
+
+
+COUNTRIES = os.path.join(context.datadir, 'naturalearth', 'ne_110m_admin_0_countries.geojson')
+
+
+class CountingStyle(tm.style.ContinuousSurfaceStyle):
+    """
+    Records the features styled at once.
+    """
+    def styles_for_features(self, features):
+        self.styled.extend(features)
+        return tm.style.ContinuousSurfaceStyle.styles_for_features(self, features)
+
+
+class DirectWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        # Europe only
+        self.map = tm.container.Map(10, 10, 100, 80, (-10, 35, 30, 70))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def layer(self, direct):
+        style = CountingStyle('GDP_MD_EST', tm.color.colormaps.get('ylgnbu9'))
+        style.styled = []
+        lyr = tm.layer.VectorLayer('countries', COUNTRIES, style=style, direct=direct)
+        # A feature without geometry is never drawn
+        lyr.features[0]['geometry'] = None
+        lyr.invalidate()
+        self.map.add_layer(lyr)
+        return lyr
+
+    def test_same_paths_as_objects(self):
+        objects = g()
+        self.layer(False).draw_content(objects, self.map)
+        expected = re.findall(r'<path ([^>]*)/>', objects.getXML())
+        direct = self.layer(True)
+        direct.update_style_statistics()
+        records = list(direct.path_records(self.map))
+        self.assertEqual(len(records), len(expected))
+        self.assertTrue(len(records) < len(direct.features) / 2)
+        for (d, style), attrs in zip(records, expected):
+            self.assertTrue(('d="%s"' % d) in attrs)
+            self.assertTrue(('style="%s"' % style) in attrs)
+
+    def test_styles_only_drawn_features(self):
+        lyr = self.layer(True)
+        lyr.update_style_statistics()
+        drawn = [j for j, d in lyr.path_data(self.map)]
+        list(lyr.path_records(self.map))
+        self.assertEqual([id(f) for f in lyr.style.styled], [id(lyr.features[j]) for j in drawn])
+
+    def test_batches(self):
+        lyr = self.layer(True)
+        lyr.update_style_statistics()
+        batch = tm.layer.STYLE_BATCH
+        tm.layer.STYLE_BATCH = 3
+        try:
+            small = list(lyr.path_records(self.map))
+        finally:
+            tm.layer.STYLE_BATCH = batch
+        self.assertEqual(small, list(lyr.path_records(self.map)))
+
+    def test_raster_styles_only_drawn_features(self):
+        lyr = self.layer(False)
+        lyr.update_style_statistics()
+        canvas = tm.raster.Canvas(120, 100, 72)
+        lyr.draw_raster(canvas, self.map)
+        self.assertEqual(len(lyr.style.styled), len(list(lyr.path_data(self.map))))
+
+    def test_page_output(self):
+        page = tm.page.Page(120., 100.)
+        page.containers.append(self.map)
+        self.layer(True)
+        path = os.path.join(self.tmpdir, 'direct.svg')
+        page.write(path)
+        with open(path) as f:
+            svg = f.read()
+        self.assertTrue(svg.count('<path ') > 10)
+        self.assertTrue(svg.rstrip().endswith('</svg>'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import context
+import themavis as tm
+from themavis.geometry import pack_polygons, points_in_rings, sample_points
+from pysvg.structure import g
+
+
+# A concave U shape and two squares of a single feature
+U_SHAPE = [[0, 0], [30, 0], [30, 30], [20, 30], [20, 10], [10, 10], [10, 30], [0, 30], [0, 0]]
+SQUARES = [
+    [[[-40, -40], [-30, -40], [-30, -30], [-40, -30], [-40, -40]]],
+    [[[-20, -40], [-10, -40], [-10, -30], [-20, -30], [-20, -40]]]
+]
+
+
+def polygon(coords, **properties):
+    return {'type': 'Feature', 'properties': properties,
+        'geometry': {'type': 'Polygon', 'coordinates': [coords]}}
+
+
+def multipolygon(coords, **properties):
+    return {'type': 'Feature', 'properties': properties,
+        'geometry': {'type': 'MultiPolygon', 'coordinates': coords}}
+
+
+def inside_u(pts):
+    x, y = pts[:,0], pts[:,1]
+    box = (x > 0) & (x < 30) & (y > 0) & (y < 30)
+    notch = (x > 10) & (x < 20) & (y > 10)
+    return box & ~notch
+
+
+class PointsInRingsTest(unittest.TestCase):
+    def test_concave_ring(self):
+        packed = pack_polygons([polygon(U_SHAPE)])
+        rnd = np.random.RandomState(1)
+        pts = rnd.rand(5000, 2) * 40 - 5
+        inside = points_in_rings(pts, np.zeros(len(pts), dtype=np.int64), packed)
+        self.assertTrue(np.array_equal(inside, inside_u(pts)))
+
+    def test_ring_of_each_point(self):
+        packed = pack_polygons([polygon(U_SHAPE), multipolygon(SQUARES)])
+        pts = np.array([(5, 20), (5, 20), (-35, -35), (-35, -35), (-15, -35)], dtype=np.float64)
+        rings = np.array([0, 1, 1, 2, 2])
+        self.assertEqual(points_in_rings(pts, rings, packed).tolist(),
+            [True, False, True, False, True])
+
+    def test_chunks(self):
+        packed = pack_polygons([polygon(U_SHAPE)])
+        pts = np.random.RandomState(2).rand(2500, 2) * 40 - 5
+        rings = np.zeros(len(pts), dtype=np.int64)
+        expected = points_in_rings(pts, rings, packed)
+        chunk = tm.geometry.PIP_CHUNK
+        tm.geometry.PIP_CHUNK = 300
+        try:
+            self.assertTrue(np.array_equal(points_in_rings(pts, rings, packed), expected))
+        finally:
+            tm.geometry.PIP_CHUNK = chunk
+
+
+class SamplePointsTest(unittest.TestCase):
+    def setUp(self):
+        self.packed = pack_polygons([
+            polygon(U_SHAPE), multipolygon(SQUARES),
+            {'type': 'Feature', 'properties': {}, 'geometry': None}
+        ])
+
+    def test_counts_and_containment(self):
+        pts, features = sample_points(self.packed, [500, 200, 50], seed=3)
+        self.assertEqual(np.bincount(features, minlength=3).tolist(), [500, 200, 0])
+        self.assertTrue(inside_u(pts[features == 0]).all())
+        sq = pts[features == 1]
+        in_squares = (sq[:,1] > -40) & (sq[:,1] < -30) & (
+            ((sq[:,0] > -40) & (sq[:,0] < -30)) | ((sq[:,0] > -20) & (sq[:,0] < -10)))
+        self.assertTrue(in_squares.all())
+        # Both squares of the second feature get dots
+        left = (sq[:,0] < -25).sum()
+        self.assertTrue(50 < left < 150)
+
+    def test_reproducible(self):
+        a = sample_points(self.packed, [100, 40, 0], seed=7)
+        b = sample_points(self.packed, [100, 40, 0], seed=7)
+        c = sample_points(self.packed, [100, 40, 0], seed=8)
+        self.assertTrue(np.array_equal(a[0], b[0]))
+        self.assertFalse(np.array_equal(a[0], c[0]))
+
+    def test_nothing_to_place(self):
+        pts, features = sample_points(self.packed, [0, -5, 10])
+        self.assertEqual(pts.shape, (0, 2))
+        self.assertEqual(len(features), 0)
+
+
+class DotDensityLayerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'zones.geojson')
+        with open(self.path, 'w') as f:
+            json.dump({'type': 'FeatureCollection', 'features': [
+                polygon(U_SHAPE, a=1000, b=260),
+                multipolygon(SQUARES, a=None, b=-50),
+            ]}, f)
+        self.map = tm.container.Map(0, 0, 100, 100, (-50, -50, 50, 50))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_dot_counts(self):
+        lyr = tm.layer.DotDensityLayer('dots', self.path, ['a', 'b'], 100)
+        self.assertEqual(lyr.dot_counts('a').tolist(), [10, 0])
+        self.assertEqual(lyr.dot_counts('b').tolist(), [3, 0])
+
+    def test_colors(self):
+        self.assertRaises(Exception, tm.layer.DotDensityLayer, 'dots', self.path,
+            ['a', 'b'], 100, colors=['red'])
+        lyr = tm.layer.DotDensityLayer('dots', self.path, 'a', 100, colors=['#f00'])
+        self.assertEqual(lyr.colors[0].hex, '#ff0000')
+
+    def test_dots_cached(self):
+        lyr = tm.layer.DotDensityLayer('dots', self.path, ['a', 'b'], 10, seed=5)
+        first = lyr.dots(self.map)
+        self.assertEqual([len(d) for d in first], [100, 26])
+        self.assertEqual(len(lyr._dots), 1)
+        again = lyr.dots(self.map)
+        self.assertTrue(all(np.array_equal(x, y) for x, y in zip(first, again)))
+        self.assertEqual(len(lyr._dots), 1)
+        # New dots after the data is edited
+        lyr.features[0]['properties']['a'] = 500
+        lyr.invalidate(geometries=False)
+        self.assertEqual(len(lyr.dots(self.map)[0]), 50)
+        self.assertEqual(len(lyr._dots), 2)
+
+    def test_one_path_per_category(self):
+        lyr = tm.layer.DotDensityLayer('dots', self.path, ['a', 'b'], 10,
+            colors=['red', 'blue'])
+        self.map.add_layer(lyr)
+        elem = g()
+        lyr.draw_content(elem, self.map)
+        self.assertEqual(len(elem._subElements), 2)
+        xml = elem.getXML()
+        self.assertEqual(xml.count('h0'), 126)
+        self.assertTrue('#ff0000' in xml and '#0000ff' in xml)
+
+
+if __name__ == '__main__':
+    unittest.main()
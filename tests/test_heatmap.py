@@ -0,0 +1,138 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import context
+import themavis as tm
+from themavis.density import bin_points, fft_size, gaussian_smooth, kernel_density
+from pysvg.structure import g
+
+
+def smooth(n):
+    for p in (2, 3, 5):
+        while n % p == 0: n //= p
+    return n == 1
+
+
+class FftSizeTest(unittest.TestCase):
+    def test_smallest_smooth_size(self):
+        for n in range(1, 600):
+            m = fft_size(n)
+            self.assertTrue(m >= n and smooth(m), n)
+            self.assertFalse(any(smooth(k) for k in range(n, m)), n)
+        self.assertEqual(fft_size(0), 1)
+        self.assertEqual(fft_size(1025), 1080)
+
+
+class BinPointsTest(unittest.TestCase):
+    def test_counts(self):
+        pts = [(0, 0), (0.9, 0.9), (2.5, 1.2), (-0.1, 0), (3, 0), (0, 2), (np.nan, 1)]
+        grid = bin_points(pts, (2, 3))
+        self.assertEqual(grid.tolist(), [[2, 0, 0], [0, 0, 1]])
+
+    def test_weights(self):
+        pts = [(0.5, 0.5), (0.5, 0.5), (1.5, 0.5), (5, 5)]
+        grid = bin_points(pts, (1, 2), [2., np.nan, 3., 100.])
+        self.assertEqual(grid.tolist(), [[2., 3.]])
+
+
+class GaussianSmoothTest(unittest.TestCase):
+    def test_direct_convolution(self):
+        grid = np.zeros((40, 50))
+        rnd = np.random.RandomState(3)
+        grid[rnd.randint(15, 25, 30), rnd.randint(15, 35, 30)] += rnd.rand(30)
+        sigma = 2.5
+        x = np.arange(-15, 16)
+        kernel = np.exp(-x ** 2 / (2 * sigma ** 2))
+        kernel /= kernel.sum()
+        direct = np.array([np.convolve(row, kernel, 'same') for row in grid])
+        direct = np.array([np.convolve(col, kernel, 'same') for col in direct.T]).T
+        result = gaussian_smooth(grid, sigma)
+        self.assertEqual(result.shape, grid.shape)
+        self.assertTrue(np.abs(result - direct).max() < 1e-4 * grid.max())
+        self.assertAlmostEqual(result.sum(), grid.sum())
+
+    def test_no_wrap_around(self):
+        grid = np.zeros((20, 20))
+        grid[0, 0] = 1
+        result = gaussian_smooth(grid, 2.)
+        # Without the padding, the far edges would get as much as the near ones
+        self.assertTrue(np.abs(result[-3:,:]).max() < 1e-5 * result.max())
+        self.assertTrue(np.abs(result[:,-3:]).max() < 1e-5 * result.max())
+        self.assertTrue(result[0,2] > 0.5 * result.max())
+
+    def test_no_smoothing(self):
+        grid = np.arange(6).reshape((2, 3))
+        self.assertEqual(gaussian_smooth(grid, 0).tolist(), grid.tolist())
+
+
+class KernelDensityTest(unittest.TestCase):
+    def test_sum_preserved(self):
+        pts = np.random.RandomState(1).rand(1000, 2) * (40, 20) + (30, 30)
+        density = kernel_density(pts, (80, 100), 3.)
+        self.assertTrue((density >= 0).all())
+        self.assertAlmostEqual(density.sum(), 1000, 6)
+
+    def test_margin(self):
+        # A point just outside contributes, a point far away does not
+        near = kernel_density([(-2, 10)], (20, 20), 2.)
+        self.assertTrue(near[:,0].sum() > 0.1)
+        far = kernel_density([(-20, 10)], (20, 20), 2.)
+        self.assertEqual(far.max(), 0)
+        self.assertTrue(kernel_density([(-2, 10)], (20, 20), 2., margin=0).max() == 0)
+
+
+class HeatmapLayerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'sensors.geojson')
+        rnd = np.random.RandomState(5)
+        with open(self.path, 'w') as f:
+            json.dump({'type': 'FeatureCollection', 'features': [
+                {'type': 'Feature', 'properties': {'w': 2},
+                    'geometry': {'type': 'Point', 'coordinates': [x, y]}}
+                for x, y in (rnd.randn(300, 2) * 5).tolist()
+            ]}, f)
+        self.map = tm.container.Map(10, 10, 80, 60, (-40, -30, 40, 30))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_density(self):
+        lyr = tm.layer.HeatmapLayer('h', self.path, bandwidth=3)
+        x0, y0, grid = lyr.density(self.map, 72)
+        self.assertEqual((x0, y0), (28, 28))
+        self.assertEqual(grid.shape, (170, 227))
+        # Points per square millimeter
+        self.assertAlmostEqual(grid.sum() * (25.4 / 72) ** 2, 300, 3)
+        weighted = tm.layer.HeatmapLayer('h', self.path, bandwidth=3, attr='w')
+        self.assertTrue(np.allclose(weighted.density(self.map, 72)[2], 2 * grid))
+
+    def test_density_cached(self):
+        lyr = tm.layer.HeatmapLayer('h', self.path)
+        d = lyr.density(self.map, 72)
+        self.assertTrue(lyr.density(self.map, 72) is d)
+        self.assertEqual(lyr.density(self.map, 144)[2].shape, (340, 453))
+        self.assertEqual(len(lyr._density), 2)
+
+    def test_colorize(self):
+        lyr = tm.layer.HeatmapLayer('h', self.path, vmax=4, fade=0.5, opacity=1)
+        rgba = lyr.colorize(np.array([[0., 1., 2., 8.]]))
+        self.assertEqual(rgba[0,:,3].tolist(), [0, 128, 255, 255])
+        self.assertEqual(rgba[0,3,:3].tolist(), list(lyr.ramp.lut[-1]))
+
+    def test_single_image(self):
+        lyr = tm.layer.HeatmapLayer('h', self.path)
+        self.map.add_layer(lyr)
+        elem = g()
+        lyr.draw_content(elem, self.map)
+        self.assertEqual(len(elem._subElements), 1)
+        self.assertTrue('data:image/png;base64,' in elem.getXML())
+
+
+if __name__ == '__main__':
+    unittest.main()
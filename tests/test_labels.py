@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import os
+import unittest
+
+import numpy as np
+
+import context
+import themavis as tm
+from pysvg.structure import g
+from themavis.geometry import pack_lines, pack_polygons
+from themavis.label import (CollisionIndex, LabelStyle, line_anchors,
+    place_labels, polygon_anchors)
+
+
+def brute_force_collides(boxes, box):
+    return any([box[0] < b[2] and b[0] < box[2] and box[1] < b[3] and b[1] < box[3] for b in boxes])
+
+
+class CollisionIndexTest(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rnd = np.random.RandomState(4)
+        index = CollisionIndex(cell_size=7)
+        placed = []
+        for i in range(500):
+            x, y = rnd.uniform(-50, 150, 2)
+            box = (x, y, x + rnd.uniform(0.5, 30), y + rnd.uniform(0.5, 10))
+            free = not brute_force_collides(placed, box)
+            self.assertEqual(index.insert_if_free(box), free)
+            if free: placed.append(box)
+        self.assertEqual(index.boxes, placed)
+
+    def test_touching_boxes_do_not_collide(self):
+        index = CollisionIndex()
+        index.insert((0, 0, 10, 10))
+        self.assertFalse(index.collides((10, 0, 20, 10)))
+        self.assertTrue(index.collides((9.9, 9.9, 20, 20)))
+
+    def test_place_labels(self):
+        boxes = np.array([(0, 0, 10, 5), (5, 2, 15, 7), (20, 0, 30, 5), (95, 0, 105, 5)], dtype=np.float64)
+        placed = place_labels(CollisionIndex(), boxes, [1, 0, 2, 3], (0, 0, 100, 100))
+        # Box 0 overlaps the first placed box 1, box 3 is outside
+        self.assertEqual(placed, [1, 2])
+
+
+class AnchorTest(unittest.TestCase):
+    def test_concave_polygon(self):
+        # A U shape: the centroid lies in the notch, the anchor must not
+        u = [(0, 0), (10, 0), (10, 10), (7, 10), (7, 3), (3, 3), (3, 10), (0, 10)]
+        big = [(20, 0), (30, 0), (30, 10), (20, 10)]
+        small = [(40, 0), (41, 0), (41, 1)]
+        packed = pack_polygons([
+            {'geometry': {'type': 'Polygon', 'coordinates': [u]}},
+            {'geometry': {'type': 'MultiPolygon', 'coordinates': [[small], [big]]}},
+            {'geometry': None},
+        ])
+        anchors, areas = polygon_anchors(packed)
+        x, y = anchors[0]
+        self.assertTrue(x < 3 or x > 7 or y < 3)
+        self.assertEqual(list(areas[:2]), [72, 100])
+        self.assertEqual(anchors[1].tolist(), [25, 5])
+        self.assertTrue(np.isnan(anchors[2]).all())
+
+    def test_line_middle(self):
+        packed = pack_lines([
+            {'geometry': {'type': 'LineString', 'coordinates': [(0, 0), (10, 0), (10, 4)]}},
+            {'geometry': {'type': 'MultiLineString', 'coordinates': [[(0, 0), (1, 0)], [(5, 5), (5, 25)]]}},
+        ])
+        anchors, lengths = line_anchors(packed)
+        self.assertEqual(anchors.tolist(), [[7, 0], [5, 15]])
+        self.assertEqual(lengths.tolist(), [14, 20])
+
+
+class LayerLabelsTest(unittest.TestCase):
+    def test_no_overlapping_labels(self):
+        page = tm.page.Page(200., 120.)
+        m = tm.container.Map(10, 10, 180, 100, (-180, -90, 180, 90))
+        page.containers.append(m)
+        labels = LabelStyle('NAME', priority='POP_EST')
+        lyr = tm.layer.VectorLayer('countries',
+            os.path.join(context.datadir, 'naturalearth', 'ne_110m_admin_0_countries.geojson'), labels=labels)
+        m.add_layer(lyr)
+        elem = g()
+        m.draw_labels(elem)
+        boxes = m.label_index.boxes
+        self.assertTrue(20 < len(boxes) < len(lyr.features))
+        for i in range(len(boxes)):
+            self.assertFalse(brute_force_collides(boxes[:i] + boxes[i+1:], boxes[i]))
+        xml = elem.getXML()
+        self.assertEqual(xml.count('<text'), len(boxes))
+        # The most populated countries come first
+        self.assertTrue('>China<' in xml.replace('\n', ''))
+
+    def test_escaped_unicode(self):
+        t = LabelStyle('name').label_elem(u'C\xf4te <d>', 0, 0).getXML()
+        self.assertTrue('C\xc3\xb4te &lt;d&gt;' in t)
+
+
+if __name__ == '__main__':
+    unittest.main()
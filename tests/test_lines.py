@@ -0,0 +1,81 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import context
+import themavis as tm
+from pysvg.structure import g
+from themavis.geometry import pack_lines
+from themavis.projection import Robinson
+
+
+ROADS = [
+    {'type': 'Feature', 'properties': {'name': 'a'},
+     'geometry': {'type': 'LineString', 'coordinates': [[0, 0], [10, 0], [10, 10]]}},
+    {'type': 'Feature', 'properties': {'name': 'b'},
+     'geometry': {'type': 'MultiLineString', 'coordinates': [[[0, 5], [5, 5]], [], [[-5, -5], [-5, 5, 100]]]}},
+    {'type': 'Feature', 'properties': {'name': 'c'}, 'geometry': None},
+    {'type': 'Feature', 'properties': {'name': 'd'},
+     'geometry': {'type': 'Polygon', 'coordinates': [[[0, 0], [1, 0], [1, 1], [0, 0]]]}},
+]
+
+
+class PackLinesTest(unittest.TestCase):
+    def test_offsets(self):
+        packed = pack_lines(ROADS)
+        self.assertEqual(packed.kind, 'line')
+        self.assertEqual(list(packed.ring_offsets), [0, 3, 5, 7])
+        self.assertEqual(list(packed.feature_offsets), [0, 1, 3, 3, 3])
+        # The third coordinate is dropped
+        self.assertEqual(packed.coords[-1].tolist(), [-5, 5])
+
+
+class LineLayerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'roads.geojson')
+        with open(self.path, 'w') as f:
+            json.dump({'type': 'FeatureCollection', 'features': ROADS[:3]}, f)
+        self.map = tm.container.Map(0, 0, 100, 100, (-20, -20, 20, 20))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_default_line_style(self):
+        lyr = tm.layer.VectorLayer('roads', self.path)
+        self.assertTrue(isinstance(lyr.style, tm.style.SimpleLineStyle))
+        self.assertEqual(lyr.style.style.style_dict['fill'], 'none')
+
+    def test_open_paths(self):
+        lyr = tm.layer.VectorLayer('roads', self.path)
+        data = list(lyr.path_data(self.map))
+        self.assertEqual([j for j, d in data], [0, 1])
+        for j, d in data:
+            self.assertFalse('z' in d)
+        # Two lines of feature b
+        self.assertEqual(data[1][1].count('M '), 2)
+
+    def test_direct_and_objects_agree(self):
+        elems = []
+        for direct in (False, True):
+            lyr = tm.layer.VectorLayer('roads', self.path, direct=direct)
+            elem = g()
+            lyr.draw_content(elem, self.map)
+            elems.append(elem.getXML())
+        self.assertEqual(elems[0], elems[1])
+
+    def test_projected_transform(self):
+        m = tm.container.Map(0, 0, 100, 100, (-20, -20, 20, 20), Robinson())
+        lyr = tm.layer.VectorLayer('roads', self.path)
+        local, visible = lyr.local_geometries(lyr.packed_lines(), m)
+        expected = m.projected_to_local_array(m.projection.project_array(lyr.packed_lines().coords))
+        self.assertTrue(np.allclose(local.coords, expected))
+        self.assertEqual(list(visible), [True, True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+import numpy as np
+
+import context
+import themavis as tm
+from themavis.projection import Robinson
+from themavis.utils import mm_to_px
+from test_png import decode_rows, read_chunks
+
+
+class PagePngTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def render(self, dpi, projection=None):
+        page = tm.page.Page(200., 120.)
+        m = tm.container.Map(10, 10, 180, 100, (-180, -90, 180, 90), projection)
+        page.containers.append(m)
+        style = tm.style.SimpleSurfaceStyle({'fill': '#ff0000', 'stroke': 'none'})
+        m.add_layer(tm.layer.VectorLayer('countries',
+            os.path.join(context.datadir, 'naturalearth', 'ne_110m_admin_0_countries.geojson'),
+            style=style))
+        path = os.path.join(self.tmpdir, 'page.png')
+        page.write_png(path, dpi=dpi)
+        with open(path, 'rb') as f:
+            chunks = read_chunks(f.read())
+        width, height = struct.unpack('>II', chunks[0][1][:8])
+        return m, decode_rows(chunks, width, 4).reshape(height, width, 4)
+
+    def pixel(self, m, rgba, lon, lat, dpi):
+        xy = m.projection.project_array([(lon, lat)]) if m.projection else np.array([(lon, lat)], dtype=np.float64)
+        x, y = mm_to_px(m.projected_to_local_array(xy)[0], dpi)
+        return tuple(rgba[int(y), int(x)])
+
+    def test_size_and_fill(self):
+        m, rgba = self.render(50)
+        self.assertEqual(rgba.shape, (int(round(120 * 50 / 25.4)), int(round(200 * 50 / 25.4)), 4))
+        # Australia is filled, the Pacific is not
+        self.assertEqual(self.pixel(m, rgba, 134, -25, 50), (255, 0, 0, 255))
+        self.assertEqual(self.pixel(m, rgba, -150, 0, 50), (255, 255, 255, 255))
+
+    def test_projected(self):
+        m, rgba = self.render(40, Robinson(0))
+        self.assertEqual(self.pixel(m, rgba, 20, 10, 40), (255, 0, 0, 255))
+        self.assertEqual(self.pixel(m, rgba, -30, -30, 40), (255, 255, 255, 255))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import struct
+import unittest
+import zlib
+
+import numpy as np
+
+import context
+from themavis.raster import Canvas, encode_indexed_png, encode_png, scanline_mask
+
+
+def read_chunks(png):
+    """
+    Returns the list of (tag, data) of a PNG file, checking the checksums.
+    """
+    assert png[:8] == b'\x89PNG\r\n\x1a\n'
+    chunks = []
+    pos = 8
+    while pos < len(png):
+        length, = struct.unpack('>I', png[pos:pos+4])
+        tag, data = png[pos+4:pos+8], png[pos+8:pos+8+length]
+        crc, = struct.unpack('>I', png[pos+8+length:pos+12+length])
+        assert crc == zlib.crc32(tag + data) & 0xffffffff
+        chunks.append((tag, data))
+        pos += 12 + length
+    return chunks
+
+
+def decode_rows(chunks, width, bytes_per_pixel):
+    raw = zlib.decompress(b''.join([d for t, d in chunks if t == b'IDAT']))
+    rows = np.frombuffer(raw, dtype=np.uint8).reshape(-1, width * bytes_per_pixel + 1)
+    # Only filter 0 (none) is written
+    assert (rows[:,0] == 0).all()
+    return rows[:,1:]
+
+
+class EncodePngTest(unittest.TestCase):
+    def test_rgba(self):
+        rgba = np.random.RandomState(0).randint(0, 256, (7, 5, 4)).astype(np.uint8)
+        chunks = read_chunks(encode_png(rgba))
+        self.assertEqual([t for t, d in chunks], [b'IHDR', b'IDAT', b'IEND'])
+        self.assertEqual(struct.unpack('>IIBBBBB', chunks[0][1]), (5, 7, 8, 6, 0, 0, 0))
+        self.assertTrue(np.array_equal(decode_rows(chunks, 5, 4).reshape(7, 5, 4), rgba))
+
+    def test_indexed(self):
+        palette = np.array([(255, 0, 0, 255), (0, 0, 255, 128), (0, 0, 0, 0), (9, 9, 9, 255)])
+        indices = np.array([[0, 1, 2], [2, 1, 0]], dtype=np.uint8)
+        chunks = dict(read_chunks(encode_indexed_png(indices, palette)))
+        self.assertEqual(struct.unpack('>IIBBBBB', chunks[b'IHDR'])[3], 3)
+        self.assertEqual(chunks[b'PLTE'], palette[:,:3].astype(np.uint8).tostring())
+        # The opaque last entry is not in the transparency chunk
+        self.assertEqual(chunks[b'tRNS'], b'\xff\x80\x00')
+        self.assertTrue(np.array_equal(decode_rows(read_chunks(encode_indexed_png(indices, palette)), 3, 1), indices))
+
+    def test_opaque_palette_without_transparency(self):
+        chunks = dict(read_chunks(encode_indexed_png(np.zeros((1, 1), dtype=np.uint8), [(1, 2, 3, 255)])))
+        self.assertFalse(b'tRNS' in chunks)
+        self.assertRaises(Exception, encode_indexed_png, np.zeros((1, 1), dtype=np.uint8), np.zeros((257, 4)))
+
+
+class ScanlineTest(unittest.TestCase):
+    def test_square_with_hole(self):
+        px = np.array([(1, 1), (9, 1), (9, 9), (1, 9), (3, 3), (7, 3), (7, 7), (3, 7)], dtype=np.float64)
+        mask = scanline_mask(px, np.array([0, 4, 8]), 10, 10)
+        self.assertEqual(mask.sum(), 64 - 16)
+        self.assertFalse(mask[5,5])
+        self.assertTrue(mask[1,1])
+        # With nonzero, the hole of the same orientation is filled
+        self.assertEqual(scanline_mask(px, np.array([0, 4, 8]), 10, 10, 'nonzero').sum(), 64)
+
+
+class CanvasTest(unittest.TestCase):
+    def test_antialiased_fill(self):
+        canvas = Canvas(10, 10, background=None)
+        # Half of the pixels of column 2 are covered
+        canvas.fill(np.array([(2.5, 0), (10, 0), (10, 10), (2.5, 10)]), np.array([0, 4]), (255, 0, 0))
+        rgba = canvas.to_rgba()
+        self.assertEqual(tuple(rgba[5,5]), (255, 0, 0, 255))
+        self.assertEqual(rgba[5,1,3], 0)
+        self.assertAlmostEqual(rgba[5,2,3], 128, delta=1)
+
+    def test_clip(self):
+        canvas = Canvas(20, 20, dpi=25.4)
+        canvas.set_clip(0, 0, 10, 20)
+        canvas.fill(np.array([(0, 0), (20, 0), (20, 20), (0, 20)]), np.array([0, 4]), (0, 0, 0))
+        rgba = canvas.to_rgba()
+        self.assertEqual(tuple(rgba[0,0,:3]), (0, 0, 0))
+        self.assertEqual(tuple(rgba[0,15,:3]), (255, 255, 255))
+
+    def test_composite_image(self):
+        canvas = Canvas(4, 4)
+        image = np.zeros((2, 6, 4), dtype=np.uint8)
+        image[:,:,2] = 255
+        image[:,:,3] = 255
+        canvas.composite_image(2, 1, image, opacity=0.5)
+        rgba = canvas.to_rgba()
+        self.assertEqual(tuple(rgba[1,3]), (128, 128, 255, 255))
+        self.assertEqual(tuple(rgba[0,3]), (255, 255, 255, 255))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+
+import numpy as np
+
+import context
+import themavis as tm
+from themavis.geometry import pack_polygons
+from themavis.projection import (EARTH_RADIUS, Albers, EqualEarth,
+    LambertAzimuthalEqualArea, Mercator, Robinson)
+
+
+class ProjectionTest(unittest.TestCase):
+    def test_mercator(self):
+        xy = Mercator().project_array([(0, 0), (90, 45), (0, 89.9999)])
+        self.assertTrue(np.allclose(xy[0], 0))
+        self.assertAlmostEqual(xy[1,0], EARTH_RADIUS * np.pi / 2)
+        self.assertAlmostEqual(xy[1,1], EARTH_RADIUS * np.log(np.tan(np.pi / 4 + np.pi / 8)))
+        # Clamped to max_lat, a square world
+        self.assertAlmostEqual(xy[2,1], EARTH_RADIUS * np.pi, places=0)
+
+    def test_central_meridian(self):
+        for p in (Robinson(40), EqualEarth(40), Mercator(40), Albers(40, 30)):
+            self.assertAlmostEqual(p.project_array([(40, 10)])[0,0], 0, places=6)
+            # Symmetric around lon0
+            xy = p.project_array([(30, 20), (50, 20)])
+            self.assertAlmostEqual(xy[0,0], -xy[1,0], places=4)
+            self.assertAlmostEqual(xy[0,1], xy[1,1], places=4)
+
+    def test_equal_area(self):
+        # Cells of 1 degree have the same area at every longitude, and the
+        # area of a spherical cell at the equator
+        lat = np.radians(1)
+        cell = EARTH_RADIUS ** 2 * np.radians(1) * np.sin(lat)
+        for p in (EqualEarth(), LambertAzimuthalEqualArea(10, 50), Albers(0, 0, 20, 50)):
+            corners = p.project_array([(0, 0), (1, 0), (1, 1), (0, 1)])
+            x, y = corners[:,0], corners[:,1]
+            area = abs(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)) / 2
+            self.assertAlmostEqual(area / cell, 1, places=3)
+
+    def test_key(self):
+        self.assertEqual(Robinson(10).key(), Robinson(10).key())
+        self.assertNotEqual(Robinson(10).key(), Robinson(20).key())
+        self.assertNotEqual(Robinson(10).key(), EqualEarth(10).key())
+
+
+class ProjectedCacheTest(unittest.TestCase):
+    def test_projected_once_per_projection(self):
+        packed = pack_polygons([{'geometry': {'type': 'Polygon',
+            'coordinates': [[(0, 0), (10, 0), (10, 10), (0, 0)]]}}])
+        a = packed.projected(Robinson(0))
+        self.assertTrue(packed.projected(Robinson(0)) is a)
+        self.assertFalse(packed.projected(Robinson(5)) is a)
+        self.assertTrue(packed.projected(None) is packed)
+        self.assertTrue(np.array_equal(a.coords, Robinson(0).project_array(packed.coords)))
+
+
+class ProjectedBboxTest(unittest.TestCase):
+    def world(self, projection):
+        return tm.container.Map(0, 0, 100, 50, (-180, -90, 180, 90), projection)
+
+    def test_world_extent_any_center(self):
+        width = self.world(Robinson(0)).projected_bbox()[2]
+        self.assertAlmostEqual(width / 1.7e7, 1, places=1)
+        for lon0 in (-30, 90, 150):
+            bb = self.world(Robinson(lon0)).projected_bbox()
+            self.assertAlmostEqual(bb[0] / -width, 1, places=6)
+            self.assertAlmostEqual(bb[2] / width, 1, places=6)
+
+    def test_bbox_across_seam(self):
+        # A bbox crossing the antimeridian of a map centered on Greenwich
+        # spans the whole width of the projection
+        m = tm.container.Map(0, 0, 100, 50, (100, -60, 250, 60), Robinson(0))
+        full = self.world(Robinson(0)).projected_bbox()
+        bb = m.projected_bbox()
+        self.assertAlmostEqual(bb[0], full[0], places=0)
+        self.assertAlmostEqual(bb[2], full[2], places=0)
+
+    def test_bbox_without_seam(self):
+        m = tm.container.Map(0, 0, 100, 50, (0, 30, 20, 60), Robinson(150))
+        bb = m.projected_bbox()
+        xy = Robinson(150).project_array([(0, 30), (20, 60)])
+        self.assertLess(bb[2], 0)
+        self.assertAlmostEqual(bb[1], xy[0,1])
+        self.assertAlmostEqual(bb[3], xy[1,1])
+
+    def test_adjusted_bbox_keeps_aspect(self):
+        m = self.world(Robinson(150))
+        bb = m.adjusted_bbox()
+        self.assertAlmostEqual((bb[2] - bb[0]) / (bb[3] - bb[1]), 2.)
+        full = self.world(Robinson(0)).projected_bbox()
+        self.assertAlmostEqual(bb[3] - bb[1], full[3] - full[1], places=0)
+        self.assertGreaterEqual(bb[2] - bb[0], full[2] - full[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import context
+import themavis as tm
+from pysvg.structure import defs, g
+
+
+def point(lon, lat, pop):
+    return {'type': 'Feature', 'properties': {'pop': pop},
+        'geometry': {'type': 'Point', 'coordinates': [lon, lat]}}
+
+
+class ProportionalSymbolTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cities.geojson')
+        with open(self.path, 'w') as f:
+            json.dump({'type': 'FeatureCollection', 'features': [
+                point(0, 0, 100), point(10, 10, 25), point(20, 20, None),
+                point(30, 30, 0), point(-20, -20, -400), point(170, 0, 400)
+            ]}, f)
+        self.map = tm.container.Map(0, 0, 100, 100, (-50, -50, 50, 50))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_radii(self):
+        lyr = tm.layer.ProportionalSymbolLayer('cities', self.path, 'pop', max_radius=4)
+        radii = lyr.symbol_radii(lyr.attribute_array('pop'))
+        self.assertTrue(np.allclose(radii[[0, 1, 3, 4, 5]], [2, 1, 0, 4, 4]))
+        self.assertTrue(np.isnan(radii[2]))
+        lyr.max_value = 100
+        self.assertAlmostEqual(lyr.symbol_radii(np.array([25.]))[0], 2)
+
+    def test_visible_largest_first(self):
+        lyr = tm.layer.ProportionalSymbolLayer('cities', self.path, 'pop', max_radius=4)
+        feature_ids, centers, radii = lyr.symbols(self.map)
+        # No symbol for the missing and zero values, nor outside of the map
+        self.assertEqual(list(feature_ids), [4, 0, 1])
+        self.assertTrue(np.allclose(centers[1], (50, 50)))
+
+    def test_shared_symbol(self):
+        lyr = tm.layer.ProportionalSymbolLayer('cities', self.path, 'pop', shape='square')
+        self.map.add_layer(lyr)
+        d, elem = defs(), g()
+        lyr.draw_defs(d, self.map)
+        lyr.draw_content(elem, self.map)
+        self.assertEqual(d.getXML().count('<symbol'), 1)
+        self.assertEqual(d.getXML().count('<polygon'), 1)
+        xml = elem.getXML()
+        self.assertEqual(xml.count('<use'), 3)
+        self.assertEqual(xml.count('xlink:href="#%s"' % lyr.symbol_id), 3)
+        # All symbols have the same style, and share a group
+        self.assertEqual(len(elem._subElements), 1)
+
+    def test_unknown_shape(self):
+        self.assertRaises(Exception, tm.layer.ProportionalSymbolLayer, 'cities', self.path, 'pop', shape='star')
+
+
+class GraduatedSymbolTest(unittest.TestCase):
+    def test_classes(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'p.geojson')
+            with open(path, 'w') as f:
+                json.dump({'type': 'FeatureCollection', 'features': [point(0, 0, 1)]}, f)
+            lyr = tm.layer.GraduatedSymbolLayer('p', path, 'pop', [10, 100], [1, 2, 3])
+            radii = lyr.symbol_radii(np.array([5, 10, 50, 1000, np.nan]))
+            self.assertEqual(list(radii[:4]), [1, 2, 2, 3])
+            self.assertTrue(np.isnan(radii[4]))
+            self.assertRaises(Exception, tm.layer.GraduatedSymbolLayer, 'p', path, 'pop', [10], [1, 2, 3])
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
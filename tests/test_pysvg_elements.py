@@ -0,0 +1,42 @@
+import unittest
+
+import context
+from pysvg import core, parser
+from pysvg.shape import path, rect
+from pysvg.structure import g
+from pysvg.text import text
+
+
+class SlotsTest(unittest.TestCase):
+    def test_no_instance_dict(self):
+        for name, cls in sorted(parser.getClassTable().items()):
+            self.assertFalse(hasattr(cls(), '__dict__'), name)
+
+    def test_leaf_elements_share_empty_children(self):
+        a, b = path(), path()
+        self.assertTrue(a._subElements is b._subElements)
+        a.addElement(text(content='x'))
+        self.assertEqual(len(a._subElements), 1)
+        self.assertEqual(len(b._subElements), 0)
+
+    def test_attributes_allocated_on_use(self):
+        p = path.__new__(path)
+        p._elementName = 'path'
+        p._textContent = []
+        p._subElements = core._NO_ELEMENTS
+        p.set_d('M0,0')
+        self.assertEqual(p.get_d(), 'M0,0')
+
+    def test_xml(self):
+        group = g()
+        group.setAttribute('id', 'content')
+        r = rect(x=1, y=2, width=3, height=4)
+        group.addElement(r)
+        xml = group.getXML()
+        self.assertTrue(xml.startswith('<g id="content"'))
+        for attr in ('x="1"', 'y="2"', 'width="3"', 'height="4"'):
+            self.assertTrue(attr in xml)
+
+
+if __name__ == '__main__':
+    unittest.main()
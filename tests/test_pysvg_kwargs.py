@@ -0,0 +1,38 @@
+import unittest
+
+import context
+from pysvg import core, parser
+from pysvg.builders import StyleBuilder
+
+
+class KWARGSTest(unittest.TestCase):
+    def test_same_as_setters(self):
+        # Every setter of every element, through setKWARGS and directly
+        for name, cls in sorted(parser.getClassTable().items()):
+            for key, setter in sorted(core.getSetterTable(cls).items()):
+                a, b = cls(), cls()
+                try:
+                    setter(b, '1')
+                except Exception:
+                    continue
+                a.setKWARGS(**{key: '1'})
+                self.assertEqual(a.getXML(), b.getXML(), '%s.set_%s' % (name, key))
+
+    def test_plain_attributes_bypass_setters(self):
+        table = core.getKWARGSTable(parser.getClassTable()['rect'])
+        self.assertEqual(table['stroke_width'], 'stroke-width')
+        self.assertEqual(table['x'], 'x')
+        self.assertTrue(core.getKWARGSTable(parser.getClassTable()['rect']) is table)
+
+    def test_style(self):
+        cls = parser.getClassTable()['path']
+        p = cls(style=StyleBuilder({'fill': 'red'}).getStyle())
+        self.assertTrue('fill:red' in p.getXML())
+
+    def test_unknown_keyword(self):
+        cls = parser.getClassTable()['circle']
+        self.assertRaises(AttributeError, cls, no_such_attribute=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
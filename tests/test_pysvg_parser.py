@@ -0,0 +1,56 @@
+import os
+import unittest
+from StringIO import StringIO
+
+import context
+from pysvg import parser
+
+
+SVG = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="100" height="50">
+  <defs><circle id="dot" cx="0" cy="0" r="2"/></defs>
+  <g id="content" style="fill:red">
+    <path d="M0,0L10,10Z" stroke-width="0.5"/>
+    <g><path d="M5,5L6,6Z"/><use xlink:href="#dot" x="3" y="4"/></g>
+  </g>
+  <text x="1" y="2">Hello <tspan>big</tspan> world</text>
+</svg>
+"""
+
+
+class FastParseTest(unittest.TestCase):
+    def test_same_as_minidom_parser(self):
+        path = os.path.join(context.root, 'examples', 'test-02', 'ne_countries.svg')
+        self.assertEqual(parser.fastparse(path).getXML(), parser.parse(path).getXML())
+
+    def test_attributes_and_text(self):
+        root = parser.fastparse(StringIO(SVG))
+        self.assertEqual(root.get_width(), '100')
+        xml = root.getXML()
+        self.assertTrue('stroke-width="0.5"' in xml)
+        self.assertTrue('xlink:href="#dot"' in xml)
+        self.assertTrue('Hello <tspan' in xml and 'big</tspan>\n world' in xml)
+        self.assertEqual(xml, parser.parse(StringIO(SVG)).getXML())
+
+    def test_attribute_values_are_not_evaluated(self):
+        svg = SVG.replace('width="100"', 'width="__import__(\'os\').getpid()"')
+        self.assertEqual(parser.fastparse(StringIO(svg)).get_width(), "__import__('os').getpid()")
+
+
+class IterParseTest(unittest.TestCase):
+    def test_root_children(self):
+        names = [obj._elementName for obj in parser.iterparse(StringIO(SVG))]
+        self.assertEqual(names, ['defs', 'g', 'text'])
+
+    def test_tags(self):
+        paths = list(parser.iterparse(StringIO(SVG), tags=['path']))
+        self.assertEqual([p.get_d() for p in paths], ['M0,0L10,10Z', 'M5,5L6,6Z'])
+
+    def test_nested_matches_stay_in_outer(self):
+        groups = list(parser.iterparse(StringIO(SVG), tags=['g']))
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(groups[0].getXML().count('<path'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
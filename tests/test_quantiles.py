@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+
+import context
+from themavis import stats
+from themavis.stats import quantile, quantiles
+
+
+class QuantilesTest(unittest.TestCase):
+    x = np.arange(10, 0, -1)
+    q = [0.1, 0.25, 0.5, 0.9]
+
+    def test_types_as_in_r(self):
+        # quantile(1:10, c(.1, .25, .5, .9), type=...) in R
+        expected = {
+            1: [1, 3, 5, 9],
+            4: [1, 2.5, 5, 9],
+            5: [1.5, 3, 5.5, 9.5],
+            6: [1.1, 2.75, 5.5, 9.9],
+            7: [1.9, 3.25, 5.5, 9.1],
+            8: [1.1 + 0.8 / 3, 3 - 0.25 / 3, 5.5, 9.9 - 0.8 / 3],
+            9: [1.4, 2.9375, 5.5, 9.6],
+        }
+        for qtype, values in sorted(expected.items()):
+            self.assertTrue(np.allclose(quantiles(self.x, self.q, qtype), values), qtype)
+
+    def test_numpy_percentile(self):
+        x = np.random.RandomState(0).standard_normal(1001)
+        q = np.linspace(0, 1, 41)
+        self.assertTrue(np.allclose(quantiles(x, q), np.percentile(x, q * 100)))
+
+    def test_partition_and_sort_agree(self):
+        x = np.random.RandomState(1).rand(500)
+        q = np.linspace(0.05, 0.95, 5)
+        partial = quantiles(x, q, 8)
+        limit = stats.PARTITION_MAX
+        stats.PARTITION_MAX = 0
+        try:
+            full = quantiles(x, q, 8)
+        finally:
+            stats.PARTITION_MAX = limit
+        self.assertTrue(np.array_equal(partial, full))
+        self.assertTrue(np.array_equal(quantiles(np.sort(x), q, 8, issorted=True), full))
+
+    def test_extremes_and_empty(self):
+        self.assertEqual(list(quantiles(self.x, [0, 1])), [1, 10])
+        self.assertEqual(list(quantiles([4.], [0.2, 0.8])), [4, 4])
+        self.assertTrue(np.isnan(quantiles([], [0.5])).all())
+        self.assertRaises(Exception, quantiles, self.x, [0.5], 10)
+
+    def test_scalar(self):
+        self.assertEqual(quantile(self.x, 0.5), 5.5)
+        self.assertEqual(quantile(self.x, 0.5, 10), None)
+
+    def test_does_not_modify_input(self):
+        x = self.x.copy()
+        quantiles(x, self.q)
+        self.assertTrue(np.array_equal(x, self.x))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import context
+import themavis as tm
+from themavis.grid import Grid, open_grid, write_grid
+
+
+class GridTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_window(self):
+        g = Grid(np.zeros((10, 20)), (0, 0, 20, 10))
+        self.assertEqual(g.window((2.5, 1, 5, 9.5)), (0, 9, 2, 5))
+        self.assertEqual(g.window((-10, -10, 100, 100)), (0, 10, 0, 20))
+        self.assertTrue(g.window((30, 0, 40, 10)) is None)
+
+    def test_block_average_skips_nodata(self):
+        data = np.arange(12, dtype=np.float64).reshape(3, 4)
+        data[0,0] = -1
+        g = Grid(data, (0, 0, 4, 3), nodata=-1)
+        blocks = g.block_average(0, 3, 0, 4, 2, 2)
+        self.assertEqual(blocks.shape, (2, 2))
+        self.assertAlmostEqual(blocks[0,0], (1 + 4 + 5) / 3.)
+        self.assertAlmostEqual(blocks[1,1], (10 + 11) / 2.)
+
+    def test_raw_grid_roundtrip(self):
+        path = os.path.join(self.tmpdir, 'g.grid')
+        data = np.random.RandomState(0).rand(5, 7).astype(np.float32)
+        write_grid(path, data, (0, 0, 7, 5), nodata=-9999)
+        g = open_grid(path)
+        self.assertEqual(g.shape, (5, 7))
+        self.assertEqual(g.nodata, -9999)
+        self.assertEqual(tuple(g.bbox), (0, 0, 7, 5))
+        self.assertTrue(np.array_equal(g.data, data))
+
+    def test_npy_needs_bbox(self):
+        path = os.path.join(self.tmpdir, 'g.npy')
+        np.save(path, np.zeros((2, 2)))
+        self.assertRaises(Exception, open_grid, path)
+
+
+class RasterLayerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def layer(self, data, bbox):
+        path = os.path.join(self.tmpdir, 'values.npy')
+        np.save(path, data)
+        return tm.layer.RasterLayer('values', path, bbox=bbox)
+
+    def test_values_cover_frame(self):
+        m = tm.container.Map(10, 10, 100, 50, (-180, -90, 180, 90))
+        lyr = self.layer(np.arange(18 * 36, dtype=np.float64).reshape(18, 36), (-180, -90, 180, 90))
+        m.add_layer(lyr)
+        x0, y0, values = lyr.values(m)
+        self.assertEqual(values.shape, (tm.utils.mm_to_px_int(60, 72) - y0,
+            tm.utils.mm_to_px_int(110, 72) - x0))
+        self.assertTrue(np.isfinite(values).all())
+        # Top left is the first row of the grid
+        self.assertLess(values[0,0], values[-1,-1])
+        self.assertTrue(lyr.values(m) is lyr.values(m))
+
+    def test_grid_smaller_than_pixel(self):
+        # The whole grid falls within a single pixel of a world map: the
+        # blocks must not grow beyond the window
+        m = tm.container.Map(10, 10, 100, 50, (-180, -90, 180, 90))
+        lyr = self.layer(np.ones((100, 100)), (0, 0, 0.001, 0.001))
+        m.add_layer(lyr)
+        x0, y0, values = lyr.values(m)
+        valid = values[np.isfinite(values)]
+        self.assertTrue(np.all(valid == 1))
+        self.assertLessEqual(len(valid), 1)
+
+    def test_png_output(self):
+        p = tm.page.Page(120., 70.)
+        m = tm.container.Map(10, 10, 100, 50, (-180, -90, 180, 90))
+        p.containers.append(m)
+        m.add_layer(self.layer(np.random.RandomState(1).rand(18, 36), (-180, -90, 180, 90)))
+        path = os.path.join(self.tmpdir, 'raster.png')
+        p.write_png(path, dpi=50)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(8), b'\x89PNG\r\n\x1a\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
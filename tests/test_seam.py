@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+
+import context
+from themavis.geometry import pack_lines, pack_polygons
+from themavis.projection import Robinson, split_at_seam
+
+
+def polygon(ring):
+    return {'geometry': {'type': 'Polygon', 'coordinates': [ring]}}
+
+
+class SplitAtSeamTest(unittest.TestCase):
+    def test_unchanged(self):
+        packed = pack_polygons([polygon([(0, 0), (10, 0), (10, 10)])])
+        self.assertTrue(split_at_seam(packed) is packed)
+        # Not crossing the seam of lon0 = 150, which is at -30
+        self.assertTrue(split_at_seam(packed, 150) is packed)
+
+    def test_ring_across_antimeridian(self):
+        packed = pack_polygons([polygon([(170, -10), (-170, -10), (-170, 10), (170, 10)])])
+        split = split_at_seam(packed)
+        self.assertEqual(split.nrings, 2)
+        self.assertEqual(list(split.feature_offsets), [0, 2])
+        self.assertTrue((np.abs(split.coords[:,0]) <= 180).all())
+        # 10 + 10 degrees wide, 20 degrees high
+        self.assertAlmostEqual(split.ring_areas().sum(), 400)
+        bounds = split.ring_bounds()
+        self.assertEqual(sorted(bounds[:,0].tolist()), [-180, 170])
+
+    def test_other_center(self):
+        packed = pack_polygons([polygon([(-40, 0), (-20, 0), (-20, 10), (-40, 10)])])
+        split = split_at_seam(packed, 150)
+        self.assertEqual(split.nrings, 2)
+        self.assertAlmostEqual(split.ring_areas().sum(), 200)
+        self.assertTrue(np.isclose(split.coords[:,0], -30).any())
+
+    def test_ring_around_pole(self):
+        # Antarctica-like ring going once around the south pole
+        lons = np.linspace(-180, 180, 37)[:-1]
+        packed = pack_polygons([polygon([(lon, -70) for lon in lons])])
+        split = split_at_seam(packed)
+        self.assertEqual(split.nrings, 1)
+        self.assertAlmostEqual(split.coords[:,1].min(), -90)
+        # The closed ring covers the whole cap from -70 to the pole
+        self.assertAlmostEqual(split.ring_areas()[0], 360 * 20)
+
+    def test_line(self):
+        packed = pack_lines([{'geometry': {'type': 'LineString',
+            'coordinates': [(160, 0), (-160, 10), (-150, 10)]}}])
+        split = split_at_seam(packed)
+        lines = sorted([r.tolist() for r in split.feature_rings(0)])
+        self.assertEqual(lines, [[[-180, 5], [-160, 10], [-150, 10]], [[160, 0], [180, 5]]])
+
+    def test_projected_without_wrapping_edges(self):
+        # After projection, no edge spans the whole width of the map
+        packed = pack_polygons([polygon([(170, -10), (-170, -10), (-170, 10), (170, 10)])])
+        proj = packed.projected(Robinson())
+        x = proj.coords[:,0]
+        nxt = proj.next_vertex()
+        self.assertLess(np.abs(x[nxt] - x).max(), 5e6)
+
+
+if __name__ == '__main__':
+    unittest.main()
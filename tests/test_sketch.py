@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import context
+import themavis as tm
+from themavis.stats import AttributeStatistics, KLLSketch
+
+
+class KLLSketchTest(unittest.TestCase):
+    def test_rank_error(self):
+        values = np.random.RandomState(5).standard_normal(200000)
+        sketch = KLLSketch(200)
+        for chunk in np.array_split(values, 37):
+            sketch.update(chunk)
+        self.assertEqual(sketch.n, len(values))
+        self.assertLess(len(sketch), 1000)
+        q = np.linspace(0.01, 0.99, 99)
+        ranks = np.searchsorted(np.sort(values), sketch.quantiles(q)) / float(len(values))
+        self.assertLess(np.abs(ranks - q).max(), 0.0165)
+
+    def test_exact_extremes_and_nan(self):
+        sketch = KLLSketch(50)
+        sketch.update([3., np.nan, -2., 7.])
+        self.assertEqual(sketch.n, 3)
+        self.assertEqual(list(sketch.quantiles([0, 1])), [-2, 7])
+        self.assertTrue(np.isnan(KLLSketch().quantiles([0.5])[0]))
+
+    def test_merge(self):
+        rnd = np.random.RandomState(1)
+        a, b = rnd.rand(50000), rnd.rand(30000) + 1
+        sa, sb = KLLSketch(200), KLLSketch(100, seed=1)
+        sa.update(a)
+        sb.update(b)
+        sa.merge(sb)
+        self.assertEqual(sa.n, 80000)
+        self.assertEqual(sa.max, b.max())
+        self.assertAlmostEqual(sa.rank(1.), 50000 / 80000., delta=0.02)
+
+
+class SketchStyleTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(context.datadir, 'naturalearth', 'ne_110m_admin_0_countries.geojson')
+        with open(path) as f:
+            data = json.load(f)
+        # Two layers with a part of the countries each
+        self.paths = []
+        for part in (data['features'][::2], data['features'][1::2]):
+            self.paths.append(os.path.join(self.tmpdir, '%i.geojson' % len(self.paths)))
+            with open(self.paths[-1], 'w') as f:
+                json.dump({'type': 'FeatureCollection', 'features': part}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def style(self):
+        return tm.style.QuantileSurfaceStyle('POP_EST', tm.color.colormaps.get('ylorrd5'),
+            [0.2, 0.4, 0.6, 0.8], sketch_size=64)
+
+    def test_statistics_pass_uses_sketch(self):
+        lyr = tm.layer.VectorLayer('a', self.paths[0], style=self.style())
+        lyr.update_style_statistics()
+        self.assertEqual(lyr.style.statistics.sorted_values, None)
+        self.assertEqual(lyr.style.statistics.count, len(lyr.features))
+        self.assertFalse(lyr.style.fixed_statistics)
+
+    def test_merged_statistics_survive_drawing(self):
+        layers = [tm.layer.VectorLayer('%i' % i, p, style=self.style()) for i, p in enumerate(self.paths)]
+        for lyr in layers:
+            lyr.update_style_statistics()
+        style = layers[0].style
+        style.merge_statistics(layers[1].style)
+        count, limits = style.statistics.count, list(style.limits)
+        self.assertEqual(count, sum([len(l.features) for l in layers]))
+        page = tm.page.Page(297., 210.)
+        m = tm.container.Map(10, 10, 277, 190, (-180, -90, 180, 90))
+        page.containers.append(m)
+        m.add_layer(layers[0])
+        page.write(os.path.join(self.tmpdir, 'merged.svg'))
+        self.assertEqual(style.statistics.count, count)
+        self.assertEqual(list(style.limits), limits)
+        # Released, the statistics come from the layer again
+        style.fixed_statistics = False
+        layers[0].update_style_statistics()
+        self.assertEqual(style.statistics.count, len(layers[0].features))
+
+    def test_merge_without_sketch(self):
+        styles = []
+        for p in self.paths:
+            lyr = tm.layer.VectorLayer(p, p, style=tm.style.ClassedSurfaceStyle('POP_EST',
+                tm.color.colormaps.get('ylorrd5'), tm.classify.equal_interval))
+            lyr.update_style_statistics()
+            styles.append(lyr.style)
+        total = styles[0].statistics.count + styles[1].statistics.count
+        styles[0].merge_statistics(styles[1])
+        self.assertEqual(styles[0].statistics.count, total)
+        self.assertTrue(styles[0].fixed_statistics)
+
+    def test_mixed_merge_fails(self):
+        a, b = self.style(), self.style()
+        b.sketch_size = None
+        a.set_statistics(AttributeStatistics(sketch=KLLSketch(64)))
+        b.set_statistics(AttributeStatistics([1., 2.]))
+        self.assertRaises(Exception, a.merge_statistics, b)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import unittest
+
+import context
+import themavis as tm
+from themavis.stats import AttributeStatistics
+from themavis.utils import LRUCache
+
+
+COUNTRIES = os.path.join(context.datadir, 'naturalearth', 'ne_110m_admin_0_countries.geojson')
+
+
+class LRUCacheTest(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('b', 'gone'), 'gone')
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+
+
+class SharedStatisticsTest(unittest.TestCase):
+    def test_layers_of_same_file_share(self):
+        a = tm.layer.VectorLayer('a', COUNTRIES)
+        b = tm.layer.VectorLayer('b', COUNTRIES)
+        self.assertTrue(a.statistics('POP_EST') is b.statistics('POP_EST'))
+        self.assertFalse(a.statistics('POP_EST') is a.statistics('GDP_MD_EST'))
+
+    def test_join_and_edits_are_private(self):
+        a = tm.layer.VectorLayer('a', COUNTRIES)
+        b = tm.layer.VectorLayer('b', COUNTRIES)
+        before = b.statistics('POP_EST')
+        a.join('ISO_A3', [{'iso': 'CHE', 'POP_EST': 1e12}], 'iso')
+        self.assertEqual(a.statistics('POP_EST').max, 1e12)
+        self.assertTrue(b.statistics('POP_EST') is before)
+        # Direct edits need invalidate
+        a.features[0]['properties']['POP_EST'] = 2e12
+        self.assertEqual(a.statistics('POP_EST').max, 1e12)
+        a.invalidate(geometries=False)
+        self.assertEqual(a.statistics('POP_EST').max, 2e12)
+
+    def test_styles_share_statistics(self):
+        colors = tm.color.colormaps.get('ylorrd5')
+        styles = [
+            tm.style.ClassedSurfaceStyle('POP_EST', colors, tm.classify.fisher_jenks),
+            tm.style.QuantileSurfaceStyle('POP_EST', colors, [0.2, 0.4, 0.6, 0.8]),
+            tm.style.ContinuousSurfaceStyle('POP_EST', colors),
+        ]
+        for style in styles:
+            tm.layer.VectorLayer('a', COUNTRIES, style=style).update_style_statistics()
+        self.assertTrue(styles[0].statistics is styles[1].statistics is styles[2].statistics)
+
+
+class ClassificationUpdateTest(unittest.TestCase):
+    def test_limits_follow_changes(self):
+        style = tm.style.QuantileSurfaceStyle('v', tm.color.colormaps.get('ylorrd5'), [0.2, 0.4, 0.6, 0.8])
+        statistics = AttributeStatistics(range(101))
+        style.set_statistics(statistics)
+        self.assertEqual(list(style.limits), [20, 40, 60, 80])
+        # Same statistics and classification: nothing to do
+        key = style.limits_key
+        style.set_statistics(statistics)
+        self.assertTrue(style.limits_key is key)
+        style.quantiles = [0.5]
+        style.colors = tm.color.colormaps.get('ylgnbu9')
+        style.set_statistics(statistics)
+        self.assertEqual(list(style.limits), [50])
+        self.assertEqual(style.styles[0].style_dict['fill'], style.colors.colors[0].hex)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import gzip
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+import context
+import themavis as tm
+from pysvg.shape import rect
+from pysvg.structure import g, svg
+from pysvg.text import text
+
+
+class StreamedXMLTest(unittest.TestCase):
+    def document(self):
+        doc = svg(width=10, height=10)
+        group = g()
+        for i in range(100):
+            group.addElement(rect(x=i, y=0, width=1, height=1))
+        group.addElement(text(content='caf\xc3\xa9', x=0, y=0))
+        doc.addElement(group)
+        return doc
+
+    def test_chunks_join_to_xml(self):
+        doc = self.document()
+        chunks = list(doc.iterXML())
+        self.assertTrue(len(chunks) > 100)
+        self.assertEqual(''.join(chunks), doc.getXML())
+
+    def test_write_in_blocks(self):
+        doc = self.document()
+        f = StringIO()
+        doc.writeXML(f, buffersize=64)
+        self.assertEqual(f.getvalue(), doc.getXML())
+
+
+class SvgzTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, **kwargs):
+        # The clip path ids are random
+        random.seed(7)
+        page = tm.page.Page(100., 60.)
+        m = tm.container.Map(5, 5, 90, 50, (-180, -90, 180, 90))
+        page.containers.append(m)
+        m.add_layer(tm.layer.VectorLayer('countries',
+            os.path.join(context.datadir, 'naturalearth', 'ne_110m_admin_0_countries.geojson')))
+        path = os.path.join(self.tmpdir, name)
+        page.write(path, **kwargs)
+        return path
+
+    def test_svgz_extension(self):
+        plain = open(self.write('map.svg')).read()
+        self.assertTrue(plain.startswith('<?xml'))
+        unzipped = gzip.open(self.write('map.svgz')).read()
+        self.assertEqual(unzipped, plain)
+        self.assertLess(os.path.getsize(os.path.join(self.tmpdir, 'map.svgz')), len(plain) / 2)
+
+    def test_compresslevel(self):
+        path = self.write('map.svg', compresslevel=1)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(2), b'\x1f\x8b')
+        self.assertEqual(gzip.open(path).read(), open(self.write('plain.svg')).read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import context
+from pysvg.builders import StyleBuilder
+from themavis import textmetrics
+from themavis.textmetrics import font_size, get_metrics, text_width, wrap_text
+
+
+class FontMetricsTest(unittest.TestCase):
+    def test_helvetica_widths(self):
+        m = get_metrics('Helvetica')
+        # H e l l o = 722 + 556 + 222 + 222 + 556
+        self.assertAlmostEqual(m.advance('Hello'), 2.278)
+        self.assertAlmostEqual(get_metrics('Helvetica', 'bold').advance('Hello'), 2.445)
+
+    def test_families(self):
+        self.assertEqual(get_metrics('"Times New Roman", serif').name, 'Times')
+        self.assertEqual(get_metrics('Arial', '700').name, 'Helvetica-Bold')
+        self.assertEqual(get_metrics('monospace').name, 'Courier')
+        self.assertEqual(get_metrics('Unknown Sans').name, 'Helvetica')
+        # Equivalent families share their metrics and cache
+        self.assertTrue(get_metrics('Arial') is get_metrics('sans-serif'))
+
+    def test_non_ascii(self):
+        m = get_metrics('Helvetica')
+        self.assertEqual(m.advance(u'\xe9'), m.advance(u'e'))
+        self.assertEqual(m.advance('Z\xc3\xbcrich'), m.advance(u'Zurich'))
+        self.assertEqual(m.advance(u'中'), m.advance(u'n'))
+
+    def test_cache(self):
+        m = textmetrics.FontMetrics('Courier', textmetrics._WIDTHS['Courier'], cache_size=2)
+        self.assertEqual(m.advance('abc'), 1.8)
+        self.assertEqual(len(m.cache), 1)
+        m.advance('a')
+        m.advance('b')
+        self.assertEqual(len(m.cache), 2)
+
+
+class FontSizeTest(unittest.TestCase):
+    def test_units(self):
+        self.assertEqual(font_size({'font-size': '14pt'}), 14)
+        self.assertEqual(font_size({'font-size': 10}), 10)
+        self.assertAlmostEqual(font_size({'font-size': '1in'}), 72)
+        self.assertAlmostEqual(font_size({'font-size': '25.4mm'}), 72)
+        self.assertEqual(font_size({'font-size': 'large'}, 9), 9)
+        self.assertEqual(font_size({}), textmetrics.DEFAULT_FONT_SIZE)
+        self.assertEqual(font_size(StyleBuilder({'font-size': '8pt'})), 8)
+
+    def test_text_width(self):
+        style = {'font-family': 'Courier', 'font-size': '10pt'}
+        self.assertAlmostEqual(text_width('abcd', style), 24)
+
+
+class WrapTextTest(unittest.TestCase):
+    style = {'font-family': 'Courier', 'font-size': '10px'}
+
+    def test_wrap_at_spaces(self):
+        # 6 px per character: 5 characters fit in 30 px
+        self.assertEqual(wrap_text('ab cd ef ghijkl m', 30, self.style), ['ab cd', 'ef', 'ghijkl', 'm'])
+
+    def test_keeps_line_breaks(self):
+        self.assertEqual(wrap_text('a b\nc', 100, self.style), ['a b', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()